@@ -1,21 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from pathlib import Path
+import hmac
 import os
-import json
+import threading
+import time
 
 import logging
-import vertexai
-from vertexai.preview.vision_models import ImageGenerationModel
-from google.oauth2 import service_account
 from google.api_core.exceptions import ResourceExhausted, TooManyRequests
 
-from engine.loader import save_mythology_data
+from engine.backfill import run_backfill
+from engine.backends import NoImageGenerated, get_backend
+from engine.entity_views import EntityViews, InvalidCursor
+from engine.facets import FacetIndex
+from engine.generation import generate_entity_image
+from engine.geo import GeoIndex
+from engine.image_store import CONTENT_NAME
+from engine.jobs import get_job_queue
+from engine.lineage import DIRECTIONS, MAX_DEPTH, LineageIndex
+from engine.metrics import GENERATE_FAILURES, GENERATE_STAGE_LATENCY, GENERATIONS_IN_FLIGHT, REQUEST_LATENCY, track_dataset
 from engine.orchestrator import ImageOrchestrator
-from engine.prompt_builder import build_prompt
+from engine.profiling import RequestTrace, SamplingProfiler, current_trace, timed
+from engine.search import SearchIndex
+from engine.static_files import StaticBundle
 
 
 
@@ -25,7 +39,67 @@ from engine.prompt_builder import build_prompt
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="L'Esprit - African Mythology Engine API")
+# -----------------------------
+# Orchestrator + warm-up
+# -----------------------------
+# Nothing slow runs at import: the dataset load and the image SDK init happen in a background
+# warm-up once uvicorn is up, so /health answers right away and /ready flips when done.
+orchestrator = ImageOrchestrator(load=False)
+_dataset_loaded = threading.Event()
+_dataset_lock = threading.Lock()
+_ready = threading.Event()
+WARM_UP_RETRY_SECONDS = 10
+facet_index = FacetIndex(orchestrator)
+entity_views = EntityViews(orchestrator, facet_index)
+search_index = SearchIndex(orchestrator)
+lineage_index = LineageIndex(orchestrator)
+geo_index = GeoIndex(orchestrator)
+track_dataset(orchestrator)
+
+
+def _load_dataset() -> bool:
+    """Loads the dataset once. Requests arriving before the warm-up got there do it themselves."""
+    if _dataset_loaded.is_set():
+        return True
+    with _dataset_lock:
+        if not _dataset_loaded.is_set():
+            try:
+                orchestrator.reload()
+            except Exception as e:
+                logger.error(f"Failed to load data: {e}")
+                return False
+            _dataset_loaded.set()
+    return True
+
+
+def _warm_up():
+    """Retries each step until it works: /ready must not flip with an empty catalog or a broken backend."""
+    while not _load_dataset():
+        time.sleep(WARM_UP_RETRY_SECONDS)
+    facet_index.refresh()
+    search_index.refresh()
+    lineage_index.refresh()
+    geo_index.refresh()
+    if dist_files:
+        dist_files.preload()
+    while True:
+        try:
+            get_backend().warm_up()
+            break
+        except Exception as e:
+            logger.warning(f"Image backend warm-up failed, retrying in {WARM_UP_RETRY_SECONDS}s: {e}")
+            time.sleep(WARM_UP_RETRY_SECONDS)
+    _ready.set()
+    logger.info("Engine ready.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="L'Esprit - African Mythology Engine API", lifespan=lifespan)
 
 
 # -----------------------------
@@ -39,6 +113,39 @@ if cors_origins_env.strip():
 else:
     allow_origins = ["http://localhost:3000", "http://127.0.0.1:3000", "*"]
 
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """Route latency histogram, Server-Timing header, and the profile of requests sent with X-Profile: 1."""
+    profile = request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1"
+    if profile and not _is_admin(request.headers.get("x-admin-token", "")):
+        return JSONResponse(status_code=403, content={"detail": "Admin token required"})
+
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    profiler = SamplingProfiler(trace).start() if profile else None
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_trace.reset(token)
+        if profiler:
+            profiler.stop()
+    elapsed = time.perf_counter() - start
+
+    # The route template, not the path, keeps the label set bounded (/preview/{entity_name}).
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(request.method, route.path if route else "unmatched", response.status_code).observe(elapsed)
+    server_timing = trace.server_timing(elapsed)
+    if profiler:
+        return Response(
+            profiler.collapsed(),
+            media_type="text/plain",
+            headers={"Server-Timing": server_timing, "X-Profiled-Status": str(response.status_code)},
+        )
+    response.headers["Server-Timing"] = server_timing
+    return response
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allow_origins,
@@ -48,31 +155,17 @@ app.add_middleware(
 )
 
 
-# -----------------------------
-# Orchestrator + config
-# -----------------------------
-orchestrator = ImageOrchestrator()
+# Admin routes are disabled unless ADMIN_TOKEN is set; clients send it as X-Admin-Token.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
 
-PROJECT_ID = os.environ.get("GCP_PROJECT_ID", "livingafricanpantheon")
-LOCATION = os.environ.get("GCP_LOCATION", "us-central1")
 
-# -----------------------------
-# Vertex AI init (HF-friendly)
-# -----------------------------
-# Sur HF, on passera un secret JSON dans GCP_SERVICE_ACCOUNT_JSON
-# En local, ton init peut continuer à marcher via ADC si tu veux.
-try:
-    gcp_sa_json = os.environ.get("GCP_SERVICE_ACCOUNT_JSON")
-    if gcp_sa_json:
-        info = json.loads(gcp_sa_json)
-        credentials = service_account.Credentials.from_service_account_info(info)
-        vertexai.init(project=PROJECT_ID, location=LOCATION, credentials=credentials)
-        print("Vertex AI initialized with service account from env.")
-    else:
-        vertexai.init(project=PROJECT_ID, location=LOCATION)
-        print("Vertex AI initialized (default credentials).")
-except Exception as e:
-    print(f"Warning: Failed to initialize Vertex AI: {e}")
+def _is_admin(token: str) -> bool:
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def _require_admin(x_admin_token: str = Header(default="")):
+    if not _is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
 
 
 class GenerateRequest(BaseModel):
@@ -80,23 +173,35 @@ class GenerateRequest(BaseModel):
     style_id: str = "photoreal"
 
 
+def _sync_dataset():
+    """Picks up entities saved by the other workers before a route reads the dataset."""
+    if not _load_dataset():
+        raise HTTPException(status_code=503, detail="Dataset unavailable")
+    with timed("sync"):
+        orchestrator.sync()
+
+
 def _find_entity(entity_name: str):
-    for entity in orchestrator.data:
-        if entity.name.lower() == entity_name.lower():
-            return entity
-    return None
+    return orchestrator.find_entity(entity_name)
 
 
 def _resolve_request_prompt(entity_name: str, style_id: str):
-    entity = _find_entity(entity_name)
+    with timed("lookup"):
+        entity = _find_entity(entity_name)
     if not entity:
         return None, "Entity not found."
 
-    if style_id == "regional_or_ethnic":
-        prompt = build_prompt(entity) or ""
-        return entity, prompt
+    with timed("prompt"):
+        return entity, orchestrator.resolve_prompt(entity, style_id)
 
-    return entity, orchestrator.get_prompt_preview(entity_name, style_id)
+
+def _require_prompt(entity_name: str, style_id: str):
+    entity, prompt = _resolve_request_prompt(entity_name, style_id)
+    if prompt == "Entity not found.":
+        raise HTTPException(status_code=404, detail="Entity not found")
+    if not prompt:
+        raise HTTPException(status_code=400, detail=f"No prompt available for style '{style_id}'")
+    return entity, prompt
 
 
 # -----------------------------
@@ -104,19 +209,37 @@ def _resolve_request_prompt(entity_name: str, style_id: str):
 # -----------------------------
 @app.get("/health")
 def health_check():
+    """Liveness: never waits for the warm-up nor touches storage. Dataset stats are served by /ready."""
+    return {"status": "alive", "engine": "L'Esprit", "version": "1.0.0", "ready": _ready.is_set()}
+
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 503 until the dataset is loaded and the image backend is initialized.
+
+    Once ready, includes the dataset stats, synced with the other workers first.
+    """
+    if not _ready.is_set():
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    _sync_dataset()
     total, missing = orchestrator.analyze_status()
     return {
-        "status": "alive",
-        "engine": "L'Esprit",
-        "version": "1.0.0",
+        "status": "ready",
         "stats": {
             "total_entities": total,
             "missing_images": missing,
+            "prompt_cache": orchestrator.prompt_cache.stats(),
         },
     }
 
 
-@app.get("/preview/{entity_name}")
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format: route and /generate stage latencies, backend failures, dataset gauges."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/preview/{entity_name}", dependencies=[Depends(_sync_dataset)])
 def get_prompt_preview(entity_name: str, style_id: str = "photoreal"):
     _, prompt = _resolve_request_prompt(entity_name, style_id)
     if prompt == "Entity not found.":
@@ -129,84 +252,119 @@ def get_prompt_preview(entity_name: str, style_id: str = "photoreal"):
     }
 
 
-@app.post("/generate")
+def _json_bytes(body: bytes, etag: str, request: Request) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _facet_filters(
+    entity_type: str = "",
+    ethnicity: str = "",
+    pantheon: str = "",
+    country: str = "",
+    cultural_region: str = "",
+    domains: str = "",
+    symbolic_animals: str = "",
+) -> dict:
+    """Filter query parameters shared by /entities and /facets (multi-origin countries match each part)."""
+    return {
+        "entity_type": entity_type,
+        "ethnicity": ethnicity,
+        "pantheon": pantheon,
+        "country": country,
+        "cultural_region": cultural_region,
+        "domains": domains,
+        "symbolic_animals": symbolic_animals,
+    }
+
+
+def _split_fields(fields: str):
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+@app.get("/entities", dependencies=[Depends(_sync_dataset)])
+def list_entities(
+    request: Request,
+    cursor: str = "",
+    limit: int = Query(50, ge=1, le=500),
+    fields: str = "",
+    filters: dict = Depends(_facet_filters),
+):
+    """Page of entities in catalog order. `fields` is a comma-separated list of dotted paths."""
+    try:
+        body, etag = entity_views.page(cursor, limit, _split_fields(fields), filters)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _json_bytes(body, etag, request)
+
+
+@app.get("/entities/{entity_name}", dependencies=[Depends(_sync_dataset)])
+def get_entity(entity_name: str, request: Request, fields: str = ""):
+    view = entity_views.entity(entity_name, _split_fields(fields))
+    if view is None:
+        raise HTTPException(status_code=404, detail="Entity not found")
+    return _json_bytes(*view, request)
+
+
+@app.get("/facets", dependencies=[Depends(_sync_dataset)])
+def facets(filters: dict = Depends(_facet_filters)):
+    """Value counts of every facet among the entities matching the given filters."""
+    return facet_index.counts(filters)
+
+
+@app.get("/search", dependencies=[Depends(_sync_dataset)])
+def search(q: str, limit: int = Query(20, ge=1, le=100)):
+    """Ranked full-text search (BM25, prefix on the last word, typo tolerant, accent folded)."""
+    return {
+        "query": q,
+        "results": [
+            {"name": entity.name, "entity_type": entity.entity_type, "category": entity.category, "score": score}
+            for entity, score in search_index.search(q, limit)
+        ],
+    }
+
+
+@app.get("/lineage/{entity_name}", dependencies=[Depends(_sync_dataset)])
+def lineage(entity_name: str, depth: int = Query(1, ge=1, le=MAX_DEPTH), direction: str = "ancestors"):
+    """Ancestors, descendants or spouses of an entity up to `depth` steps, from the resolved relation graph."""
+    if direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(DIRECTIONS)}")
+    try:
+        return lineage_index.lineage(entity_name, direction, depth)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Entity not found")
+
+
+@app.get("/geo/summary", dependencies=[Depends(_sync_dataset)])
+def geo_summary(request: Request):
+    """Entity counts per country, cultural region and ethnicity, with image coverage per style."""
+    return _json_bytes(*geo_index.summary(), request)
+
+
+@app.get("/geo/{country}", dependencies=[Depends(_sync_dataset)])
+def geo_country(country: str):
+    """Entities of one country ("A / B" origins are listed under both)."""
+    found = geo_index.country(country)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Country not found")
+    return found
+
+
+@app.post("/generate", dependencies=[Depends(_sync_dataset)])
 def generate_image(request: GenerateRequest):
     entity_name = request.entity_name
     style_id = request.style_id
 
-    # 1) Prompt
-    entity, prompt = _resolve_request_prompt(entity_name, style_id)
-    if prompt == "Entity not found.":
-        raise HTTPException(status_code=404, detail="Entity not found")
-    if not prompt:
-        raise HTTPException(status_code=400, detail=f"No prompt available for style '{style_id}'")
+    with GENERATE_STAGE_LATENCY.labels("prompt").time():
+        entity, prompt = _require_prompt(entity_name, style_id)
 
     logger.info(f"Generating image for {entity_name} [{style_id}] with prompt: {prompt}")
 
     try:
-        # 2) Call Vertex AI (Imagen)
-        model = ImageGenerationModel.from_pretrained("imagen-3.0-generate-002")
-
-        response = model.generate_images(
-            prompt=prompt,
-            number_of_images=1,
-            language="en",
-            aspect_ratio="3:4",
-            safety_filter_level="block_some",
-            person_generation="allow_adult",
-        )
-
-        images = response.images if hasattr(response, "images") else []
-
-        if not images or len(images) == 0:
-            logger.warning("Error: No images returned from Vertex AI (possible safety filter).")
-            return JSONResponse(
-                status_code=502,
-                content={
-                    "status": "error",
-                    "message": "No image returned from generation service. The prompt may have triggered a safety filter.",
-                    "details": str(response),
-                },
-            )
-
-        # 3) Save Image => /app/public/generated_images
-        root_public_dir = Path(__file__).resolve().parent.parent / "public"
-        output_dir = root_public_dir / "generated_images"
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        safe_name = entity_name.lower().replace(" ", "_").replace("/", "-")
-        # Filename: entity.png for photoreal, entity_style.png for others
-        if style_id == "photoreal":
-            filename = f"{safe_name}.png"
-        else:
-            filename = f"{safe_name}_{style_id}.png"
-        file_path = output_dir / filename
-
-        generated_image = images[0]
-        generated_image.save(location=str(file_path), include_generation_parameters=False)
-        logger.info(f"Image saved to {file_path}")
-
-        # 4) Update JSON DB (via orchestrator + loader)
-        image_url = f"/generated_images/{filename}"
-
-        updated = False
-        if entity:
-            if not entity.rendering:
-                entity.rendering = {}
-            if "images" not in entity.rendering:
-                entity.rendering["images"] = {}
-
-            entity.rendering["images"][style_id] = image_url
-
-            if style_id == "photoreal":
-                entity.appearance.imageUrl = image_url
-
-            updated = True
-
-        if updated:
-            save_mythology_data(orchestrator.data)
-            logger.info("Database updated.")
-
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            image_url = generate_entity_image(orchestrator, entity, style_id, prompt)
         return {
             "status": "success",
             "image_url": image_url,
@@ -214,7 +372,20 @@ def generate_image(request: GenerateRequest):
             "prompt_used": prompt,
         }
 
+    except NoImageGenerated as e:
+        GENERATE_FAILURES.labels("safety_filter").inc()
+        logger.warning("Error: No images returned from Vertex AI (possible safety filter).")
+        return JSONResponse(
+            status_code=502,
+            content={
+                "status": "error",
+                "message": "No image returned from generation service. The prompt may have triggered a safety filter.",
+                "details": str(e),
+            },
+        )
+
     except (ResourceExhausted, TooManyRequests) as e:
+        GENERATE_FAILURES.labels("quota_exceeded").inc()
         logger.error(f"Quota Exceeded: {e}")
         return JSONResponse(
             status_code=429,
@@ -226,36 +397,107 @@ def generate_image(request: GenerateRequest):
         )
 
     except Exception as e:
+        GENERATE_FAILURES.labels("error").inc()
         logger.error(f"Generation Error: {e}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
+@app.post("/jobs", status_code=202, dependencies=[Depends(_sync_dataset)])
+def submit_job(request: GenerateRequest):
+    """Queues a generation for the worker pool (python -m engine.jobs) and returns immediately."""
+    entity, prompt = _require_prompt(request.entity_name, request.style_id)
+    job = get_job_queue().submit(entity.name, request.style_id, prompt)
+    return job.model_dump()
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.model_dump()
+
+
+# -----------------------------
+# Admin: batch backfill of missing images
+# -----------------------------
+_backfill_run = {"thread": None, "stop": threading.Event(), "progress": {}}
+
+
+@app.post("/admin/backfill", status_code=202, dependencies=[Depends(_require_admin), Depends(_sync_dataset)])
+def start_backfill(concurrency: int = Query(4, ge=1, le=16)):
+    if _backfill_run["thread"] and _backfill_run["thread"].is_alive():
+        raise HTTPException(status_code=409, detail="A backfill is already running")
+
+    _backfill_run["stop"] = threading.Event()
+    _backfill_run["progress"] = {}
+    _backfill_run["thread"] = threading.Thread(
+        target=run_backfill,
+        args=(orchestrator,),
+        kwargs={"concurrency": concurrency, "stop": _backfill_run["stop"], "progress": _backfill_run["progress"]},
+        daemon=True,
+    )
+    _backfill_run["thread"].start()
+    return {"status": "started", "concurrency": concurrency}
+
+
+@app.get("/admin/backfill", dependencies=[Depends(_require_admin)])
+def backfill_status():
+    running = bool(_backfill_run["thread"] and _backfill_run["thread"].is_alive())
+    return {"running": running, "progress": _backfill_run["progress"]}
+
+
+@app.delete("/admin/backfill", dependencies=[Depends(_require_admin)])
+def stop_backfill():
+    _backfill_run["stop"].set()
+    return {"status": "stopping"}
+
+
+@app.get("/admin/lineage", dependencies=[Depends(_require_admin), Depends(_sync_dataset)])
+def lineage_problems():
+    """Relation names matching no entity, and parent cycles, over the whole catalog."""
+    return lineage_index.problems()
+
+
 # -----------------------------
 # Static serving (frontend + images)
 # -----------------------------
 BASE_DIR = Path(__file__).resolve().parent.parent  # /app
 DIST_DIR = BASE_DIR / "dist"
-ASSETS_DIR = DIST_DIR / "assets"
 PUBLIC_DIR = BASE_DIR / "public"
 GENERATED_DIR = PUBLIC_DIR / "generated_images"
 
+class GeneratedImageFiles(StaticFiles):
+    """Content-addressed files never change: cacheable for a year, with their name as strong ETag."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        name = os.path.basename(full_path)
+        if not CONTENT_NAME.match(name):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = f'"{name.rsplit(".", 1)[0]}"'
+        response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
 # 1) Expose generated images
 if GENERATED_DIR.exists():
-    app.mount("/generated_images", StaticFiles(directory=str(GENERATED_DIR)), name="generated_images")
+    app.mount("/generated_images", GeneratedImageFiles(directory=str(GENERATED_DIR)), name="generated_images")
 
-# 2) Expose frontend assets
-if ASSETS_DIR.exists():
-    app.mount("/assets", StaticFiles(directory=str(ASSETS_DIR)), name="assets")
-
-# 3) SPA index + fallback (only if dist exists)
-if (DIST_DIR / "index.html").exists():
-    @app.get("/")
-    async def index():
-        return FileResponse(str(DIST_DIR / "index.html"))
+# 2) Frontend (dist/): precompressed and served from memory, index.html for SPA routes
+dist_files = StaticBundle(DIST_DIR) if (DIST_DIR / "index.html").exists() else None
 
+if dist_files:
     @app.get("/{full_path:path}")
-    async def spa_fallback(full_path: str):
-        return FileResponse(str(DIST_DIR / "index.html"))
+    def frontend(full_path: str, request: Request):
+        return dist_files.response(
+            full_path,
+            request.headers.get("accept-encoding", ""),
+            request.headers.get("if-none-match", ""),
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""Image generation backends, selected with IMAGE_BACKEND=vertex|local.
+
+A backend returns images exposing `save(location, include_generation_parameters)`,
+like Vertex AI's GeneratedImage, and raises NoImageGenerated when nothing came back.
+warm_up() does the slow one-time setup ahead of the first generation.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import List
+
+from google.api_core.exceptions import InternalServerError, ResourceExhausted
+
+logger = logging.getLogger(__name__)
+
+IMAGEN_MODEL = "imagen-3.0-generate-002"
+PROJECT_ID = os.environ.get("GCP_PROJECT_ID", "livingafricanpantheon")
+LOCATION = os.environ.get("GCP_LOCATION", "us-central1")
+
+
+class NoImageGenerated(Exception):
+    """The backend answered without any image (usually the safety filter)."""
+
+
+def init_vertex():
+    """Vertex AI init (HF-friendly). Imports the SDK, which alone takes seconds: keep it off import paths."""
+    import vertexai
+    from google.oauth2 import service_account
+
+    # Sur HF, on passera un secret JSON dans GCP_SERVICE_ACCOUNT_JSON
+    # En local, ton init peut continuer à marcher via ADC si tu veux.
+    try:
+        gcp_sa_json = os.environ.get("GCP_SERVICE_ACCOUNT_JSON")
+        if gcp_sa_json:
+            info = json.loads(gcp_sa_json)
+            credentials = service_account.Credentials.from_service_account_info(info)
+            vertexai.init(project=PROJECT_ID, location=LOCATION, credentials=credentials)
+            logger.info("Vertex AI initialized with service account from env.")
+        else:
+            vertexai.init(project=PROJECT_ID, location=LOCATION)
+            logger.info("Vertex AI initialized (default credentials).")
+    except Exception as e:
+        logger.warning(f"Failed to initialize Vertex AI: {e}")
+
+
+class VertexBackend:
+    """Imagen on Vertex AI. SDK init and the model handle (and its gRPC channel) happen once, on first use."""
+
+    def __init__(self, model_name: str = IMAGEN_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    init_vertex()
+                    from vertexai.preview.vision_models import ImageGenerationModel
+
+                    self._model = ImageGenerationModel.from_pretrained(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        self.get_model()
+
+    def generate_images(self, prompt: str) -> List:
+        response = self.get_model().generate_images(
+            prompt=prompt,
+            number_of_images=1,
+            language="en",
+            aspect_ratio="3:4",
+            safety_filter_level="block_some",
+            person_generation="allow_adult",
+        )
+        images = response.images if hasattr(response, "images") else []
+        if not images:
+            raise NoImageGenerated(str(response))
+        return images
+
+
+class LocalImage:
+    def __init__(self, png_bytes: bytes):
+        self._image_bytes = png_bytes
+
+    def save(self, location: str, include_generation_parameters: bool = False):
+        with open(location, "wb") as file:
+            file.write(self._image_bytes)
+
+
+class LocalBackend:
+    """Offline stand-in for load tests: real PNGs, simulated latency and failures.
+
+    Outcomes come from a seeded RNG, so a run with the same seed and call order is reproducible.
+    The picture itself only depends on the prompt.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        safety_rate: float = 0.0,
+        quota_rate: float = 0.0,
+        seed: int = 0,
+        size: tuple = (384, 512),
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.safety_rate = safety_rate
+        self.quota_rate = quota_rate
+        self.size = size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LocalBackend":
+        return cls(
+            latency=float(os.environ.get("LOCAL_BACKEND_LATENCY", "0")),
+            error_rate=float(os.environ.get("LOCAL_BACKEND_ERROR_RATE", "0")),
+            safety_rate=float(os.environ.get("LOCAL_BACKEND_SAFETY_RATE", "0")),
+            quota_rate=float(os.environ.get("LOCAL_BACKEND_QUOTA_RATE", "0")),
+            seed=int(os.environ.get("LOCAL_BACKEND_SEED", "0")),
+        )
+
+    def warm_up(self):
+        pass
+
+    def generate_images(self, prompt: str) -> List[LocalImage]:
+        with self._lock:
+            draw = self._random.random()
+        if self.latency:
+            time.sleep(self.latency)
+
+        if draw < self.quota_rate:
+            raise ResourceExhausted("Simulated quota exhaustion")
+        draw -= self.quota_rate
+        if draw < self.error_rate:
+            raise InternalServerError("Simulated backend error")
+        draw -= self.error_rate
+        if draw < self.safety_rate:
+            raise NoImageGenerated("Simulated safety filter: no images")
+
+        return [LocalImage(render_png(prompt, *self.size))]
+
+
+def render_png(prompt: str, width: int, height: int) -> bytes:
+    """Vertical gradient PNG whose colors are derived from the prompt."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    top, bottom = digest[:3], digest[3:6]
+    rows = []
+    for y in range(height):
+        color = bytes(top[c] + (bottom[c] - top[c]) * y // max(1, height - 1) for c in range(3))
+        rows.append(b"\x00" + color * width)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"".join(rows))) + chunk(b"IEND", b"")
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """Process-wide backend, chosen by IMAGE_BACKEND (default: vertex)."""
+    name = os.environ.get("IMAGE_BACKEND", "vertex").lower()
+    if name == "local":
+        return LocalBackend.from_env()
+    if name == "vertex":
+        return VertexBackend()
+    raise ValueError(f"Unknown IMAGE_BACKEND '{name}' (expected 'vertex' or 'local')")
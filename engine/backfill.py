@@ -0,0 +1,171 @@
+"""Batch generation of every missing (entity, style) image at the highest rate the quota allows."""
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from google.api_core.exceptions import DeadlineExceeded, ResourceExhausted, ServerError, TooManyRequests
+
+from engine.backends import NoImageGenerated
+from engine.generation import generate_entity_image
+from engine.metrics import GENERATIONS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+# Requeued with the rate halved: 5xx and timeouts are as transient as a quota hit.
+RETRYABLE_ERRORS = (ResourceExhausted, TooManyRequests, ServerError, DeadlineExceeded)
+# A pair still failing after this many attempts is given up for this run (not checkpointed).
+MAX_ATTEMPTS = 5
+STYLE_IDS = ("photoreal", "regional_or_ethnic", "manga", "comic_marvel", "modern_african_painting")
+CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / "var" / "backfill_checkpoint.jsonl"
+
+
+class RateController:
+    """Token bucket (one token) whose refill rate follows AIMD.
+
+    Each success adds `step` calls/s up to `max_rate`; each quota error halves the rate
+    down to `min_rate`.
+    """
+
+    def __init__(self, rate: float = 0.5, min_rate: float = 0.02, max_rate: float = 5.0, step: float = 0.05):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        time.sleep(slot - now)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def on_quota_error(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Push the whole pool back: the quota window needs time to refill.
+            self._next_slot = max(self._next_slot, time.monotonic() + 1.0 / self.rate)
+
+
+class BackfillCheckpoint:
+    """Finished and permanently failed pairs, appended as JSON lines after each result."""
+
+    def __init__(self, path: Path = CHECKPOINT_PATH):
+        self.path = Path(path)
+        self.done = set()
+        self.failed: Dict[str, str] = {}
+        if self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done or key in self.failed
+
+    def mark(self, key: str, error: Optional[str] = None):
+        record = {"key": key, "error": error}
+        with self._lock:
+            self._apply(record)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _apply(self, record: Dict[str, Optional[str]]):
+        if record["error"] is None:
+            self.done.add(record["key"])
+            self.failed.pop(record["key"], None)
+        else:
+            self.failed[record["key"]] = record["error"]
+
+
+def run_backfill(
+    orchestrator,
+    concurrency: int = 4,
+    style_ids: Iterable[str] = STYLE_IDS,
+    checkpoint: Optional[BackfillCheckpoint] = None,
+    controller: Optional[RateController] = None,
+    generate: Callable = generate_entity_image,
+    stop: Optional[threading.Event] = None,
+    progress: Optional[Dict[str, int]] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> Dict[str, int]:
+    """Generates every missing pair with `concurrency` threads.
+
+    Quota and server errors requeue the pair, until its `max_attempts`-th attempt: it then counts as
+    failed for this run. Pairs already in the checkpoint are skipped, so an interrupted run resumes
+    where it stopped. Only NoImageGenerated is checkpointed as a permanent failure; other errors are
+    retried next run.
+    Returns (and keeps updating `progress` with) done / failed / skipped / retried counters.
+    """
+    checkpoint = checkpoint or BackfillCheckpoint()
+    controller = controller or RateController()
+    stop = stop or threading.Event()
+    stats = progress if progress is not None else {}
+    stats.update({"total": 0, "done": 0, "failed": 0, "skipped": 0, "retried": 0})
+    stats_lock = threading.Lock()
+    attempts: Dict[str, int] = {}
+
+    def count(name: str):
+        with stats_lock:
+            stats[name] += 1
+
+    pending: "queue.Queue" = queue.Queue()
+    for entity, style_id in orchestrator.get_missing_pairs(style_ids):
+        stats["total"] += 1
+        if f"{entity.name}::{style_id}" in checkpoint:
+            stats["skipped"] += 1
+        else:
+            pending.put((entity, style_id))
+
+    def work():
+        while not stop.is_set():
+            try:
+                entity, style_id = pending.get_nowait()
+            except queue.Empty:
+                return
+            key = f"{entity.name}::{style_id}"
+            controller.acquire()
+            attempts[key] = attempts.get(key, 0) + 1  # a pair is only ever held by one thread
+            try:
+                with GENERATIONS_IN_FLIGHT.track_inprogress():
+                    generate(orchestrator, entity, style_id, orchestrator.resolve_prompt(entity, style_id))
+            except RETRYABLE_ERRORS as e:
+                controller.on_quota_error()
+                if attempts[key] >= max_attempts:
+                    count("failed")
+                    logger.error(f"Backfill gave up on {key} after {attempts[key]} attempts, will retry on the next run: {e}")
+                    continue
+                count("retried")
+                pending.put((entity, style_id))
+                logger.warning(f"{type(e).__name__} on {key}, rate now {controller.rate:.2f}/s")
+                continue
+            except NoImageGenerated as e:
+                checkpoint.mark(key, str(e) or type(e).__name__)
+                count("failed")
+                logger.error(f"Backfill failed for {key}: {e}")
+                continue
+            except Exception as e:
+                count("failed")
+                logger.error(f"Backfill failed for {key}, will retry on the next run: {e}")
+                continue
+            controller.on_success()
+            checkpoint.mark(key)
+            count("done")
+            logger.info(f"Backfilled {key} ({stats['done']}/{stats['total'] - stats['skipped']})")
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
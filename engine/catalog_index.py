@@ -0,0 +1,72 @@
+"""Base class of the in-memory indexes derived from the catalog (SearchIndex, FacetIndex).
+
+A subclass builds its state from the entity list (_build) and applies one saved entity to it
+(_upsert). Saves reach the index through ImageOrchestrator.listeners. After a reload, the state is
+rebuilt in a background thread while queries keep using the previous state.
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from engine.domain import MythologicalEntity
+
+
+class CatalogIndex(ABC):
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+        # Bumped whenever the state changes; caches of query results key on it (see EntityViews).
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._state = None
+        self._stale = True
+        self._pending: Optional[List[MythologicalEntity]] = None  # saved while a build runs
+        orchestrator.listeners.append(self._on_change)
+
+    def refresh(self):
+        """Rebuilds the state if the dataset was reloaded since the last build. Blocks until done."""
+        with self._build_lock:
+            self.orchestrator.ensure_indexed()
+            with self._lock:
+                if not self._stale:
+                    return
+                self._stale = False
+                self._pending = []
+                entities = list(self.orchestrator.data)
+            state = self._build(entities)
+            with self._lock:
+                for entity in self._pending:
+                    self._upsert(state, entity)
+                self._pending = None
+                self._state = state
+                self.generation += 1
+
+    def _current(self):
+        """The state to query (under self._lock): built on first use, else possibly one reload behind."""
+        self.orchestrator.ensure_indexed()
+        if self._state is None:
+            self.refresh()
+        return self._state
+
+    def _on_change(self, entity: Optional[MythologicalEntity]):
+        with self._lock:
+            if entity is None:
+                self._stale = True
+                rebuild = self._state is not None
+            else:
+                if self._state is not None:
+                    self._upsert(self._state, entity)
+                if self._pending is not None:
+                    self._pending.append(entity)
+                self.generation += 1
+                rebuild = False
+        if rebuild:
+            threading.Thread(target=self.refresh, name=f"{type(self).__name__}-rebuild", daemon=True).start()
+
+    @abstractmethod
+    def _build(self, entities: List[MythologicalEntity]):
+        """The index state of `entities`. Runs outside self._lock."""
+
+    @abstractmethod
+    def _upsert(self, state, entity: MythologicalEntity):
+        """Applies one saved entity to `state` (under self._lock)."""
@@ -0,0 +1,111 @@
+"""Resized WebP (optionally AVIF) variants of the generated images, built in a process pool.
+
+Variants are recorded as rendering.image_variants[style_id] = {format: {width: url}}, next to
+rendering.images[style_id] (the original PNG, unchanged). "full" is the re-encoded full-size
+image. Backfill the variants of existing images with:
+
+    python -m engine.derivatives
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from engine.domain import MythologicalEntity
+from engine.loader import save_entity, save_lock
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1024)
+QUALITY = {"webp": 80, "avif": 55}
+FORMATS = ("webp", "avif") if os.environ.get("IMAGE_AVIF", "") == "1" else ("webp",)
+WORKERS = int(os.environ.get("DERIVATIVE_WORKERS", "2"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def build_variants(source: Path, formats=FORMATS) -> Dict[str, Dict[str, str]]:
+    """Encodes the variants of one image next to it; returns their file names. Runs in a worker process."""
+    from PIL import Image  # only the pool workers pay for the import
+
+    variants: Dict[str, Dict[str, str]] = {}
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        for image_format in formats:
+            names = variants.setdefault(image_format, {})
+            sizes = [(str(width), width) for width in WIDTHS if width < image.width] + [("full", image.width)]
+            for label, width in sizes:
+                resized = image if width == image.width else image.resize(
+                    (width, round(image.height * width / image.width)), Image.LANCZOS
+                )
+                path = source.with_name(f"{source.stem}_{label}.{image_format}")
+                resized.save(path, image_format.upper(), quality=QUALITY[image_format])
+                names[label] = path.name
+    return variants
+
+
+def record_variants(orchestrator, entity: MythologicalEntity, style_id: str, image_url: str, variants: Dict):
+    """Persists the variants, unless the style got another image in the meantime."""
+    base_url = image_url.rsplit("/", 1)[0]
+    entity = orchestrator.find_entity(entity.name) or entity
+    with save_lock:
+        if (entity.rendering or {}).get("images", {}).get(style_id) != image_url:
+            return
+        entity.rendering.setdefault("image_variants", {})[style_id] = {
+            image_format: {label: f"{base_url}/{name}" for label, name in names.items()}
+            for image_format, names in variants.items()
+        }
+        orchestrator.mark_changed(entity)
+        save_entity(entity)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Not fork: the API and the backfill are multithreaded, and a forked child can inherit
+            # a lock held by another thread.
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def schedule_variants(orchestrator, entity: MythologicalEntity, style_id: str, image_url: str, source: Path):
+    """Builds the variants in the pool and records them when done, off the caller's thread."""
+
+    def done(future):
+        try:
+            record_variants(orchestrator, entity, style_id, image_url, future.result())
+        except Exception as e:
+            logger.error(f"Variants failed for {entity.name} [{style_id}]: {e}")
+
+    get_pool().submit(build_variants, source).add_done_callback(done)
+
+
+def backfill_variants(orchestrator) -> int:
+    """Builds the missing variants of every generated image on disk. Returns how many were added."""
+    from engine.generation import GENERATED_DIR
+
+    pending = [
+        (entity, style_id, url)
+        for entity in orchestrator.data
+        for style_id, url in ((entity.rendering or {}).get("images") or {}).items()
+        if url.startswith("/generated_images/")
+        and style_id not in (entity.rendering.get("image_variants") or {})
+        and (GENERATED_DIR / url.rsplit("/", 1)[1]).exists()
+    ]
+    results = get_pool().map(build_variants, [GENERATED_DIR / url.rsplit("/", 1)[1] for _, _, url in pending])
+    for (entity, style_id, url), variants in zip(pending, results):
+        record_variants(orchestrator, entity, style_id, url, variants)
+        logger.info(f"Variants built for {entity.name} [{style_id}]")
+    return len(pending)
+
+
+if __name__ == "__main__":
+    from engine.orchestrator import ImageOrchestrator
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Built variants for {backfill_variants(ImageOrchestrator())} image(s).")
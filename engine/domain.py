@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
 
 class Origin(BaseModel):
     country: str
@@ -48,7 +48,18 @@ class MythologicalEntity(BaseModel):
     type_specific: Optional[Dict[str, Any]] = None
     rendering: Optional[Dict[str, Any]] = None
 
+_ENTITY_LIST = TypeAdapter(List[MythologicalEntity])
+
+
+def validate_entities_json(raw: bytes) -> List[MythologicalEntity]:
+    """Validates a JSON array of entities straight from its bytes, without intermediate dicts."""
+    return _ENTITY_LIST.validate_json(raw)
+
 class ImageGenerationRequest(BaseModel):
     entity_name: str
     prompt: str
     status: str = "pending"  # pending, generating, done, error
+    id: str = ""
+    style_id: str = "photoreal"
+    image_url: str = ""
+    error: str = ""
@@ -0,0 +1,111 @@
+"""Serialized views of the catalog for GET /entities and GET /entities/{name}.
+
+Responses are rendered once with orjson and cached per orchestrator.version (which changes with
+any dataset change) and facet index generation (the index swaps in a new state after a reload),
+together with a strong ETag computed from the bytes.
+"""
+import base64
+import hashlib
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import orjson
+
+from engine.domain import MythologicalEntity
+from engine.text import normalize_name
+
+MAX_CACHED = 1024
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class EntityViews:
+    def __init__(self, orchestrator, facets):
+        self.orchestrator = orchestrator
+        self.facets = facets
+        self._version = None
+        self._cache: Dict[Tuple, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def page(
+        self, cursor: str = "", limit: int = 50, fields: Sequence[str] = (), filters: Optional[Dict[str, str]] = None
+    ) -> Tuple[bytes, str]:
+        """(JSON bytes, ETag) of {"items", "next_cursor", "total"} for the entities after `cursor`."""
+        filters = {name: value for name, value in (filters or {}).items() if value}
+        key = ("page", cursor, limit, tuple(fields), tuple(sorted(filters.items())))
+        return self._cached(key, lambda: self._render_page(cursor, limit, fields, filters))
+
+    def entity(self, name: str, fields: Sequence[str] = ()) -> Optional[Tuple[bytes, str]]:
+        entity = self.orchestrator.find_entity(name)
+        if entity is None:
+            return None
+        return self._cached(("entity", normalize_name(entity.name), tuple(fields)), lambda: _project(entity, fields))
+
+    def _cached(self, key: Tuple, render) -> Tuple[bytes, str]:
+        self.orchestrator.ensure_indexed()
+        with self._lock:
+            current = (self.orchestrator.version, self.facets.generation)
+            if self._version != current or len(self._cache) >= MAX_CACHED:
+                self._cache = {}
+                self._version = current
+            version, cached = self._version, self._cache.get(key)
+        if cached is None:
+            body = orjson.dumps(render())
+            cached = (body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+            with self._lock:
+                if self._version == version:
+                    self._cache[key] = cached
+        return cached
+
+    def _render_page(self, cursor: str, limit: int, fields: Sequence[str], filters: Dict[str, str]) -> dict:
+        matches = self.facets.matching(filters)
+
+        start = 0
+        if cursor:
+            last = _decode_cursor(cursor)
+            positions = [i for i, entity in enumerate(matches) if normalize_name(entity.name) == last]
+            if not positions:
+                raise InvalidCursor("Unknown cursor")
+            start = positions[0] + 1
+
+        items = matches[start:start + limit]
+        has_more = start + limit < len(matches)
+        return {
+            "items": [_project(entity, fields) for entity in items],
+            "next_cursor": _encode_cursor(items[-1]) if items and has_more else None,
+            "total": len(matches),
+        }
+
+
+def _project(entity: MythologicalEntity, fields: Sequence[str]) -> dict:
+    """The entity document, or only the dotted `fields` (e.g. appearance.imageUrl), same nesting."""
+    document = entity.model_dump(mode="json")
+    if not fields:
+        return document
+
+    projected: dict = {}
+    for field in fields:
+        value, parts = document, field.split(".")
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+
+def _encode_cursor(entity: MythologicalEntity) -> str:
+    return base64.urlsafe_b64encode(normalize_name(entity.name).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except ValueError as e:
+        raise InvalidCursor("Malformed cursor") from e
@@ -0,0 +1,139 @@
+"""Facet index over the catalog for GET /facets and the filters of GET /entities.
+
+Each (field, normalized value) pair maps to a bitset (a Python int) of document ids. Ids follow
+catalog order, so a filter is an AND of bitsets, a count is a popcount, and the matches come out in
+catalog order. Multi-origin countries ("Nigeria / Benin", see CONTRACT_V2) count under each country.
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from engine.catalog_index import CatalogIndex
+from engine.domain import MythologicalEntity
+from engine.text import normalize_name
+
+FACETS = ("entity_type", "pantheon", "ethnicity", "country", "cultural_region", "domains", "symbolic_animals")
+
+
+def facet_values(entity: MythologicalEntity, field: str) -> List[str]:
+    """Display values of `field` for `entity`; list attributes and "A / B" countries give several."""
+    if field == "entity_type":
+        values = [entity.entity_type]
+    elif field in ("domains", "symbolic_animals"):
+        values = getattr(entity.attributes, field)
+    else:
+        value = getattr(entity.origin, field) or ""
+        values = value.split("/") if field == "country" else [value]
+    return [value.strip() for value in values if value and value.strip()]
+
+
+def _facet_keys(entity: MythologicalEntity) -> Dict[Tuple[str, str], str]:
+    """{(field, normalized value): display value} of every facet value of `entity`."""
+    keys: Dict[Tuple[str, str], str] = {}
+    for field in FACETS:
+        for value in facet_values(entity, field):
+            keys.setdefault((field, normalize_name(value)), value)
+    return keys
+
+
+def _positions(bits: int) -> List[int]:
+    return [i for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"]
+
+
+class _Bitsets:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}  # normalized name -> document id
+        self.entities: List[MythologicalEntity] = []
+        self.doc_keys: List[List[Tuple[str, str]]] = []
+        self.bits: Dict[Tuple[str, str], int] = {}  # (field, normalized value) -> bitset of ids
+        self.labels: Dict[Tuple[str, str], str] = {}
+        self.all = 0
+
+    def upsert(self, entity: MythologicalEntity):
+        name = normalize_name(entity.name)
+        doc = self.ids.get(name)
+        if doc is None:
+            doc = self.ids[name] = len(self.entities)
+            self.entities.append(entity)
+            self.doc_keys.append([])
+            self.all |= 1 << doc
+        self.entities[doc] = entity
+
+        bit = 1 << doc
+        for key in self.doc_keys[doc]:
+            self.bits[key] &= ~bit
+            if not self.bits[key]:
+                del self.bits[key]
+                del self.labels[key]
+        keys = _facet_keys(entity)
+        for key, value in keys.items():
+            self.bits[key] = self.bits.get(key, 0) | bit
+            self.labels.setdefault(key, value)
+        self.doc_keys[doc] = list(keys)
+
+
+class FacetIndex(CatalogIndex):
+    def matching(self, filters: Dict[str, str]) -> List[MythologicalEntity]:
+        """Entities matching every {field: value} filter, in catalog order."""
+        state = self._current()
+        with self._lock:
+            return [state.entities[i] for i in _positions(_filter(state, filters))]
+
+    def counts(self, filters: Dict[str, str]) -> dict:
+        """{"total", "facets": {field: [{"value", "count"}]}} for the entities matching `filters`.
+
+        With the SQLite backend, the counts come from its entity_facets index instead.
+        """
+        facets: Dict[str, list] = {field: [] for field in FACETS}
+        store = self.orchestrator.indexed_store()
+        if store is not None:
+            total, counts = store.facet_counts(filters)
+            for field, value, count in counts:
+                facets[field].append({"value": value, "count": count})
+        else:
+            state = self._current()
+            with self._lock:
+                bits = _filter(state, filters)
+                total = bits.bit_count()
+                for key, value_bits in state.bits.items():
+                    count = (value_bits & bits).bit_count()
+                    if count:
+                        facets[key[0]].append({"value": state.labels[key], "count": count})
+        for values in facets.values():
+            values.sort(key=lambda item: (-item["count"], item["value"]))
+        return {"total": total, "facets": facets}
+
+    def _build(self, entities: List[MythologicalEntity]) -> _Bitsets:
+        # Bitsets are made once per value from the list of its ids: OR-ing entities in one at a
+        # time would copy a growing int for every entity.
+        state = _Bitsets()
+        for entity in entities:
+            name = normalize_name(entity.name)
+            if name not in state.ids:
+                state.ids[name] = len(state.entities)
+                state.entities.append(entity)
+            state.entities[state.ids[name]] = entity
+        members: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for doc, entity in enumerate(state.entities):
+            keys = _facet_keys(entity)
+            for key, value in keys.items():
+                members[key].append(doc)
+                state.labels.setdefault(key, value)
+            state.doc_keys.append(list(keys))
+        for key, docs in members.items():
+            digits = bytearray(b"0" * len(state.entities))
+            for doc in docs:
+                digits[-1 - doc] = ord("1")
+            state.bits[key] = int(digits, 2)
+        state.all = (1 << len(state.entities)) - 1
+        return state
+
+    def _upsert(self, state: _Bitsets, entity: MythologicalEntity):
+        state.upsert(entity)
+
+
+def _filter(state: _Bitsets, filters: Dict[str, str]) -> int:
+    bits = state.all
+    for field, value in filters.items():
+        if value:
+            bits &= state.bits.get((field, normalize_name(value)), 0)
+    return bits
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from engine.backends import get_backend
+from engine.derivatives import schedule_variants
+from engine.domain import MythologicalEntity
+from engine.image_store import store_image
+from engine.loader import DATA_PATH, save_entity, save_lock
+from engine.metrics import GENERATE_COALESCED, GENERATE_STAGE_LATENCY
+from engine.profiling import timed
+from engine.text import normalize_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev setups only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+GENERATED_DIR = Path(__file__).resolve().parent.parent / "public" / "generated_images"
+# One lock file per (entity, style) being generated: held by the generating process, so other workers wait.
+LEASE_DIR = DATA_PATH.parent / "generation_leases"
+# A holder slower than this (hung backend call) no longer blocks the others.
+LEASE_WAIT_SECONDS = 120
+
+# (normalized entity name, style_id) -> the generation in progress in this process
+_in_flight: Dict[Tuple[str, str], Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def generate_entity_image(orchestrator, entity: MythologicalEntity, style_id: str, prompt: str) -> str:
+    """Generates (entity, style_id) once for all its concurrent callers, across workers. Returns the image URL.
+
+    Callers arriving while the same generation runs in this process get its URL, or its exception.
+    A worker that had to wait for another worker's lease reuses the image it recorded.
+    NoImageGenerated and quota errors (ResourceExhausted / TooManyRequests) are left to the caller.
+    """
+    key = (normalize_name(entity.name), style_id)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+    if not leader:
+        GENERATE_COALESCED.inc()
+        return future.result()
+
+    try:
+        future.set_result(_generate_under_lease(orchestrator, entity, style_id, prompt, key))
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+    return future.result()
+
+
+def _generate_under_lease(orchestrator, entity: MythologicalEntity, style_id: str, prompt: str, key) -> str:
+    previous_url = _image_url(entity, style_id)
+    with _lease(key) as waited:
+        if waited:
+            # The other worker saved its result: pick it up rather than paying for a second image.
+            orchestrator.sync()
+            entity = orchestrator.find_entity(entity.name) or entity
+            image_url = _image_url(entity, style_id)
+            if image_url and image_url != previous_url:
+                GENERATE_COALESCED.inc()
+                return image_url
+        return _generate(orchestrator, entity, style_id, prompt)
+
+
+def _image_url(entity: MythologicalEntity, style_id: str) -> Optional[str]:
+    return ((entity.rendering or {}).get("images") or {}).get(style_id)
+
+
+def _lease_path(key: Tuple[str, str]) -> Path:
+    return LEASE_DIR / f"{hashlib.blake2b(chr(0).join(key).encode('utf-8'), digest_size=16).hexdigest()}.lock"
+
+
+@contextmanager
+def _lease(key: Tuple[str, str]) -> Iterator[bool]:
+    """Exclusive lock of `key` across processes. Yields whether another process held it first.
+
+    The lock file is removed on release. A waiter that then locks the removed file notices it is no
+    longer the one at the path, and locks the new one instead.
+    """
+    if not fcntl:
+        yield False
+        return
+    LEASE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _lease_path(key)
+    waited, deadline = False, time.monotonic() + LEASE_WAIT_SECONDS
+    while True:
+        lease = open(path, "a")
+        try:
+            fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lease.close()
+            waited = True
+            if time.monotonic() > deadline:
+                logger.warning(f"Generation lease of {key} held for over {LEASE_WAIT_SECONDS}s, generating anyway")
+                yield False
+                return
+            time.sleep(0.1)
+            continue
+        if _is_current(lease, path):
+            break
+        lease.close()
+    try:
+        yield waited
+    finally:
+        # Removed while still locked, so nobody can lock it without seeing it gone.
+        path.unlink(missing_ok=True)
+        lease.close()
+
+
+def _is_current(lease, path: Path) -> bool:
+    try:
+        on_disk = os.stat(path)
+    except FileNotFoundError:
+        return False
+    held = os.fstat(lease.fileno())
+    return (held.st_dev, held.st_ino) == (on_disk.st_dev, on_disk.st_ino)
+
+
+def _generate(orchestrator, entity: MythologicalEntity, style_id: str, prompt: str) -> str:
+    """Calls the configured backend, saves the image and persists its URL. Returns the image URL."""
+    with timed("model", GENERATE_STAGE_LATENCY):
+        backend = get_backend()
+        backend.warm_up()
+    with timed("imagen", GENERATE_STAGE_LATENCY):
+        images = backend.generate_images(prompt)
+
+    with timed("image_save", GENERATE_STAGE_LATENCY):
+        filename = store_image(images[0], GENERATED_DIR)
+    file_path = GENERATED_DIR / filename
+    logger.info(f"Image saved to {file_path}")
+
+    image_url = f"/generated_images/{filename}"
+    with timed("persist", GENERATE_STAGE_LATENCY):
+        record_image(orchestrator, entity, style_id, image_url)
+    schedule_variants(orchestrator, entity, style_id, image_url, file_path)
+    return image_url
+
+
+def record_image(orchestrator, entity: MythologicalEntity, style_id: str, image_url: str):
+    """Stores image_url under rendering.images[style_id] and persists the entity."""
+    with save_lock:
+        if not entity.rendering:
+            entity.rendering = {}
+        if "images" not in entity.rendering:
+            entity.rendering["images"] = {}
+
+        entity.rendering["images"][style_id] = image_url
+        # Variants of the previous image; the new ones are recorded when the pool is done.
+        (entity.rendering.get("image_variants") or {}).pop(style_id, None)
+
+        if style_id == "photoreal":
+            entity.appearance.imageUrl = image_url
+
+        orchestrator.mark_changed(entity)
+        save_entity(entity)
+    logger.info("Database updated.")
@@ -0,0 +1,157 @@
+"""Per-country aggregate of the catalog for the map: GET /geo/summary and GET /geo/{country}.
+
+Each entity contributes to every country of its origin ("A / B" counts under both, as in
+FacetIndex) with its cultural region, ethnicity and the styles it has an image for. The aggregate
+is updated per saved entity by taking the previous contribution out and adding the new one.
+"""
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from engine.catalog_index import CatalogIndex
+from engine.domain import MythologicalEntity
+from engine.facets import facet_values
+from engine.text import normalize_name
+
+
+def image_styles(entity: MythologicalEntity) -> Set[str]:
+    """Styles `entity` has an image for (the legacy imageUrl counts as photoreal)."""
+    styles = {style_id for style_id, url in ((entity.rendering or {}).get("images") or {}).items() if url}
+    if entity.appearance.imageUrl.strip():
+        styles.add("photoreal")
+    return styles
+
+
+class _Country:
+    def __init__(self, label: str):
+        self.label = label
+        self.names: Dict[str, None] = {}  # normalized entity names, as an ordered set
+        self.regions: Counter = Counter()
+        self.ethnicities: Counter = Counter()
+        self.coverage: Counter = Counter()
+
+
+class _Aggregate:
+    def __init__(self):
+        self.entities: Dict[str, MythologicalEntity] = {}
+        # What each entity was counted under; entities are edited in place before a save, so the
+        # previous contribution cannot be read back from the entity itself.
+        self.contributions: Dict[str, Tuple[List[str], str, str, Set[str]]] = {}
+        self.countries: Dict[str, _Country] = {}
+        self.regions: Counter = Counter()
+        self.ethnicities: Counter = Counter()
+        self.coverage: Counter = Counter()
+
+    def upsert(self, entity: MythologicalEntity):
+        name = normalize_name(entity.name)
+        previous = self.contributions.get(name)
+        if previous is not None:
+            self._add(name, previous, -1)
+        contribution = (
+            facet_values(entity, "country"),
+            entity.origin.cultural_region.strip(),
+            (entity.origin.ethnicity or "").strip(),
+            image_styles(entity),
+        )
+        self.entities[name] = entity
+        self.contributions[name] = contribution
+        self._add(name, contribution, 1)
+
+    def _add(self, name: str, contribution: Tuple[List[str], str, str, Set[str]], sign: int):
+        countries, region, ethnicity, styles = contribution
+        _count(self.regions, [region], sign)
+        _count(self.ethnicities, [ethnicity], sign)
+        _count(self.coverage, styles, sign)
+        for label in countries:
+            key = normalize_name(label)
+            country = self.countries.get(key)
+            if country is None:
+                country = self.countries[key] = _Country(label)
+            if sign > 0:
+                country.names[name] = None
+            else:
+                country.names.pop(name, None)
+            _count(country.regions, [region], sign)
+            _count(country.ethnicities, [ethnicity], sign)
+            _count(country.coverage, styles, sign)
+            if not country.names:
+                del self.countries[key]
+
+
+def _count(counter: Counter, values, sign: int):
+    for value in values:
+        if value:
+            counter[value] += sign
+            if counter[value] <= 0:
+                del counter[value]
+
+
+def _ranked(counter: Counter) -> List[dict]:
+    return [{"name": name, "count": count} for name, count in sorted(counter.items(), key=lambda item: (-item[1], item[0]))]
+
+
+class GeoIndex(CatalogIndex):
+    def __init__(self, orchestrator):
+        super().__init__(orchestrator)
+        self._summary: Optional[Tuple[int, bytes, str]] = None
+
+    def summary(self) -> Tuple[bytes, str]:
+        """(JSON bytes, ETag) of the per-country counts; re-rendered only after a change."""
+        aggregate = self._current()
+        with self._lock:
+            if self._summary is None or self._summary[0] != self.generation:
+                body = orjson.dumps({
+                    "total": len(aggregate.entities),
+                    "coverage": dict(aggregate.coverage),
+                    "countries": [
+                        {
+                            "country": country.label,
+                            "count": len(country.names),
+                            "cultural_regions": dict(country.regions),
+                            "ethnicities": dict(country.ethnicities),
+                            "coverage": dict(country.coverage),
+                        }
+                        for country in sorted(aggregate.countries.values(), key=lambda country: country.label)
+                    ],
+                    "cultural_regions": _ranked(aggregate.regions),
+                    "ethnicities": _ranked(aggregate.ethnicities),
+                })
+                self._summary = (self.generation, body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+            return self._summary[1], self._summary[2]
+
+    def country(self, country: str) -> Optional[dict]:
+        """Entities of one country with its ethnicity counts and image coverage, or None."""
+        aggregate = self._current()
+        with self._lock:
+            found = aggregate.countries.get(normalize_name(country))
+            if found is None:
+                return None
+            entities = [aggregate.entities[name] for name in found.names]
+            return {
+                "country": found.label,
+                "count": len(entities),
+                "cultural_regions": _ranked(found.regions),
+                "ethnicities": _ranked(found.ethnicities),
+                "coverage": dict(found.coverage),
+                "entities": [
+                    {
+                        "name": entity.name,
+                        "entity_type": entity.entity_type,
+                        "ethnicity": entity.origin.ethnicity,
+                        "cultural_region": entity.origin.cultural_region,
+                        "imageUrl": entity.appearance.imageUrl,
+                    }
+                    for entity in entities
+                ],
+            }
+
+    def _build(self, entities: List[MythologicalEntity]) -> _Aggregate:
+        aggregate = _Aggregate()
+        for entity in entities:
+            aggregate.upsert(entity)
+        return aggregate
+
+    def _upsert(self, aggregate: _Aggregate, entity: MythologicalEntity):
+        aggregate.upsert(entity)
@@ -0,0 +1,86 @@
+"""Content-addressed storage of the generated images: files are named after the SHA-256 of their bytes.
+
+A file never changes once written, so the API serves it with an immutable Cache-Control and a strong
+ETag. Identical images share one file. Files no entity references any more are removed with:
+
+    python -m engine.image_store gc [--dry-run]
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Set
+
+from engine.domain import MythologicalEntity
+
+# {hash}.png for the originals, {hash}_{label}.webp|avif for their variants (engine/derivatives.py).
+CONTENT_NAME = re.compile(r"^[0-9a-f]{32}(?:_\w+)?\.(?:png|webp|avif)$")
+# Younger files may belong to a generation or variant build not recorded yet.
+GC_MIN_AGE_SECONDS = 3600
+
+
+def store_image(image, directory: Path) -> str:
+    """Saves `image` (anything with save(location=...)) under its content hash. Returns the file name."""
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f".{uuid.uuid4().hex}.tmp"
+    try:
+        image.save(location=str(tmp_path), include_generation_parameters=False)
+        with open(tmp_path, "rb") as file:
+            name = f"{hashlib.file_digest(file, 'sha256').hexdigest()[:32]}.png"
+        target = directory / name
+        if target.exists():
+            # Same bytes already stored: keep that file, and make it young again so gc leaves it alone.
+            os.utime(target)
+        else:
+            os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return name
+
+
+def referenced_files(entities: Iterable[MythologicalEntity]) -> Set[str]:
+    urls = []
+    for entity in entities:
+        rendering = entity.rendering or {}
+        urls.append(entity.appearance.imageUrl)
+        urls.extend((rendering.get("images") or {}).values())
+        for formats in (rendering.get("image_variants") or {}).values():
+            for sizes in formats.values():
+                urls.extend(sizes.values())
+    return {url.rsplit("/", 1)[-1] for url in urls if url}
+
+
+def collect_garbage(
+    directory: Path, entities: Iterable[MythologicalEntity], dry_run: bool = False, min_age: float = GC_MIN_AGE_SECONDS
+) -> List[Path]:
+    """Removes the content-addressed files (and stale temp files) no entity references. Returns them."""
+    referenced = referenced_files(entities)
+    cutoff = time.time() - min_age
+    garbage = [
+        path
+        for path in directory.iterdir()
+        if (CONTENT_NAME.match(path.name) and path.name not in referenced or path.suffix == ".tmp")
+        and path.stat().st_mtime < cutoff
+    ]
+    if not dry_run:
+        for path in garbage:
+            path.unlink(missing_ok=True)
+    return garbage
+
+
+if __name__ == "__main__":
+    from engine.generation import GENERATED_DIR
+    from engine.loader import load_mythology_data
+
+    parser = argparse.ArgumentParser(description="Garbage-collects the generated images.")
+    parser.add_argument("command", choices=("gc",))
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    removed = collect_garbage(GENERATED_DIR, load_mythology_data(), dry_run=args.dry_run)
+    for path in removed:
+        print(path.name)
+    print(f"{'Would remove' if args.dry_run else 'Removed'} {len(removed)} file(s).")
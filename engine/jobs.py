@@ -0,0 +1,164 @@
+"""SQLite-backed background queue for image generation.
+
+The API only enqueues (POST /jobs); a pool of worker processes consumes:
+
+    python -m engine.jobs --workers 2
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+
+from engine.domain import ImageGenerationRequest
+from engine.backends import get_backend
+from engine.generation import generate_entity_image
+from engine.orchestrator import ImageOrchestrator
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB_PATH = Path(
+    os.environ.get("JOBS_DB_PATH", Path(__file__).resolve().parent.parent / "var" / "jobs.sqlite3")
+)
+POLL_INTERVAL_SECONDS = 1.0
+
+_COLUMNS = ("id", "entity_name", "style_id", "prompt", "status", "image_url", "error")
+
+
+class JobQueue:
+    """Durable queue of ImageGenerationRequest rows, safe to share between processes."""
+
+    def __init__(self, path: Path = JOBS_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, entity_name TEXT NOT NULL, style_id TEXT NOT NULL,"
+                " prompt TEXT NOT NULL, status TEXT NOT NULL, image_url TEXT NOT NULL DEFAULT '',"
+                " error TEXT NOT NULL DEFAULT '', created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly where they matter (claim).
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def submit(self, entity_name: str, style_id: str, prompt: str) -> ImageGenerationRequest:
+        job = ImageGenerationRequest(id=uuid.uuid4().hex, entity_name=entity_name, style_id=style_id, prompt=prompt)
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, entity_name, style_id, prompt, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.entity_name, job.style_id, job.prompt, job.status, now, now),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[ImageGenerationRequest]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _to_job(row) if row else None
+
+    def claim(self) -> Optional[ImageGenerationRequest]:
+        """Atomically moves the oldest pending job to `generating` and returns it."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE status = 'pending' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = 'generating', updated_at = ? WHERE id = ?", (time.time(), row[0])
+                )
+            conn.execute("COMMIT")
+        return _to_job(row, status="generating") if row else None
+
+    def finish(self, job_id: str, status: str, image_url: str = "", error: str = ""):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, image_url = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, image_url, error, time.time(), job_id),
+            )
+
+    def requeue_in_flight(self) -> int:
+        """Puts jobs left in `generating` by a stopped pool back to `pending`."""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pending', updated_at = ? WHERE status = 'generating'", (time.time(),)
+            )
+        return cursor.rowcount
+
+
+def _to_job(row, **overrides) -> ImageGenerationRequest:
+    return ImageGenerationRequest(**{**dict(zip(_COLUMNS, row)), **overrides})
+
+
+@lru_cache(maxsize=None)
+def get_job_queue() -> JobQueue:
+    return JobQueue()
+
+
+def process_next_job(queue: JobQueue, orchestrator) -> bool:
+    """Runs one job if any is pending. Returns False when the queue is empty."""
+    job = queue.claim()
+    if job is None:
+        return False
+
+    # Other processes may have saved images since our last job.
+    orchestrator.sync()
+    entity = orchestrator.find_entity(job.entity_name)
+    try:
+        if entity is None:
+            raise LookupError("Entity not found")
+        image_url = generate_entity_image(orchestrator, entity, job.style_id, job.prompt)
+        queue.finish(job.id, "done", image_url=image_url)
+        logger.info(f"Job {job.id} done: {image_url}")
+    except (ResourceExhausted, TooManyRequests) as e:
+        logger.error(f"Job {job.id} quota exceeded: {e}")
+        queue.finish(job.id, "error", error="quota_exceeded")
+    except Exception as e:
+        logger.error(f"Job {job.id} failed: {e}")
+        queue.finish(job.id, "error", error=str(e))
+    return True
+
+
+def run_worker(db_path: Path = JOBS_DB_PATH):
+    logging.basicConfig(level=logging.INFO)
+    get_backend().warm_up()
+    queue = JobQueue(db_path)
+    orchestrator = ImageOrchestrator()
+    while True:
+        if not process_next_job(queue, orchestrator):
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def run_pool(workers: int, db_path: Path = JOBS_DB_PATH):
+    """Starts `workers` processes; at most that many generations run at once."""
+    requeued = JobQueue(db_path).requeue_in_flight()
+    if requeued:
+        logger.info(f"Requeued {requeued} interrupted job(s).")
+
+    processes = [multiprocessing.Process(target=run_worker, args=(db_path,)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Image generation worker pool.")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("JOB_WORKERS", "2")))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_pool(args.workers)
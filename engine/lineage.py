@@ -0,0 +1,334 @@
+"""Resolved relationship graph over Relations.parents / conjoint / descendants, for GET /lineage.
+
+Relation names are free text: they are resolved to entities by normalized name (and aliases),
+and each edge is also inferred the other way (A lists B as parent -> B has child A; spouses are
+symmetric). References to no entity and parent cycles are kept for reporting (GET
+/admin/lineage). A saved entity only relinks its own edges, plus those of the entities naming one
+of its names when that name appeared or went away; traversals are memoized until a relation
+changes.
+"""
+import logging
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from engine.catalog_index import CatalogIndex
+from engine.domain import MythologicalEntity
+from engine.text import normalize_name
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("ancestors", "descendants", "spouses")
+MAX_DEPTH = 10
+MAX_MEMOIZED = 4096
+
+
+def _relation_key(entity: MythologicalEntity) -> Tuple:
+    relations = entity.relations
+    aliases = tuple(getattr(entity, "aliases", None) or ())
+    return entity.name, aliases, tuple(relations.parents), tuple(relations.conjoint), tuple(relations.descendants)
+
+
+class _Graph:
+    def __init__(self, entities: List[MythologicalEntity]):
+        self.memo: Dict[Tuple[int, str, int], Any] = {}
+        self.entities: List[MythologicalEntity] = []
+        self.ids: Dict[str, int] = {}  # normalized name or alias -> id
+        self._named: Dict[str, int] = {}  # normalized name -> id
+        self._doc_of: Dict[int, int] = {}  # id() of an entity in self.entities -> its id
+        self.keys: List[Tuple] = []
+        self._names: List[Optional[str]] = []  # normalized name each id is registered under
+        self._aliases: List[Set[str]] = []
+        # Adjacency as ordered sets; an edge stays while one entity still declares it (self._edges).
+        self.parents: List[Dict[int, None]] = []
+        self.children: List[Dict[int, None]] = []
+        self.spouses: List[Dict[int, None]] = []
+        self._edges: Counter = Counter()
+        self._declared: List[List[Tuple[str, int, int]]] = []
+        self._mentions: List[Set[str]] = []
+        self._referrers: Dict[str, Dict[int, None]] = {}  # normalized reference -> ids naming it
+        self.unresolved: Dict[int, List[str]] = {}
+        self._cycles: Optional[List[List[int]]] = None
+
+        first: Dict[str, int] = {}  # a later duplicate replaces the earlier entity
+        for entity in entities:
+            key = normalize_name(entity.name)
+            if key in first:
+                self._replace(first[key], entity)
+            else:
+                first[key] = self._add_doc(entity)
+        for doc in range(len(self.entities)):
+            self._assign_names(doc)
+        for doc in range(len(self.entities)):
+            self._assign_aliases(doc)
+            self.keys[doc] = _relation_key(self.entities[doc])
+        for doc in range(len(self.entities)):
+            self._link(doc)
+        if self.unresolved or self.cycles:
+            logger.warning(
+                f"Lineage: {sum(map(len, self.unresolved.values()))} unresolved reference(s), "
+                f"{len(self.cycles)} parent cycle(s)"
+            )
+
+    @property
+    def cycles(self) -> List[List[int]]:
+        """Every parent cycle of the catalog; recomputed on first use after a relation changed."""
+        if self._cycles is None:
+            self._cycles = self._parent_cycles()
+        return self._cycles
+
+    def upsert(self, entity: MythologicalEntity):
+        """Applies one saved entity: only its own edges, and those of entities naming one of its names, change."""
+        doc = self._doc_of.get(id(entity))  # mutated in place, possibly renamed
+        if doc is None:
+            doc = self._named.get(normalize_name(entity.name))
+        if doc is None:
+            doc = self._add_doc(entity)
+        else:
+            self._replace(doc, entity)
+        key = _relation_key(entity)
+        if self.keys[doc] == key:
+            return
+
+        self.keys[doc] = key
+        changed = self._assign_names(doc) | self._assign_aliases(doc)
+        relink = {doc}
+        for name in changed:
+            relink.update(self._referrers.get(name, ()))
+        for other in relink:
+            self._unlink(other)
+            self._link(other)
+        self.memo.clear()
+        self._cycles = None
+
+    def _add_doc(self, entity: MythologicalEntity) -> int:
+        doc = len(self.entities)
+        self.entities.append(entity)
+        self._doc_of[id(entity)] = doc
+        self.keys.append(())
+        self._names.append(None)
+        self._aliases.append(set())
+        for adjacency in (self.parents, self.children, self.spouses):
+            adjacency.append({})
+        self._declared.append([])
+        self._mentions.append(set())
+        return doc
+
+    def _replace(self, doc: int, entity: MythologicalEntity):
+        self._doc_of.pop(id(self.entities[doc]), None)
+        self.entities[doc] = entity
+        self._doc_of[id(entity)] = doc
+
+    def _assign_names(self, doc: int) -> Set[str]:
+        """Registers the (new) name of `doc`, dropping the old one. Returns the names whose id changed."""
+        name, previous = normalize_name(self.entities[doc].name), self._names[doc]
+        if name == previous:
+            return set()
+        changed = {name}
+        if previous is not None:
+            if self._named.get(previous) == doc:
+                del self._named[previous]
+            if self.ids.get(previous) == doc:
+                del self.ids[previous]
+            changed.add(previous)
+        self._named[name] = doc
+        self.ids[name] = doc  # a name wins over another entity's alias
+        self._names[doc] = name
+        return changed
+
+    def _assign_aliases(self, doc: int) -> Set[str]:
+        aliases = {normalize_name(alias) for alias in getattr(self.entities[doc], "aliases", None) or []}
+        changed = set()
+        for alias in self._aliases[doc] - aliases:
+            if self.ids.get(alias) == doc and alias not in self._named:
+                del self.ids[alias]
+                changed.add(alias)
+        for alias in aliases - self._aliases[doc]:
+            if alias not in self.ids:
+                self.ids[alias] = doc
+                changed.add(alias)
+        self._aliases[doc] = aliases
+        return changed
+
+    def _link(self, doc: int):
+        relations = self.entities[doc].relations
+        for names, kind in ((relations.parents, "parent"), (relations.descendants, "child"), (relations.conjoint, "spouse")):
+            for name in names:
+                key = normalize_name(name)
+                self._mentions[doc].add(key)
+                self._referrers.setdefault(key, {})[doc] = None
+                other = self.ids.get(key)
+                if other is None:
+                    self.unresolved.setdefault(doc, []).append(name)
+                elif other != doc:
+                    if kind == "spouse":
+                        edge = ("spouse", min(doc, other), max(doc, other))
+                    else:
+                        edge = ("parent", doc, other) if kind == "parent" else ("parent", other, doc)
+                    self._declared[doc].append(edge)
+                    self._add_edge(edge)
+
+    def _unlink(self, doc: int):
+        for edge in self._declared[doc]:
+            self._remove_edge(edge)
+        self._declared[doc] = []
+        for key in self._mentions[doc]:
+            referrers = self._referrers[key]
+            referrers.pop(doc, None)
+            if not referrers:
+                del self._referrers[key]
+        self._mentions[doc] = set()
+        self.unresolved.pop(doc, None)
+
+    def _add_edge(self, edge: Tuple[str, int, int]):
+        self._edges[edge] += 1
+        if self._edges[edge] == 1:
+            kind, source, target = edge
+            if kind == "parent":
+                self.parents[source][target] = None
+                self.children[target][source] = None
+            else:
+                self.spouses[source][target] = None
+                self.spouses[target][source] = None
+
+    def _remove_edge(self, edge: Tuple[str, int, int]):
+        self._edges[edge] -= 1
+        if not self._edges[edge]:
+            del self._edges[edge]
+            kind, source, target = edge
+            if kind == "parent":
+                del self.parents[source][target]
+                del self.children[target][source]
+            else:
+                del self.spouses[source][target]
+                del self.spouses[target][source]
+
+    def _parent_cycles(self) -> List[List[int]]:
+        """Groups of entities that are their own ancestors (strongly connected components, Kosaraju)."""
+        size = len(self.entities)
+        order, seen = [], [False] * size
+        for root in range(size):
+            if seen[root]:
+                continue
+            seen[root] = True
+            stack = [(root, iter(self.parents[root]))]
+            while stack:
+                node, edges = stack[-1]
+                following = next(edges, None)
+                if following is None:
+                    stack.pop()
+                    order.append(node)
+                elif not seen[following]:
+                    seen[following] = True
+                    stack.append((following, iter(self.parents[following])))
+
+        component = [-1] * size
+        cycles = []
+        for root in reversed(order):
+            if component[root] != -1:
+                continue
+            members, stack = [], [root]
+            component[root] = root
+            while stack:
+                node = stack.pop()
+                members.append(node)
+                for other in self.children[node]:
+                    if component[other] == -1:
+                        component[other] = root
+                        stack.append(other)
+            if len(members) > 1:
+                cycles.append(sorted(members))
+        return cycles
+
+    def cycle_of(self, doc: int) -> List[int]:
+        """The parent cycle through `doc` (its ancestors that are also its descendants), or []."""
+        memo_key = (doc, "cycle", 0)
+        cached = self.memo.get(memo_key)
+        if cached is not None:
+            return cached
+        members = []
+        if self.parents[doc] and self.children[doc]:
+            members = sorted(self._reach(doc, self.parents) & self._reach(doc, self.children))
+        result = self.memo[memo_key] = members if len(members) > 1 else []
+        return result
+
+    @staticmethod
+    def _reach(doc: int, adjacency: List[Dict[int, None]]) -> Set[int]:
+        seen, stack = {doc}, [doc]
+        while stack:
+            for other in adjacency[stack.pop()]:
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def traverse(self, doc: int, direction: str, depth: int) -> dict:
+        memo_key = (doc, direction, depth)
+        cached = self.memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        adjacency = {"ancestors": self.parents, "descendants": self.children, "spouses": self.spouses}[direction]
+        distances = {doc: 0}
+        edges = []
+        queue = deque([doc])
+        while queue:
+            node = queue.popleft()
+            if distances[node] == depth:
+                continue
+            for other in adjacency[node]:
+                edges.append((node, other))
+                if other not in distances:
+                    distances[other] = distances[node] + 1
+                    queue.append(other)
+
+        if len(self.memo) >= MAX_MEMOIZED:
+            self.memo.clear()
+        result = self.memo[memo_key] = {"distances": distances, "edges": edges}
+        return result
+
+
+class LineageIndex(CatalogIndex):
+    def lineage(self, name: str, direction: str = "ancestors", depth: int = 1) -> dict:
+        """Entities reached from `name` within `depth` steps, the edges followed, and its data problems."""
+        graph = self._current()
+        with self._lock:
+            doc = graph.ids.get(normalize_name(name))
+            if doc is None:
+                raise KeyError(name)
+            walk = graph.traverse(doc, direction, depth)
+            cycle = graph.cycle_of(doc)
+            entities = graph.entities
+            return {
+                "name": entities[doc].name,
+                "direction": direction,
+                "depth": depth,
+                "nodes": [
+                    {
+                        "name": entities[other].name,
+                        "entity_type": entities[other].entity_type,
+                        "category": entities[other].category,
+                        "distance": distance,
+                    }
+                    for other, distance in walk["distances"].items()
+                    if other != doc
+                ],
+                "edges": [[entities[source].name, entities[target].name] for source, target in walk["edges"]],
+                "unresolved": graph.unresolved.get(doc, []),
+                "cycles": [[entities[member].name for member in cycle]] if cycle else [],
+            }
+
+    def problems(self) -> dict:
+        """{"unresolved": {entity: [names]}, "cycles": [[entities]]} over the whole catalog."""
+        graph = self._current()
+        with self._lock:
+            names = [entity.name for entity in graph.entities]
+            return {
+                "unresolved": {names[doc]: references for doc, references in graph.unresolved.items()},
+                "cycles": [[names[member] for member in cycle] for cycle in graph.cycles],
+            }
+
+    def _build(self, entities: List[MythologicalEntity]) -> _Graph:
+        return _Graph(entities)
+
+    def _upsert(self, graph: _Graph, entity: MythologicalEntity):
+        graph.upsert(entity)
@@ -1,25 +1,222 @@
+import gc
 import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List
-from engine.domain import MythologicalEntity
+from typing import Any, Dict, List, Optional, Tuple
+from engine.domain import MythologicalEntity, validate_entities_json
+from engine.sqlite_store import SQLiteStore, get_store
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev setups only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
 
 # Path resolution: engine/loader.py -> parent -> parent -> src/data/mythology_data.json
 DATA_PATH = Path(__file__).parent.parent / "src" / "data" / "mythology_data.json"
 
+# "json" (default): DATA_PATH + change log. "sqlite": SQLITE_PATH, see engine/sqlite_store.py.
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json")
+SQLITE_PATH = Path(os.environ.get("SQLITE_PATH", DATA_PATH.with_suffix(".sqlite3")))
+
+# Held by the writers of this process around an in-place entity edit and its save_entity()
+# (/generate threads, backfill threads, variant callbacks), so their edits do not interleave.
+save_lock = threading.Lock()
+
+# save_entity() appends to a change log next to DATA_PATH; once the log grows past this size
+# it is folded back into the main JSON file.
+COMPACT_AFTER_BYTES = int(os.environ.get("CHANGELOG_COMPACT_BYTES", 1_000_000))
+
+def changelog_path() -> Path:
+    return DATA_PATH.with_name(DATA_PATH.stem + ".changes.jsonl")
+
+
 def load_mythology_data() -> List[MythologicalEntity]:
     """Loads the mythology data from the JSON file and validates it against the usage model."""
+    if STORAGE_BACKEND == "sqlite":
+        with _gc_paused():
+            return get_store(SQLITE_PATH).load_all()
     if not DATA_PATH.exists():
         raise FileNotFoundError(f"Database file not found at {DATA_PATH.resolve()}")
-    
-    with open(DATA_PATH, 'r', encoding='utf-8') as f:
-        raw_data = json.load(f)
-    
-    return [MythologicalEntity(**item) for item in raw_data]
+
+    with _data_lock(shared=True):
+        raw_bytes = DATA_PATH.read_bytes()
+        changes = _read_changes()
+
+    with _gc_paused():
+        entities = validate_entities_json(raw_bytes)
+        positions = {entity.name: index for index, entity in enumerate(entities)}
+        for change in changes:
+            entity = MythologicalEntity(**change["entity"])
+            index = positions.setdefault(change["name"], len(entities))
+            if index == len(entities):
+                entities.append(entity)
+            else:
+                entities[index] = entity
+    return entities
+
 
 def save_mythology_data(data: List[MythologicalEntity]):
-    """Saves the mythology data back to the JSON file."""
+    """Saves the whole dataset back to the JSON file (atomically) and clears the change log."""
+    if STORAGE_BACKEND == "sqlite":
+        get_store(SQLITE_PATH).replace_all(data)
+        return
+
     # Convert Pydantic models to dicts
     dict_data = [entity.model_dump() for entity in data]
-    
-    with open(DATA_PATH, 'w', encoding='utf-8') as f:
+
+    with _data_lock():
+        _write_json_atomic(dict_data)
+        changelog_path().unlink(missing_ok=True)
+
+
+def save_entity(entity: MythologicalEntity):
+    """Persists one entity by appending it to the change log (fsynced). Cost is O(entity)."""
+    if STORAGE_BACKEND == "sqlite":
+        get_store(SQLITE_PATH).upsert(entity)
+        return
+
+    line = json.dumps({"name": entity.name, "entity": entity.model_dump()}, ensure_ascii=False) + "\n"
+
+    with _data_lock():
+        with open(changelog_path(), "a", encoding="utf-8") as log:
+            log.write(line)
+            log.flush()
+            os.fsync(log.fileno())
+            log_size = log.tell()
+        if log_size >= COMPACT_AFTER_BYTES:
+            _compact()
+
+
+def compact_mythology_data():
+    """Folds the change log into the main JSON file."""
+    with _data_lock():
+        _compact()
+
+
+def indexed_store() -> Optional[SQLiteStore]:
+    """The SQLite store when it holds the catalog, for its indexed lookups; None with the JSON backend."""
+    return get_store(SQLITE_PATH) if STORAGE_BACKEND == "sqlite" else None
+
+
+def dataset_cursor() -> Tuple:
+    """Opaque position in the dataset's change history, see load_changes_since()."""
+    if STORAGE_BACKEND == "sqlite":
+        return get_store(SQLITE_PATH).cursor()
+    with _data_lock(shared=True):
+        return _base_stamp(), _changelog_size()
+
+
+def load_changes_since(cursor: Tuple) -> Tuple[Optional[List[MythologicalEntity]], Tuple]:
+    """Entities saved (by any process) since `cursor`, and the new cursor.
+
+    Returns None instead of a list when the caller must reload everything: the JSON file was
+    rewritten (compaction, save_mythology_data) or the SQLite table was replaced.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        return get_store(SQLITE_PATH).changes_since(cursor)
+
+    with _data_lock(shared=True):
+        stamp, size = _base_stamp(), _changelog_size()
+        (cursor_stamp, offset) = cursor
+        if stamp != cursor_stamp or size < offset:
+            return None, (stamp, size)
+        if size == offset:
+            return [], cursor
+        with open(changelog_path(), 'rb') as log:
+            log.seek(offset)
+            chunk = log.read(size - offset)
+
+    # Stop at the last complete line; a partial one is read again next time.
+    end = chunk.rfind(b"\n") + 1
+    entities = [MythologicalEntity(**json.loads(line)["entity"]) for line in chunk[:end].splitlines() if line.strip()]
+    return entities, (stamp, offset + end)
+
+
+def _base_stamp() -> Tuple[int, int, int]:
+    stat = DATA_PATH.stat()
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _changelog_size() -> int:
+    try:
+        return changelog_path().stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _compact():
+    if not changelog_path().exists():
+        return
+    _write_json_atomic(_load_raw_data())
+    changelog_path().unlink()
+    logger.info(f"Change log compacted into {DATA_PATH.name}")
+
+
+@contextmanager
+def _gc_paused():
+    # Validation allocates ~10 objects per entity; cyclic GC passes over them cost more than the
+    # validation itself on large catalogs.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_raw_data() -> List[Dict[str, Any]]:
+    with open(DATA_PATH, 'r', encoding='utf-8') as f:
+        raw_data = json.load(f)
+
+    positions = {item["name"]: index for index, item in enumerate(raw_data)}
+    for change in _read_changes():
+        index = positions.get(change["name"])
+        if index is None:
+            positions[change["name"]] = len(raw_data)
+            raw_data.append(change["entity"])
+        else:
+            raw_data[index] = change["entity"]
+    return raw_data
+
+
+def _read_changes() -> List[Dict[str, Any]]:
+    if not changelog_path().exists():
+        return []
+
+    changes = []
+    with open(changelog_path(), 'r', encoding='utf-8') as log:
+        for line in log:
+            try:
+                changes.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Only a crash in the middle of an append can leave a torn (last) line.
+                logger.warning(f"Skipping unreadable change log line in {changelog_path().name}")
+    return changes
+
+
+def _write_json_atomic(dict_data: List[Dict[str, Any]]):
+    tmp_path = DATA_PATH.with_name(DATA_PATH.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(dict_data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, DATA_PATH)
+
+
+@contextmanager
+def _data_lock(shared: bool = False):
+    """File lock across processes (uvicorn workers, job workers, CLI): exclusive for writers."""
+    with open(DATA_PATH.with_name(DATA_PATH.name + ".lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -3,6 +3,7 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from orchestrator import ImageOrchestrator
+from backfill import run_backfill
 
 console = Console()
 orchestrator = ImageOrchestrator()
@@ -41,9 +42,20 @@ def preview(name):
     console.print(Panel(f"[bold gold1]Prompt Preview: {name}[/bold gold1]", border_style="gold1"))
     console.print(prompt)
 
+def backfill(concurrency):
+    console.print(Panel(f"[bold gold1]Backfilling missing images with {concurrency} workers...[/bold gold1]", border_style="gold1"))
+    stats = run_backfill(orchestrator, concurrency=concurrency)
+
+    table = Table(title="Backfill Summary", border_style="gold1")
+    table.add_column("Metric", style="cyan", no_wrap=True)
+    table.add_column("Value", style="magenta")
+    for metric, value in stats.items():
+        table.add_row(metric.capitalize(), str(value))
+    console.print(table)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        console.print(Panel("[bold]L'Esprit CLI[/bold]\n\nUsage:\n  python main.py analyze\n  python main.py list-missing\n  python main.py preview <EntityName>", title="Help", border_style="blue"))
+        console.print(Panel("[bold]L'Esprit CLI[/bold]\n\nUsage:\n  python main.py analyze\n  python main.py list-missing\n  python main.py preview <EntityName>\n  python main.py backfill [concurrency]", title="Help", border_style="blue"))
         sys.exit(1)
         
     cmd = sys.argv[1]
@@ -54,5 +66,7 @@ if __name__ == "__main__":
         list_missing()
     elif cmd == "preview" and len(sys.argv) > 2:
         preview(sys.argv[2])
+    elif cmd == "backfill":
+        backfill(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
     else:
         console.print("[bold red]Unknown command.[/bold red]")
@@ -0,0 +1,45 @@
+"""Prometheus metrics of this process, exposed by GET /metrics.
+
+Latency per route and per /generate stage, failure counts of the image backend, and gauges of the
+dataset. Observing a histogram is a lock and a few additions; the dataset gauges are computed when
+scraped, and only again after the dataset changed.
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "lesprit_http_request_duration_seconds",
+    "Request latency per route template.",
+    ["method", "route", "status"],
+)
+GENERATE_STAGE_LATENCY = Histogram(
+    "lesprit_generate_stage_duration_seconds",
+    "Latency of each stage of an image generation (prompt, model, imagen, image_save, persist).",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80),
+)
+GENERATE_FAILURES = Counter(
+    "lesprit_generate_failures_total",
+    "Failed generations: safety_filter (no image returned), quota_exceeded (429), error (500).",
+    ["reason"],
+)
+GENERATE_COALESCED = Counter(
+    "lesprit_generate_coalesced_total",
+    "Generations served by an identical one already running (in this process or another worker).",
+)
+GENERATIONS_IN_FLIGHT = Gauge("lesprit_generations_in_flight", "Image generations currently running.")
+DATASET_ENTITIES = Gauge("lesprit_dataset_entities", "Entities in the loaded dataset.")
+MISSING_IMAGES = Gauge("lesprit_missing_images", "Entities without an imageUrl.")
+
+
+def track_dataset(orchestrator):
+    """Makes the dataset gauges read `orchestrator`; the missing-image scan reruns only after a change."""
+    missing = {"version": None, "count": 0}
+
+    def missing_images() -> int:
+        if missing["version"] != orchestrator.version:
+            missing["version"] = orchestrator.version
+            missing["count"] = len(orchestrator.get_missing_images())
+        return missing["count"]
+
+    DATASET_ENTITIES.set_function(lambda: len(orchestrator.data))
+    MISSING_IMAGES.set_function(missing_images)
@@ -1,42 +1,219 @@
-from typing import List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from engine.domain import MythologicalEntity
-from engine.loader import load_mythology_data
+from engine.loader import dataset_cursor, indexed_store, load_changes_since, load_mythology_data
+from engine.prompt_builder import build_prompt, get_style_registry
+from engine.prompt_cache import PromptCache, entity_content_hash
+from engine.text import normalize_name
+
 
 class ImageOrchestrator:
-    def __init__(self):
+    def __init__(self, load: bool = True):
+        """`load=False` starts empty; call reload() later (the API does it in its warm-up)."""
+        self.aliases: Dict[str, str] = {}
+        self._index: Dict[str, MythologicalEntity] = {}
+        self._positions: Dict[str, int] = {}
+        self._alias_index: Dict[str, str] = {}
+        self._indexed_data: Optional[List[MythologicalEntity]] = None
+        self._indexed_len = 0
+        self.prompt_cache = PromptCache()
+        self._content_hashes: Dict[int, Tuple[MythologicalEntity, str]] = {}
+        # Bumped on every change to the dataset; caches of derived data (e.g. entity_views) key on it.
+        self.version = 0
+        # Called with each changed entity, or None when the whole dataset was reindexed (e.g. SearchIndex).
+        self.listeners: List[Callable[[Optional[MythologicalEntity]], None]] = []
+        self._sync_cursor = None
+        self._status: Optional[Tuple[int, Tuple[int, int]]] = None  # (version, analyze_status())
+        self.data: List[MythologicalEntity] = []
+        if not load:
+            return
         try:
-            self.data: List[MythologicalEntity] = load_mythology_data()
+            # Cursor first: a change saved during the load is applied again by sync(), harmlessly.
+            self._sync_cursor = dataset_cursor()
+            self.data = load_mythology_data()
         except Exception as e:
             print(f"Failed to load data: {e}")
+            self._sync_cursor = None
             self.data = []
 
+    def reload(self):
+        """Reloads the dataset from storage and rebuilds the name index."""
+        self._sync_cursor = dataset_cursor()
+        self.data = load_mythology_data()
+        self.reindex()
+
+    def sync(self) -> int:
+        """Applies the entities other processes saved since the last sync. Returns how many changed.
+
+        Costs a stat() (one SELECT with SQLite) when nothing changed; falls back to reload() only when the storage was
+        rewritten as a whole (e.g. change log compaction).
+        """
+        if self._sync_cursor is None:
+            return 0
+        changes, self._sync_cursor = load_changes_since(self._sync_cursor)
+        if changes is None:
+            self.reload()
+            return len(self.data)
+
+        self.ensure_indexed()
+        for entity in changes:
+            key = normalize_name(entity.name)
+            position = self._positions.get(key)
+            if position is None:
+                self._positions[key] = len(self.data)
+                self.data.append(entity)
+                self._indexed_len = len(self.data)
+            else:
+                self.mark_changed(self.data[position])
+                self.data[position] = entity
+            self._index[key] = entity
+            self._notify(entity)
+        if changes:
+            self.version += 1
+        return len(changes)
+
+    def reindex(self):
+        """Rebuilds the name index. Called automatically when `data` is replaced or resized (ensure_indexed)."""
+        self._index = {normalize_name(entity.name): entity for entity in self.data}
+        self._positions = {normalize_name(entity.name): position for position, entity in enumerate(self.data)}
+        # Aliases come from the optional (extra) `aliases` list of each entity, plus add_alias().
+        self._alias_index = {
+            normalize_name(alias): normalize_name(entity.name)
+            for entity in self.data
+            for alias in getattr(entity, "aliases", None) or []
+        }
+        self._alias_index.update(self.aliases)
+        self._content_hashes = {}
+        self._indexed_data = self.data
+        self._indexed_len = len(self.data)
+        self.version += 1
+        self._notify(None)
+
+    def ensure_indexed(self):
+        """Reindexes if `data` was replaced or resized since the last index build."""
+        if self._indexed_data is not self.data or self._indexed_len != len(self.data):
+            self.reindex()
+
+    def add_alias(self, alias: str, entity_name: str):
+        self.aliases[normalize_name(alias)] = normalize_name(entity_name)
+        self._alias_index[normalize_name(alias)] = normalize_name(entity_name)
+
+    def find_entity(self, entity_name: str) -> Optional[MythologicalEntity]:
+        """O(1) lookup by normalized name, then by alias."""
+        self.ensure_indexed()
+        key = normalize_name(entity_name)
+        entity = self._index.get(key)
+        if entity is None and key in self._alias_index:
+            entity = self._index.get(self._alias_index[key])
+        return entity
+
+    def update_entity(self, entity: MythologicalEntity, previous_name: Optional[str] = None):
+        """Keeps the index in sync after an entity was mutated in place (e.g. renamed)."""
+        if previous_name is not None:
+            self._index.pop(normalize_name(previous_name), None)
+            position = self._positions.pop(normalize_name(previous_name), None)
+            if position is not None:
+                self._positions[normalize_name(entity.name)] = position
+        self._index[normalize_name(entity.name)] = entity
+        self.mark_changed(entity)
+        if previous_name is not None:
+            self._notify(None)
+
+    def mark_changed(self, entity: MythologicalEntity):
+        """Must be called after an entity is mutated in place: drops its cached prompts."""
+        self.version += 1
+        cached = self._content_hashes.pop(id(entity), None)
+        if cached:
+            self.prompt_cache.invalidate(cached[1])
+        self._notify(entity)
+
+    def _notify(self, entity: Optional[MythologicalEntity]):
+        for listener in self.listeners:
+            listener(entity)
+
+    def _content_hash(self, entity: MythologicalEntity) -> str:
+        # Keyed by id(); the entity is kept in the tuple so the id cannot be reused while cached.
+        cached = self._content_hashes.get(id(entity))
+        if cached is None:
+            cached = self._content_hashes[id(entity)] = (entity, entity_content_hash(entity))
+        return cached[1]
+
+    def indexed_store(self):
+        """The SQLite store holding the catalog, whose indexed lookups replace scans of `data`; None with JSON."""
+        return indexed_store()
+
     def get_missing_images(self) -> List[MythologicalEntity]:
         """Returns a list of entities that have no imageUrl."""
         return [
-            entity for entity in self.data 
+            entity for entity in self.data
             if not entity.appearance.imageUrl or entity.appearance.imageUrl.strip() == ""
         ]
 
+    def get_missing_pairs(self, style_ids: Iterable[str]) -> List[Tuple[MythologicalEntity, str]]:
+        """Returns every (entity, style_id) that has a prompt but no image yet.
+
+        With the SQLite backend, the pairs without an image come from its per-style coverage index
+        instead of a scan of every entity.
+        """
+        store = self.indexed_store()
+        if store is not None:
+            self.sync()
+            pairs = []
+            for style_id in style_ids:
+                for name in store.missing_images(style_id):
+                    entity = self.find_entity(name)
+                    if entity is not None and self.resolve_prompt(entity, style_id):
+                        pairs.append((entity, style_id))
+            return pairs
+
+        pairs = []
+        for entity in self.data:
+            images = (entity.rendering or {}).get("images") or {}
+            for style_id in style_ids:
+                if images.get(style_id) or (style_id == "photoreal" and entity.appearance.imageUrl.strip()):
+                    continue
+                if self.resolve_prompt(entity, style_id):
+                    pairs.append((entity, style_id))
+        return pairs
+
     def analyze_status(self) -> Tuple[int, int]:
-        """Returns (total_entities, missing_images_count)."""
-        missing = self.get_missing_images()
-        return len(self.data), len(missing)
-    
+        """Returns (total_entities, missing_images_count); the scan reruns only after a change."""
+        self.ensure_indexed()
+        if self._status is None or self._status[0] != self.version:
+            self._status = (self.version, (len(self.data), len(self.get_missing_images())))
+        return self._status[1]
+
     def get_prompt_preview(self, entity_name: str, style_id: str = "photoreal") -> str:
         """Returns the prompt for a specific entity and style."""
-        for entity in self.data:
-            if entity.name.lower() == entity_name.lower():
-                # Photoreal: use rendering.prompt_canon or fallback to legacy
-                if style_id == "photoreal":
-                    if entity.rendering and entity.rendering.get("prompt_canon"):
-                        return entity.rendering["prompt_canon"]
-                    return entity.appearance.image_generation_prompt
-                
-                # Other styles: lookup in prompt_variants
-                if entity.rendering and entity.rendering.get("prompt_variants"):
-                    for variant in entity.rendering["prompt_variants"]:
-                        if variant.get("style_id") == style_id and variant.get("prompt"):
-                            return variant["prompt"]
-                
-                return ""  # Empty prompt for unavailable style
-        return "Entity not found."
+        entity = self.find_entity(entity_name)
+        if entity is None:
+            return "Entity not found."
+        return self.resolve_prompt(entity, style_id)
+
+    def resolve_prompt(self, entity: MythologicalEntity, style_id: str = "photoreal") -> str:
+        """Cached prompt for any style_id, including the Style Matrix driven `regional_or_ethnic`."""
+        if self._indexed_data is not self.data:
+            self.reindex()
+        matrix_version = get_style_registry().version if style_id == "regional_or_ethnic" else ""
+        key = (self._content_hash(entity), style_id, matrix_version)
+        return self.prompt_cache.get_or_build(key, lambda: self._build_prompt(entity, style_id))
+
+    def _build_prompt(self, entity: MythologicalEntity, style_id: str) -> str:
+        if style_id == "regional_or_ethnic":
+            return build_prompt(entity) or ""
+        return self.get_entity_prompt(entity, style_id)
+
+    def get_entity_prompt(self, entity: MythologicalEntity, style_id: str = "photoreal") -> str:
+        """Same as get_prompt_preview, for an entity that was already looked up."""
+        # Photoreal: use rendering.prompt_canon or fallback to legacy
+        if style_id == "photoreal":
+            if entity.rendering and entity.rendering.get("prompt_canon"):
+                return entity.rendering["prompt_canon"]
+            return entity.appearance.image_generation_prompt
+
+        # Other styles: lookup in prompt_variants
+        if entity.rendering and entity.rendering.get("prompt_variants"):
+            for variant in entity.rendering["prompt_variants"]:
+                if variant.get("style_id") == style_id and variant.get("prompt"):
+                    return variant["prompt"]
+
+        return ""  # Empty prompt for unavailable style
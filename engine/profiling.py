@@ -0,0 +1,82 @@
+"""Per-request stage timings (the Server-Timing header) and the opt-in sampling profiler.
+
+The API middleware puts a RequestTrace in `current_trace` for each request; timed() blocks add
+their duration to it, and to a Prometheus histogram when given one. Outside a request (job
+workers, backfill) timed() only feeds the histogram.
+
+A profiled request is sampled every PROFILE_INTERVAL_SECONDS in the threads that ran one of its
+stages, and returned as collapsed stacks ("frame;frame;frame count" lines), the input format of
+flamegraph.pl and speedscope.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Set, Tuple
+
+PROFILE_INTERVAL_SECONDS = 0.001
+# Samples without a frame of this package are threads idling between two stages.
+_OWN_PACKAGE = "engine."
+
+
+class RequestTrace:
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self.threads: Set[int] = set()
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages + [("total", total)])
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def timed(stage: str, histogram=None):
+    """Times the block as `stage` of the current request, and observes `histogram`{stage} if given."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.threads.add(threading.get_ident())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.labels(stage).observe(elapsed)
+        if trace is not None:
+            trace.stages.append((stage, elapsed))
+
+
+class SamplingProfiler:
+    def __init__(self, trace: RequestTrace):
+        self.trace = trace
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _run(self):
+        while not self._stop.wait(PROFILE_INTERVAL_SECONDS):
+            frames = sys._current_frames()
+            for thread_id in list(self.trace.threads):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                if any(name.startswith(_OWN_PACKAGE) for name in stack):
+                    self.samples[";".join(reversed(stack))] += 1
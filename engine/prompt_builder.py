@@ -1,26 +1,136 @@
+import hashlib
 import json
+import logging
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from engine.domain import MythologicalEntity
 
 
 STYLE_MATRIX_PATH = Path(__file__).parent.parent / "src" / "data" / "styles_matrix.json"
 
+logger = logging.getLogger(__name__)
+
 
 def load_style_matrix() -> Dict[str, Dict[str, Any]]:
     with open(STYLE_MATRIX_PATH, "r", encoding="utf-8") as file:
         return json.load(file)
 
 
+class StyleRegistry:
+    """Style matrix compiled once: resolved inheritance plus constant prompt fragments per ethnicity."""
+
+    def __init__(self, style_matrix: Dict[str, Dict[str, Any]], version: str = ""):
+        self.version = version
+        # Entries that cannot be used, with the reason: their ethnicities get no regional prompt.
+        self.errors: Dict[str, str] = {}
+        self.rules = compile_style_matrix(style_matrix, self.errors)
+        self._fragments: Dict[str, Tuple[str, str]] = {}
+        for key, rules in self.rules.items():
+            try:
+                self._fragments[key] = _prompt_fragments(rules)
+            except (KeyError, TypeError) as e:
+                self.errors[key] = f"missing or malformed field {e}"
+        for key, error in self.errors.items():
+            logger.error(f"Style matrix entry '{key}' skipped: {error}")
+
+    def build_prompt(self, entity: MythologicalEntity) -> Optional[str]:
+        ethnicity = (entity.origin.ethnicity or "").strip()
+        fragments = self._fragments.get(ethnicity)
+        if not fragments:
+            return None
+
+        prefix, suffix = fragments
+        prompt = f"{prefix} Depicting {build_subject_description(entity)}."
+        return f"{prompt} {suffix}" if suffix else prompt
+
+
+_registry: Optional[StyleRegistry] = None
+_registry_stamp: Optional[Tuple[str, int, int]] = None
+_registry_lock = threading.Lock()
+
+
+def get_style_registry() -> StyleRegistry:
+    """Returns the compiled registry, recompiling only when styles_matrix.json changed on disk."""
+    global _registry, _registry_stamp
+
+    stat = STYLE_MATRIX_PATH.stat()
+    stamp = (str(STYLE_MATRIX_PATH), stat.st_mtime_ns, stat.st_size)
+    if _registry is not None and stamp == _registry_stamp:
+        return _registry
+
+    with _registry_lock:
+        if stamp != _registry_stamp:
+            raw = STYLE_MATRIX_PATH.read_bytes()
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            if _registry is None or version != _registry.version:
+                try:
+                    _registry = StyleRegistry(json.loads(raw), version)
+                except (ValueError, KeyError) as e:
+                    # Keep serving the last good matrix while a curator fixes the file.
+                    if _registry is None:
+                        raise
+                    logger.error(f"Style matrix reload failed, keeping version {_registry.version}: {e}")
+            _registry_stamp = stamp
+    return _registry
+
+
+def compile_style_matrix(
+    style_matrix: Dict[str, Dict[str, Any]],
+    errors: Optional[Dict[str, str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Resolves every `inherits` chain once, parents first. Raises ValueError on cycles or unknown parents.
+
+    With `errors`, the entries that cannot be resolved are left out and their error is recorded there
+    instead, so a bad entry only breaks the entries inheriting from it.
+    """
+    resolved: Dict[str, Dict[str, Any]] = {}
+    for key in style_matrix:
+        try:
+            _resolve_entry(style_matrix, key, resolved, set())
+        except ValueError as e:
+            if errors is None:
+                raise
+            errors[key] = str(e)
+    return resolved
+
+
 def resolve_style_rules(
     style_matrix: Dict[str, Dict[str, Any]],
     ethnicity: str,
 ) -> Optional[Dict[str, Any]]:
+    """Resolved rules of one matrix entry, walking only its own `inherits` chain; None if there is none."""
     if not ethnicity or ethnicity not in style_matrix:
         return None
 
-    return _resolve_entry(style_matrix, ethnicity)
+    return _resolve_entry(style_matrix, ethnicity, {}, set())
+
+
+def _resolve_entry(
+    style_matrix: Dict[str, Dict[str, Any]],
+    key: str,
+    resolved: Dict[str, Dict[str, Any]],
+    in_progress: set,
+) -> Dict[str, Any]:
+    if key in resolved:
+        return resolved[key]
+    if key in in_progress:
+        raise ValueError(f"Style matrix inheritance cycle through '{key}'")
+    if key not in style_matrix:
+        raise ValueError(f"Style matrix entry inherits unknown key '{key}'")
+    entry = style_matrix[key]
+    if not isinstance(entry, dict):
+        raise ValueError(f"Style matrix entry '{key}' is not an object")
+
+    in_progress.add(key)
+    parent_key = entry.get("inherits")
+    child = {k: v for k, v in entry.items() if k != "inherits"}
+    if parent_key:
+        child = _merge_values(_resolve_entry(style_matrix, parent_key, resolved, in_progress), child)
+    resolved[key] = child
+    in_progress.discard(key)
+    return resolved[key]
 
 
 def build_subject_description(entity: MythologicalEntity) -> str:
@@ -44,16 +154,13 @@ def build_prompt(
     entity: MythologicalEntity,
     style_matrix: Optional[Dict[str, Dict[str, Any]]] = None,
 ) -> Optional[str]:
-    ethnicity = (entity.origin.ethnicity or "").strip()
-    if not ethnicity:
-        return None
+    registry = StyleRegistry(style_matrix) if style_matrix else get_style_registry()
+    return registry.build_prompt(entity)
 
-    matrix = style_matrix or load_style_matrix()
-    resolved_style = resolve_style_rules(matrix, ethnicity)
-    if not resolved_style:
-        return None
 
-    prompt_parts = [
+def _prompt_fragments(resolved_style: Dict[str, Any]) -> Tuple[str, str]:
+    """Splits a resolved style into the constant text before and after the subject description."""
+    prefix_parts = [
         resolved_style["visual_signature"],
         f"Concept: {resolved_style['visual_philosophy']['concept']}.",
         f"Geometry: {resolved_style['visual_philosophy']['geometry']}.",
@@ -68,29 +175,11 @@ def build_prompt(
         f"Context: {_join_items(resolved_style['atmosphere']['context'])}.",
         f"Palette: {_join_items(resolved_style['atmosphere']['color_palette'])}.",
         f"Required: {_join_items(resolved_style['constraints']['mandatory'])}.",
-        f"Depicting {build_subject_description(entity)}.",
     ]
 
     forbidden = resolved_style["constraints"].get("forbidden", [])
-    if forbidden:
-        prompt_parts.append(f"Avoid: {_join_items(forbidden)}.")
-
-    return " ".join(prompt_parts)
-
-
-def _resolve_entry(
-    style_matrix: Dict[str, Dict[str, Any]],
-    key: str,
-) -> Dict[str, Any]:
-    entry = style_matrix[key]
-    parent_key = entry.get("inherits")
-    if not parent_key:
-        return dict(entry)
-
-    parent = _resolve_entry(style_matrix, parent_key)
-    child = {k: v for k, v in entry.items() if k != "inherits"}
-    merged = _merge_values(parent, child)
-    return merged
+    suffix = f"Avoid: {_join_items(forbidden)}." if forbidden else ""
+    return " ".join(prefix_parts), suffix
 
 
 def _merge_values(base: Any, specific: Any) -> Any:
@@ -105,9 +194,16 @@ def _merge_values(base: Any, specific: Any) -> Any:
 
     if isinstance(base, list) and isinstance(specific, list):
         merged: List[Any] = []
+        seen = set()
         for item in base + specific:
-            if item not in merged:
-                merged.append(item)
+            try:
+                if item in seen:
+                    continue
+                seen.add(item)
+            except TypeError:  # unhashable item (list, object): compare by equality
+                if item in merged:
+                    continue
+            merged.append(item)
         return merged
 
     return specific
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+from engine.domain import MythologicalEntity
+
+
+def entity_content_hash(entity: MythologicalEntity) -> str:
+    return hashlib.sha1(entity.model_dump_json().encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """Bounded LRU of resolved prompts keyed by (entity content hash, style_id, matrix version)."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Tuple[str, str, str], build: Callable[[], str]) -> str:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        prompt = build()
+
+        with self._lock:
+            self._entries[key] = prompt
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return prompt
+
+    def invalidate(self, content_hash: Hashable):
+        """Drops every cached prompt of one entity version."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == content_hash]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
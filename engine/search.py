@@ -0,0 +1,212 @@
+"""In-memory full-text index over the catalog for GET /search.
+
+BM25 over weighted fields, accent- and case-folded with normalize_name ("Ọ̀ṣun" -> "oshun").
+The last query word also matches as a prefix (search-as-you-type); words absent from the
+vocabulary fall back to trigram similarity, so "Oshun" and "Osun" find each other.
+Very common terms only bring their best-scoring documents in as candidates, so a query's cost
+does not grow with the catalog.
+"""
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from engine.catalog_index import CatalogIndex
+from engine.domain import MythologicalEntity
+from engine.text import normalize_name
+
+FIELD_WEIGHTS = (
+    ("name", 4.0),
+    ("category", 2.0),
+    ("domains", 1.5),
+    ("symbols", 1.0),
+    ("symbolic_animals", 1.0),
+    ("cultural_role", 1.0),
+    ("description", 0.5),
+)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has he her his in is it its of on or she that the their they "
+    "this to was were who with".split()
+)
+K1, B = 1.2, 0.75
+PREFIX_EXPANSIONS = 10
+FUZZY_EXPANSIONS = 5
+MIN_SIMILARITY = 0.3
+# Terms in more documents than FULL_SCAN only bring their TOP_IMPACTS best documents in as candidates
+# (they still score every candidate); keeps a query's cost independent of the catalog size.
+FULL_SCAN = 500
+TOP_IMPACTS = 100
+# The fuzzy lookup compares the word with the terms of its rarest trigrams, up to this many terms.
+FUZZY_CANDIDATES = 300
+
+_WORD = re.compile(r"\w+")
+# Yoruba ṣ is written "sh" in English sources (Ṣàngó / Shango), accent folding alone would give "s".
+_TRANSLITERATION = str.maketrans({"ṣ": "sh", "Ṣ": "Sh"})
+
+
+def tokenize(text: str) -> List[str]:
+    folded = normalize_name(unicodedata.normalize("NFC", text).translate(_TRANSLITERATION))
+    return [word for word in _WORD.findall(folded) if word not in STOPWORDS]
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _field_texts(entity: MythologicalEntity) -> Dict[str, List[str]]:
+    return {
+        "name": [entity.name],
+        "category": [entity.category],
+        "domains": entity.attributes.domains,
+        "symbols": entity.attributes.symbols,
+        "symbolic_animals": entity.attributes.symbolic_animals,
+        "cultural_role": [entity.identity.cultural_role],
+        "description": [entity.story.description],
+    }
+
+
+class _TermIndex:
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)  # term -> {doc: weighted tf}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.total_length = 0.0
+        self.vocabulary: List[str] = []  # sorted, for prefix lookups
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self.entities: Dict[str, MythologicalEntity] = {}
+        self.top: Dict[str, List[str]] = {}  # term -> its TOP_IMPACTS documents, built on demand
+
+    def search(self, query: str, limit: int) -> List[Tuple[MythologicalEntity, float]]:
+        if not self.doc_lengths:
+            return []
+        words = tokenize(query)
+        expansions = [
+            expansion
+            for position, word in enumerate(words)
+            for expansion in self.expand(word, prefix=position == len(words) - 1)
+        ]
+        candidates: Set[str] = set()
+        for term, _ in expansions:
+            postings = self.postings[term]
+            candidates.update(postings if len(postings) <= FULL_SCAN else self.top_documents(term))
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for term, weight in expansions:
+            self.score(term, weight, scores)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.entities[doc], round(score, 4)) for doc, score in best if score > 0]
+
+    def expand(self, word: str, prefix: bool) -> List[Tuple[str, float]]:
+        """(term, weight) pairs a query word matches: itself, its completions, or near spellings."""
+        terms = [(word, 1.0)] if word in self.postings else []
+        if prefix and len(word) >= 2:
+            start = bisect.bisect_left(self.vocabulary, word)
+            for term in self.vocabulary[start:start + PREFIX_EXPANSIONS + 1]:
+                if not term.startswith(word):
+                    break
+                if term != word:
+                    terms.append((term, 0.5))
+        if terms or len(word) < 3:
+            return terms
+
+        grams = trigrams(word)
+        candidates: Set[str] = set()
+        for terms in sorted((self.trigrams[gram] for gram in grams if gram in self.trigrams), key=len):
+            if candidates and len(candidates) + len(terms) > FUZZY_CANDIDATES:
+                break
+            candidates |= terms
+        similar = []
+        for term in candidates:
+            term_grams = trigrams(term)
+            similarity = len(grams & term_grams) / len(grams | term_grams)
+            if similarity >= MIN_SIMILARITY:
+                similar.append((term, similarity * 0.5))
+        return heapq.nlargest(FUZZY_EXPANSIONS, similar, key=lambda item: item[1])
+
+    def score(self, term: str, weight: float, scores: Dict[str, float]):
+        """Adds the term's BM25 contribution to the candidates in `scores`."""
+        postings = self.postings[term]
+        count = len(self.doc_lengths)
+        factor = weight * math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+        average = self.total_length / count
+        lengths = self.doc_lengths
+        if len(postings) <= FULL_SCAN:
+            pairs = postings.items()
+        else:
+            pairs = [(doc, postings[doc]) for doc in scores if doc in postings]
+        for doc, tf in pairs:
+            scores[doc] += factor * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[doc] / average))
+
+    def top_documents(self, term: str) -> List[str]:
+        top = self.top.get(term)
+        if top is None:
+            postings, lengths = self.postings[term], self.doc_lengths
+            average = self.total_length / len(lengths)
+            impacts = [(tf / (tf + K1 * (1 - B + B * lengths[doc] / average)), doc) for doc, tf in postings.items()]
+            top = self.top[term] = [doc for _, doc in heapq.nlargest(TOP_IMPACTS, impacts)]
+        return top
+
+    def upsert(self, entity: MythologicalEntity, sort_vocabulary: bool = True):
+        doc = normalize_name(entity.name)
+        self.remove(doc)
+
+        terms: Counter = Counter()
+        texts = _field_texts(entity)
+        for field, weight in FIELD_WEIGHTS:
+            for text in texts[field]:
+                for term in tokenize(text):
+                    terms[term] += weight
+        for term, tf in terms.items():
+            if term not in self.postings:
+                if sort_vocabulary:
+                    bisect.insort(self.vocabulary, term)
+                if term.isalpha():
+                    for gram in trigrams(term):
+                        self.trigrams[gram].add(term)
+            self.postings[term][doc] = tf
+            self.top.pop(term, None)
+        self.doc_terms[doc] = terms
+        self.doc_lengths[doc] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc]
+        self.entities[doc] = entity
+
+    def remove(self, doc: str):
+        terms = self.doc_terms.pop(doc, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc]
+            self.top.pop(term, None)
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+                for gram in trigrams(term):
+                    self.trigrams[gram].discard(term)
+        self.total_length -= self.doc_lengths.pop(doc)
+        del self.entities[doc]
+
+
+class SearchIndex(CatalogIndex):
+    def search(self, query: str, limit: int = 20) -> List[Tuple[MythologicalEntity, float]]:
+        """Best `limit` entities for `query`, with their scores."""
+        state = self._current()
+        with self._lock:
+            return state.search(query, limit)
+
+    def _build(self, entities: List[MythologicalEntity]) -> _TermIndex:
+        state = _TermIndex()
+        for entity in entities:
+            state.upsert(entity, sort_vocabulary=False)
+        state.vocabulary = sorted(state.postings)
+        for term, postings in state.postings.items():
+            if len(postings) > FULL_SCAN:
+                state.top_documents(term)
+        return state
+
+    def _upsert(self, state: _TermIndex, entity: MythologicalEntity):
+        state.upsert(entity)
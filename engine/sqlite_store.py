@@ -0,0 +1,278 @@
+"""SQLite storage backend for the catalog (STORAGE_BACKEND=sqlite).
+
+Entities are stored as JSON documents keyed by normalized name, next to indexed lookup columns:
+the origin columns, the facet values (entity_facets, what GET /facets counts) and the image
+coverage per style (entity_images, what the backfill queues). Import / export from and to the
+Contract V2 JSON file:
+
+    python -m engine.sqlite_store import src/data/mythology_data.json
+    python -m engine.sqlite_store export src/data/mythology_data.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from engine.domain import MythologicalEntity, validate_entities_json
+from engine.facets import FACETS, facet_values
+from engine.text import normalize_name
+
+# Bumped when a lookup table is added or its content changes: older databases are reindexed on open.
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    name_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    ethnicity TEXT NOT NULL,
+    pantheon TEXT NOT NULL,
+    country TEXT NOT NULL,
+    cultural_region TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_entity_type ON entities (entity_type);
+CREATE INDEX IF NOT EXISTS entities_ethnicity ON entities (ethnicity);
+CREATE INDEX IF NOT EXISTS entities_pantheon ON entities (pantheon);
+CREATE INDEX IF NOT EXISTS entities_country ON entities (country);
+CREATE INDEX IF NOT EXISTS entities_cultural_region ON entities (cultural_region);
+CREATE TABLE IF NOT EXISTS entity_images (
+    name_key TEXT NOT NULL REFERENCES entities (name_key) ON DELETE CASCADE,
+    style_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (name_key, style_id)
+);
+CREATE INDEX IF NOT EXISTS entity_images_style ON entity_images (style_id);
+CREATE TABLE IF NOT EXISTS entity_facets (
+    name_key TEXT NOT NULL REFERENCES entities (name_key) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    value_key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (name_key, field, value_key)
+);
+CREATE INDEX IF NOT EXISTS entity_facets_value ON entity_facets (field, value_key);
+CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, name_key TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+"""
+
+
+class SQLiteStore:
+    """One catalog database. Each thread keeps its own connection, opened on first use.
+
+    Creating the store writes (journal mode, schema): do it once per process, see get_store().
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            with conn:
+                for (document,) in conn.execute("SELECT document FROM entities").fetchall():
+                    _index_lookups(conn, MythologicalEntity.model_validate_json(document))
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Keyed by pid too: a connection inherited through fork() must not be used by the child.
+        conn, pid = getattr(self._local, "conn", None), os.getpid()
+        if conn is None or self._local.pid != pid:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn, self._local.pid = conn, pid
+        return conn
+
+    def upsert(self, entity: MythologicalEntity):
+        self.upsert_many([entity])
+
+    def upsert_many(self, entities: Iterable[MythologicalEntity]):
+        with self._connect() as conn:
+            for entity in entities:
+                _upsert(conn, entity)
+
+    def replace_all(self, entities: Iterable[MythologicalEntity]):
+        """Makes the table hold exactly `entities`, in that order."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entities")
+            # Readers following changes_since() must reload everything after a full replace.
+            conn.execute("DELETE FROM changes")
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            for entity in entities:
+                _upsert(conn, entity)
+
+    def get(self, name: str) -> Optional[MythologicalEntity]:
+        row = self._connect().execute(
+            "SELECT document FROM entities WHERE name_key = ?", (normalize_name(name),)
+        ).fetchone()
+        return MythologicalEntity.model_validate_json(row[0]) if row else None
+
+    def find(self, **filters: str) -> List[MythologicalEntity]:
+        """Indexed lookup on facet values, in catalog order, e.g. find(ethnicity="yoruba", entity_type="Divinity").
+
+        Values match like the FacetIndex filters: accent and case folded, each part of a multi-origin country.
+        """
+        where, params = _facet_filter(filters)
+        rows = self._connect().execute(
+            f"SELECT document FROM entities WHERE {where} ORDER BY rowid", params
+        ).fetchall()
+        return [MythologicalEntity.model_validate_json(row[0]) for row in rows]
+
+    def facet_counts(self, filters: Dict[str, str]) -> Tuple[int, List[Tuple[str, str, int]]]:
+        """(matching entities, [(field, value, count)]) of every facet value among the entities matching `filters`.
+
+        The value shown is the spelling of its first entity in catalog order.
+        """
+        where, params = _facet_filter(filters, "e.name_key")
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM entities e WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(
+            "SELECT f.field, f.value, COUNT(*), MIN(e.rowid) FROM entity_facets f"
+            " JOIN entities e ON e.name_key = f.name_key"
+            f" WHERE {where} GROUP BY f.field, f.value_key",
+            params,
+        ).fetchall()
+        return total, [(field, value, count) for field, value, count, _ in rows]
+
+    def missing_images(self, style_id: str) -> List[str]:
+        """Names of the entities without an image for style_id, in catalog order."""
+        rows = self._connect().execute(
+            "SELECT name FROM entities WHERE name_key NOT IN"
+            " (SELECT name_key FROM entity_images WHERE style_id = ?) ORDER BY rowid",
+            (style_id,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def load_all(self) -> List[MythologicalEntity]:
+        rows = self._connect().execute("SELECT document FROM entities ORDER BY rowid").fetchall()
+        # One validation pass over a JSON array is cheaper than one call per row.
+        return validate_entities_json(("[" + ",".join(row[0] for row in rows) + "]").encode())
+
+    def cursor(self) -> Tuple[int, int]:
+        """(generation, last change seq): where a reader of changes_since() currently stands."""
+        return _cursor(self._connect())
+
+    def changes_since(self, cursor: Tuple[int, int]) -> Tuple[Optional[List[MythologicalEntity]], Tuple[int, int]]:
+        """Entities upserted after `cursor`, or None when the table was replaced meanwhile.
+
+        Plain SELECTs: a reader never waits for a writer holding the database (WAL).
+        """
+        conn = self._connect()
+        current = _cursor(conn)
+        if current[0] != cursor[0]:
+            return None, current
+        if current[1] == cursor[1]:
+            return [], current
+        rows = conn.execute(
+            "SELECT document FROM entities WHERE name_key IN"
+            " (SELECT name_key FROM changes WHERE seq > ? AND seq <= ?)",
+            (cursor[1], current[1]),
+        ).fetchall()
+        return [MythologicalEntity.model_validate_json(row[0]) for row in rows], current
+
+    def import_json(self, json_path: Path) -> int:
+        with open(json_path, "r", encoding="utf-8") as f:
+            entities = [MythologicalEntity(**item) for item in json.load(f)]
+        self.replace_all(entities)
+        return len(entities)
+
+    def export_json(self, json_path: Path) -> int:
+        entities = self.load_all()
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([entity.model_dump() for entity in entities], f, indent=2, ensure_ascii=False)
+        return len(entities)
+
+
+@lru_cache(maxsize=None)
+def get_store(path: Path) -> SQLiteStore:
+    """The process-wide store of `path`: the schema is set up once, not on every call."""
+    return SQLiteStore(path)
+
+
+def _facet_filter(filters: Dict[str, str], column: str = "name_key") -> Tuple[str, tuple]:
+    """SQL condition on `column` (and its parameters) matching the entities of every non-empty {field: value}."""
+    unknown = set(filters) - set(FACETS)
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {sorted(unknown)}")
+    filters = {field: value for field, value in filters.items() if value}
+    where = " AND ".join(
+        f"{column} IN (SELECT name_key FROM entity_facets WHERE field = ? AND value_key = ?)" for _ in filters
+    )
+    params = tuple(param for field, value in filters.items() for param in (field, normalize_name(value)))
+    return where or "1", params
+
+
+def _cursor(conn: sqlite3.Connection) -> Tuple[int, int]:
+    # One statement, so both values come from the same snapshot.
+    return conn.execute(
+        "SELECT (SELECT value FROM meta WHERE key = 'generation'), (SELECT COALESCE(MAX(seq), 0) FROM changes)"
+    ).fetchone()
+
+
+def _upsert(conn: sqlite3.Connection, entity: MythologicalEntity):
+    name_key = normalize_name(entity.name)
+    origin = entity.origin
+    conn.execute(
+        "INSERT INTO entities (name_key, name, entity_type, ethnicity, pantheon, country, cultural_region, document)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (name_key) DO UPDATE SET name = excluded.name, entity_type = excluded.entity_type,"
+        " ethnicity = excluded.ethnicity, pantheon = excluded.pantheon, country = excluded.country,"
+        " cultural_region = excluded.cultural_region, document = excluded.document",
+        (
+            name_key,
+            entity.name,
+            entity.entity_type,
+            origin.ethnicity or "",
+            origin.pantheon,
+            origin.country,
+            origin.cultural_region,
+            entity.model_dump_json(),
+        ),
+    )
+    _index_lookups(conn, entity)
+    # Readers only need the latest change of each entity, so the table stays one row per entity.
+    seq = conn.execute("INSERT INTO changes (name_key) VALUES (?)", (name_key,)).lastrowid
+    conn.execute("DELETE FROM changes WHERE name_key = ? AND seq < ?", (name_key, seq))
+
+
+def _index_lookups(conn: sqlite3.Connection, entity: MythologicalEntity):
+    """Rewrites the entity_images and entity_facets rows of `entity`."""
+    name_key = normalize_name(entity.name)
+    images = dict((entity.rendering or {}).get("images") or {})
+    if entity.appearance.imageUrl.strip() and not images.get("photoreal"):
+        images["photoreal"] = entity.appearance.imageUrl
+    conn.execute("DELETE FROM entity_images WHERE name_key = ?", (name_key,))
+    conn.executemany(
+        "INSERT INTO entity_images (name_key, style_id, url) VALUES (?, ?, ?)",
+        [(name_key, style_id, url) for style_id, url in images.items() if url],
+    )
+    conn.execute("DELETE FROM entity_facets WHERE name_key = ?", (name_key,))
+    conn.executemany(
+        "INSERT OR IGNORE INTO entity_facets (name_key, field, value_key, value) VALUES (?, ?, ?, ?)",
+        [(name_key, field, normalize_name(value), value) for field in FACETS for value in facet_values(entity, field)],
+    )
+
+
+if __name__ == "__main__":
+    from engine.loader import DATA_PATH, SQLITE_PATH
+
+    parser = argparse.ArgumentParser(description="Import / export the catalog between JSON and SQLite.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("json_path", nargs="?", type=Path, default=DATA_PATH)
+    parser.add_argument("--db", type=Path, default=SQLITE_PATH)
+    args = parser.parse_args()
+
+    store = SQLiteStore(args.db)
+    if args.command == "import":
+        print(f"Imported {store.import_json(args.json_path)} entities into {args.db}")
+    else:
+        print(f"Exported {store.export_json(args.json_path)} entities to {args.json_path}")
@@ -0,0 +1,121 @@
+"""In-memory, precompressed serving of the Vite build (dist/) and its SPA fallback.
+
+Compressible files are gzip- and (when the brotli package is installed) brotli-encoded once, then
+served from memory with a strong ETag per encoding; other files up to MEMORY_LIMIT are kept in
+memory too. Vite's content-hashed files under assets/ are cached by clients for a year, everything
+else is revalidated (ETag / 304).
+"""
+import gzip
+import hashlib
+import mimetypes
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+MIN_COMPRESS_SIZE = 1024
+MEMORY_LIMIT = 256 * 1024
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class _Entry:
+    def __init__(self, path: Path, relative: str):
+        self.path = path
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.cache_control = IMMUTABLE if relative.startswith("assets/") else REVALIDATE
+        self.bodies: Dict[str, bytes] = {}
+        self.etag = ""
+
+        size = path.stat().st_size
+        compressible = self.media_type.startswith(COMPRESSIBLE_TYPES) and size >= MIN_COMPRESS_SIZE
+        if not compressible and size > MEMORY_LIMIT:
+            return  # served from disk
+
+        data = path.read_bytes()
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.bodies["identity"] = data
+        if compressible:
+            self.bodies["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli:
+                self.bodies["br"] = brotli.compress(data, quality=11)
+
+
+class StaticBundle:
+    def __init__(self, directory: Path, fallback: str = "index.html"):
+        self.directory = Path(directory)
+        self.fallback = fallback
+        self._files = {
+            path.relative_to(self.directory).as_posix()
+            for path in self.directory.rglob("*")
+            if path.is_file() and not path.name.endswith((".gz", ".br"))
+        }
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Compresses every file ahead of the first requests (the API does it in its warm-up)."""
+        for relative in self._files:
+            self._entry(relative)
+
+    def response(self, relative: str, accept_encoding: str = "", if_none_match: str = "") -> Response:
+        """The file at `relative`, or the SPA fallback for unknown paths outside assets/."""
+        if relative not in self._files:
+            if relative.startswith("assets/"):
+                return Response(status_code=404)
+            relative = self.fallback
+
+        entry = self._entry(relative)
+        if not entry.bodies:
+            return FileResponse(entry.path, headers={"Cache-Control": entry.cache_control})
+
+        encoding = _negotiate(accept_encoding, entry.bodies)
+        etag = f'"{entry.etag}"' if encoding == "identity" else f'"{entry.etag}-{encoding}"'
+        headers = {"ETag": etag, "Cache-Control": entry.cache_control, "Vary": "Accept-Encoding"}
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(entry.bodies[encoding], media_type=entry.media_type, headers=headers)
+
+    def _entry(self, relative: str) -> _Entry:
+        entry = self._entries.get(relative)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(relative)
+                if entry is None:
+                    entry = self._entries[relative] = _Entry(self.directory / relative, relative)
+        return entry
+
+
+def _negotiate(accept_encoding: str, bodies: Dict[str, bytes]) -> str:
+    """Best available encoding accepted by the client: br, then gzip, then identity."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = _quality(params)
+        if name and quality is not None:
+            accepted[name] = quality
+    for encoding in ("br", "gzip"):
+        if encoding in bodies and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _quality(params: str) -> Optional[float]:
+    params = params.strip()
+    if not params.startswith("q="):
+        return 1.0
+    try:
+        return float(params[2:])
+    except ValueError:
+        return None
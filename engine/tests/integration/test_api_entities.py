@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import engine.api
+from engine.api import app, orchestrator
+
+client = TestClient(app)
+
+
+def test_cursor_pagination_walks_the_whole_filtered_catalog():
+    names, cursor = [], ""
+    while True:
+        page = client.get("/entities", params={"ethnicity": "yoruba", "limit": 5, "cursor": cursor}).json()
+        names += [item["name"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [entity.name for entity in orchestrator.data if entity.origin.ethnicity == "Yoruba"]
+    assert names == expected
+    assert page["total"] == len(expected) > 5
+
+
+def test_fields_projection_keeps_the_document_nesting():
+    page = client.get("/entities", params={"limit": 2, "fields": "name,category,appearance.imageUrl"}).json()
+
+    assert set(page["items"][0]) == {"name", "category", "appearance"}
+    assert set(page["items"][0]["appearance"]) == {"imageUrl"}
+
+
+def test_single_entity_by_normalized_name_with_etag():
+    response = client.get("/entities/SHANGO", params={"fields": "name,origin.ethnicity"})
+
+    assert response.json() == {"name": "Shango", "origin": {"ethnicity": "Yoruba"}}
+    etag = response.headers["etag"]
+    assert client.get("/entities/shango", params={"fields": "name,origin.ethnicity"}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/entities/nobody").status_code == 404
+
+
+def test_cached_payload_changes_with_the_dataset():
+    first = client.get("/entities/shango")
+    shango = orchestrator.find_entity("shango")
+    category = shango.category
+    try:
+        shango.category = "Edited"
+        orchestrator.mark_changed(shango)
+        second = client.get("/entities/shango")
+    finally:
+        shango.category = category
+        orchestrator.mark_changed(shango)
+
+    assert second.json()["category"] == "Edited"
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_invalid_cursor_is_rejected():
+    assert client.get("/entities", params={"cursor": "bm9ib2R5"}).status_code == 400
+
+
+def test_facets_count_under_the_current_filter():
+    facets = client.get("/facets", params={"ethnicity": "yoruba"}).json()
+    page = client.get("/entities", params={"ethnicity": "yoruba", "domains": "thunder"}).json()
+
+    thunder = next(item for item in facets["facets"]["domains"] if item["value"] == "Thunder")
+    assert facets["total"] == len([entity for entity in orchestrator.data if entity.origin.ethnicity == "Yoruba"])
+    assert page["total"] == thunder["count"]
+
+
+def test_lineage_endpoint_validates_its_parameters():
+    response = client.get("/lineage/shango", params={"direction": "ancestors", "depth": 2})
+
+    assert response.json()["name"] == "Shango"
+    assert "Oduduwa" in [node["name"] for node in response.json()["nodes"]]
+    assert client.get("/lineage/shango", params={"direction": "sideways"}).status_code == 400
+    assert client.get("/lineage/shango", params={"depth": 0}).status_code == 422
+    assert client.get("/lineage/nobody").status_code == 404
+
+
+def test_lineage_problems_are_admin_only():
+    with patch.object(engine.api, "ADMIN_TOKEN", "secret"):
+        assert client.get("/admin/lineage").status_code == 403
+        problems = client.get("/admin/lineage", headers={"X-Admin-Token": "secret"}).json()
+
+    assert problems["unresolved"]["Mami Wata"] == ["Olokun"]
+    assert problems["cycles"] == []
+
+
+def test_geo_summary_is_cacheable_and_drills_down():
+    response = client.get("/geo/summary")
+    etag = response.headers["etag"]
+
+    assert "Nigeria" in [row["country"] for row in response.json()["countries"]]
+    assert client.get("/geo/summary", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/geo/nigeria").json()["country"] == "Nigeria"
+    assert client.get("/geo/atlantis").status_code == 404
@@ -3,23 +3,27 @@ from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 import sys
 import os
+import re
 from google.api_core.exceptions import ResourceExhausted
 
 # Add engine directory to sys.path so we can import api
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from api import app
+from engine.backends import VertexBackend
 
 client = TestClient(app)
 
 @pytest.fixture
-def mock_vertex():
+def mock_vertex(tmp_path):
     """Mocks Vertex AI initialization and ImageModel."""
-    with patch("api.vertexai") as mock_v, \
-         patch("api.ImageGenerationModel") as mock_model_class:
+    with patch("vertexai.init") as mock_init, \
+         patch("vertexai.preview.vision_models.ImageGenerationModel") as mock_model_class, \
+         patch("engine.generation.get_backend", return_value=VertexBackend()), \
+         patch("engine.generation.GENERATED_DIR", tmp_path):
         
         # Mock vertexai.init
-        mock_v.init.return_value = None
+        mock_init.return_value = None
         
         # Mock the model instance and generate_images
         mock_model_instance = MagicMock()
@@ -29,8 +33,8 @@ def mock_vertex():
 
 @pytest.fixture
 def mock_loader():
-    """Mocks the save_mythology_data function to prevent writing to disk."""
-    with patch("api.save_mythology_data") as mock_save:
+    """Mocks the save_entity function to prevent writing to disk."""
+    with patch("engine.generation.save_entity") as mock_save, patch("engine.generation.schedule_variants"):
         yield mock_save
 
 def test_generate_image_success(mock_vertex, mock_loader):
@@ -40,6 +44,7 @@ def test_generate_image_success(mock_vertex, mock_loader):
     """
     # Setup the mock response
     mock_image = MagicMock()
+    mock_image.save.side_effect = lambda location, **kwargs: open(location, "wb").write(b"fake png")
     
     # Create a proper response object mock with .images attribute
     mock_response = MagicMock()
@@ -58,8 +63,8 @@ def test_generate_image_success(mock_vertex, mock_loader):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "success"
-    # The URL should look like /generated_images/shango.png
-    assert "/generated_images/shango.png" in data["image_url"]
+    # The URL should look like /generated_images/<sha256 prefix>.png
+    assert re.match(r"^/generated_images/[0-9a-f]{32}\.png$", data["image_url"])
     
     # Verify Vertex AI was called correctly
     mock_vertex.generate_images.assert_called_once()
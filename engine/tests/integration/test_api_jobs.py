@@ -0,0 +1,39 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GCP_SERVICE_ACCOUNT_JSON", "{}")
+
+from engine.api import app
+from engine.jobs import JobQueue
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    with patch("engine.api.get_job_queue", return_value=queue):
+        yield queue
+
+
+def test_submit_job_returns_pending_job_immediately(job_queue):
+    response = client.post("/jobs", json={"entity_name": "shango", "style_id": "photoreal"})
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert job["entity_name"] == "Shango"
+    assert job["prompt"]
+
+    status = client.get(f"/jobs/{job['id']}")
+    assert status.status_code == 200
+    assert status.json()["status"] == "pending"
+
+
+def test_submit_job_validates_entity_and_prompt(job_queue):
+    assert client.post("/jobs", json={"entity_name": "Nobody"}).status_code == 404
+    assert client.post("/jobs", json={"entity_name": "Shango", "style_id": "cyberpunk"}).status_code == 400
+    assert client.get("/jobs/unknown").status_code == 404
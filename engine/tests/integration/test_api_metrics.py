@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from engine.api import app
+from engine.backends import LocalBackend
+
+client = TestClient(app)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def generate(tmp_path, backend):
+    with patch("engine.generation.get_backend", return_value=backend), \
+         patch("engine.generation.GENERATED_DIR", tmp_path), \
+         patch("engine.generation.save_entity"), \
+         patch("engine.generation.schedule_variants"):
+        return client.post("/generate", json={"entity_name": "Shango", "style_id": "regional_or_ethnic"})
+
+
+def test_generate_records_each_stage_and_failures(tmp_path):
+    stages = ("prompt", "model", "imagen", "image_save", "persist")
+    before = {stage: sample("lesprit_generate_stage_duration_seconds_count", stage=stage) for stage in stages}
+    safety = sample("lesprit_generate_failures_total", reason="safety_filter")
+    quota = sample("lesprit_generate_failures_total", reason="quota_exceeded")
+
+    assert generate(tmp_path, LocalBackend()).status_code == 200
+    assert generate(tmp_path, LocalBackend(safety_rate=1)).status_code == 502
+    assert generate(tmp_path, LocalBackend(quota_rate=1)).status_code == 429
+
+    assert sample("lesprit_generate_stage_duration_seconds_count", stage="imagen") == before["imagen"] + 3
+    assert sample("lesprit_generate_stage_duration_seconds_count", stage="persist") == before["persist"] + 1
+    assert all(sample("lesprit_generate_stage_duration_seconds_count", stage=stage) > before[stage] for stage in stages)
+    assert sample("lesprit_generate_failures_total", reason="safety_filter") == safety + 1
+    assert sample("lesprit_generate_failures_total", reason="quota_exceeded") == quota + 1
+    assert sample("lesprit_generations_in_flight") == 0
+
+
+def test_metrics_endpoint_labels_routes_by_template():
+    client.get("/preview/Shango")
+
+    body = client.get("/metrics").text
+
+    assert 'route="/preview/{entity_name}"' in body
+    assert "lesprit_dataset_entities" in body
+    assert sample("lesprit_missing_images") > 0
+
+
+def test_responses_carry_the_stage_durations():
+    timing = client.get("/preview/Shango").headers["server-timing"]
+
+    assert [part.split(";")[0] for part in timing.split(", ")] == ["sync", "lookup", "prompt", "total"]
+
+
+def test_profiling_needs_the_admin_token_and_returns_collapsed_stacks(tmp_path):
+    assert client.get("/preview/Shango", headers={"X-Profile": "1"}).status_code == 403
+
+    slow = LocalBackend(latency=0.05)
+    with patch("engine.api.ADMIN_TOKEN", "secret"), \
+         patch("engine.generation.get_backend", return_value=slow), \
+         patch("engine.generation.GENERATED_DIR", tmp_path), \
+         patch("engine.generation.save_entity"), \
+         patch("engine.generation.schedule_variants"):
+        response = client.post(
+            "/generate?profile=1",
+            json={"entity_name": "Shango", "style_id": "regional_or_ethnic"},
+            headers={"X-Admin-Token": "secret"},
+        )
+
+    assert response.headers["x-profiled-status"] == "200"
+    stacks = [line.rsplit(" ", 1)[0] for line in response.text.splitlines()]
+    assert any("engine.api:generate_image;" in stack and "engine.backends:generate_images" in stack for stack in stacks)
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("GCP_SERVICE_ACCOUNT_JSON", "{}")
+
+import engine.api
+from engine.api import app
+from engine.backends import LocalBackend
+
+client = TestClient(app)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def test_importing_the_api_does_not_load_the_vertex_sdk():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, engine.api; print('vertexai' in sys.modules, 'google.oauth2' in sys.modules)"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_ready_flips_after_warm_up_while_health_answers_throughout():
+    with patch.object(engine.api, "_ready", threading.Event()), \
+         patch("engine.api.get_backend", return_value=LocalBackend()):
+        assert client.get("/health").status_code == 200
+        assert client.get("/health").json()["ready"] is False
+        assert client.get("/ready").status_code == 503
+
+        engine.api._warm_up()
+
+        ready = client.get("/ready").json()
+        assert ready["status"] == "ready"
+        assert ready["stats"]["total_entities"] > 0
+        assert client.get("/health").json()["ready"] is True
+
+
+def test_warm_up_retries_until_dataset_and_backend_are_up():
+    backend = LocalBackend()
+    failures = {"reload": [OSError("disk not mounted")] * 3, "warm_up": [RuntimeError("no credentials")]}
+    reload = engine.api.orchestrator.reload
+
+    def flaky(step, call):
+        def wrapper():
+            if failures[step]:
+                raise failures[step].pop()
+            return call()
+        return wrapper
+
+    ready = threading.Event()
+    with patch.object(engine.api, "_ready", ready), \
+         patch.object(engine.api, "_dataset_loaded", threading.Event()), \
+         patch.object(engine.api, "WARM_UP_RETRY_SECONDS", 0), \
+         patch.object(engine.api.orchestrator, "reload", flaky("reload", reload)), \
+         patch.object(backend, "warm_up", flaky("warm_up", backend.warm_up)), \
+         patch("engine.api.get_backend", return_value=backend):
+        assert engine.api._load_dataset() is False
+        assert client.get("/entities/shango").status_code == 503
+
+        engine.api._warm_up()
+
+        assert failures == {"reload": [], "warm_up": []}
+        assert ready.is_set()
+
+
+def test_ready_stats_follow_dataset_changes():
+    with patch.object(engine.api, "_ready", threading.Event()) as ready:
+        ready.set()
+        before = client.get("/ready").json()["stats"]["missing_images"]
+        entity = next(entity for entity in engine.api.orchestrator.data if entity.appearance.imageUrl.strip())
+        url = entity.appearance.imageUrl
+        try:
+            entity.appearance.imageUrl = ""
+            engine.api.orchestrator.mark_changed(entity)
+            after = client.get("/ready").json()["stats"]["missing_images"]
+        finally:
+            entity.appearance.imageUrl = url
+            engine.api.orchestrator.mark_changed(entity)
+
+    assert after == before + 1
@@ -2,10 +2,13 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 import os
+import re
+from pathlib import Path
 
 os.environ.setdefault("GCP_SERVICE_ACCOUNT_JSON", "{}")
 
-from engine.api import app
+from engine.api import _load_dataset, app
+from engine.backends import VertexBackend
 from engine.domain import MythologicalEntity, Appearance
 
 client = TestClient(app)
@@ -14,18 +17,28 @@ client = TestClient(app)
 # Mocks & Fixtures
 # -----------------------------------------------------------------------------
 
+CONTENT_URL = re.compile(r"^/generated_images/[0-9a-f]{32}\.png$")
+
+
+def write_fake_image(location, **kwargs):
+    Path(location).write_bytes(b"fake png")
+
+
 @pytest.fixture
-def mock_vertex():
+def mock_vertex(tmp_path):
     """Mocks Vertex AI initialization and ImageModel."""
-    with patch("engine.api.vertexai") as mock_v, \
-         patch("engine.api.ImageGenerationModel") as mock_model_class:
+    with patch("vertexai.init") as mock_init, \
+         patch("vertexai.preview.vision_models.ImageGenerationModel") as mock_model_class, \
+         patch("engine.generation.get_backend", return_value=VertexBackend()), \
+         patch("engine.generation.GENERATED_DIR", tmp_path):
         
-        mock_v.init.return_value = None
+        mock_init.return_value = None
         mock_model_instance = MagicMock()
         mock_model_class.from_pretrained.return_value = mock_model_instance
         
         # Setup default successful response
         mock_image = MagicMock()
+        mock_image.save.side_effect = write_fake_image
         mock_response = MagicMock()
         mock_response.images = [mock_image]
         mock_model_instance.generate_images.return_value = mock_response
@@ -34,8 +47,8 @@ def mock_vertex():
 
 @pytest.fixture
 def mock_loader():
-    """Mocks the save_mythology_data function."""
-    with patch("engine.api.save_mythology_data") as mock_save:
+    """Mocks the save_entity function."""
+    with patch("engine.generation.save_entity") as mock_save, patch("engine.generation.schedule_variants"):
         yield mock_save
 
 @pytest.fixture
@@ -152,6 +165,9 @@ def mock_orchestrator_data():
         }
     )
 
+    # Load the real dataset first, or the first request would load it over the patched data
+    _load_dataset()
+
     # Patch the orchestrator's data directly
     with patch(
         "engine.api.orchestrator.data",
@@ -245,7 +261,7 @@ def test_generate_unknown_style_error(mock_vertex, mock_orchestrator_data):
 
 def test_generate_photoreal_persistence(mock_vertex, mock_loader, mock_orchestrator_data):
     """
-    Test 6: Generate 'photoreal' saves as 'name.png' and updates legacy field.
+    Test 6: Generate 'photoreal' saves under the content hash and updates legacy field.
     """
     payload = {"entity_name": "CanonEntity", "style_id": "photoreal"}
     response = client.post("/generate", json=payload)
@@ -255,12 +271,12 @@ def test_generate_photoreal_persistence(mock_vertex, mock_loader, mock_orchestra
     
     # Check Response
     image_url = data["image_url"]
-    assert image_url.endswith("/generated_images/canonentity.png")
+    assert CONTENT_URL.match(image_url)
     
     # Check Persistence (Legacy Sync)
-    # We inspect the arguments passed to save_mythology_data
-    saved_data = mock_loader.call_args[0][0] # First arg of first call
-    target = next(e for e in saved_data if e.name == "CanonEntity")
+    # We inspect the entity passed to save_entity
+    target = mock_loader.call_args[0][0] # First arg of first call
+    assert target.name == "CanonEntity"
     
     # 1. Updates rendering
     assert target.rendering["images"]["photoreal"] == image_url
@@ -269,7 +285,7 @@ def test_generate_photoreal_persistence(mock_vertex, mock_loader, mock_orchestra
 
 def test_generate_style_persistence(mock_vertex, mock_loader, mock_orchestrator_data):
     """
-    Test 7: Generate 'manga' saves as 'name_manga.png' and DOES NOT touch legacy field.
+    Test 7: Generate 'manga' saves under the content hash and DOES NOT touch legacy field.
     """
     payload = {"entity_name": "MangaEntity", "style_id": "manga"}
     response = client.post("/generate", json=payload)
@@ -279,11 +295,11 @@ def test_generate_style_persistence(mock_vertex, mock_loader, mock_orchestrator_
     
     # Check Response
     image_url = data["image_url"]
-    assert image_url.endswith("/generated_images/mangaentity_manga.png")
+    assert CONTENT_URL.match(image_url)
     
     # Check Persistence
-    saved_data = mock_loader.call_args[0][0]
-    target = next(e for e in saved_data if e.name == "MangaEntity")
+    target = mock_loader.call_args[0][0]
+    assert target.name == "MangaEntity"
     
     # 1. Updates rendering
     assert target.rendering["images"]["manga"] == image_url
@@ -297,14 +313,14 @@ def test_generate_regional_or_ethnic_uses_dynamic_prompt_and_persists(mock_verte
 
     assert response.status_code == 200
     data = response.json()
-    assert data["image_url"].endswith("/generated_images/shango_regional_or_ethnic.png")
+    assert CONTENT_URL.match(data["image_url"])
     assert "Classical Yoruba sacred sculpture" in data["prompt_used"]
     assert "Double-headed axe" in data["prompt_used"]
     assert "LEGACY REGIONAL PROMPT SHOULD BE IGNORED" not in data["prompt_used"]
     assert "Classical Yoruba sacred sculpture" in mock_vertex.generate_images.call_args.kwargs["prompt"]
 
-    saved_data = mock_loader.call_args[0][0]
-    target = next(e for e in saved_data if e.name == "Shango")
+    target = mock_loader.call_args[0][0]
+    assert target.name == "Shango"
     assert target.rendering["images"]["regional_or_ethnic"] == data["image_url"]
     assert target.appearance.imageUrl == ""
 
@@ -323,3 +339,16 @@ def test_generate_regional_or_ethnic_empty_ethnicity_returns_400(mock_vertex, mo
     assert response.status_code == 400
     assert "No prompt available" in response.json()["detail"]
     mock_vertex.generate_images.assert_not_called()
+
+
+def test_generate_with_local_backend_writes_a_real_png(mock_loader, mock_orchestrator_data, tmp_path):
+    from engine.backends import LocalBackend
+
+    with patch("engine.generation.get_backend", return_value=LocalBackend(size=(4, 4))), \
+         patch("engine.generation.GENERATED_DIR", tmp_path):
+        response = client.post("/generate", json={"entity_name": "MangaEntity", "style_id": "manga"})
+
+    assert response.status_code == 200
+    filename = response.json()["image_url"].rsplit("/", 1)[1]
+    assert (tmp_path / filename).read_bytes().startswith(b"\x89PNG")
+    mock_loader.assert_called_once()
@@ -1,8 +1,12 @@
 import requests
-import json
 import os
 import sys
 import time
+from pathlib import Path
+
+# Repo root on sys.path so the engine loader can replay the change log.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from engine.loader import load_mythology_data
 
 BASE_URL = "http://127.0.0.1:7860"
 DATA_FILE = "src/data/mythology_data.json"
@@ -72,14 +76,14 @@ def verify_persistence(entity_name, style_id, expected_url):
     if not os.path.exists(DATA_FILE):
         fail(f"Data file not found at {DATA_FILE}")
     
-    with open(DATA_FILE, "r") as f:
-        data = json.load(f)
+    # Recent saves may still sit in the change log, so read through the loader.
+    data = [e.model_dump() for e in load_mythology_data()]
     
     entity = next((e for e in data if e["name"] == entity_name), None)
     if not entity:
         fail(f"Entity {entity_name} not found in JSON")
     
-    rendering = entity.get("rendering", {})
+    rendering = entity.get("rendering") or {}
     images = rendering.get("images", {})
     saved_url = images.get(style_id)
     
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from scripts import normalize_data
+from scripts.normalize_data import cache_path, iter_records, normalize_file
+
+RECORDS = [
+    {"name": "Shango", "entity_type": "Divinity", "appearance": {"image_generation_prompt": "Thunder, [axe], \"oshe\""}},
+    {"name": "Mami Wata", "entity_type": "Creature", "story": {"description": "Éclat é \\ des eaux"}},
+    {"name": "Sundiata", "entity_type": "Hero", "relations": {"parents": ["Maghan", "Sogolon"]}},
+]
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_records_are_streamed_across_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(normalize_data, "READ_CHUNK_CHARS", 7)
+    path = write(tmp_path / "data.json", json.dumps(RECORDS, indent=2, ensure_ascii=False))
+
+    assert [json.loads(text) for text in iter_records(path)] == RECORDS
+
+
+@pytest.mark.parametrize("text", [
+    '[{"a": 1} {"b": 2}]',
+    '[{"a": 1},,, {"b": 2},]',
+    '[{"a": 1},]',
+    '[{"a": 1}',
+    '[{"a": 1}] trailing',
+    '{"a": 1}',
+])
+def test_malformed_arrays_are_rejected(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(iter_records(write(tmp_path / "data.json", text)))
+
+
+def test_a_syntax_error_fails_without_buffering_the_rest(tmp_path, monkeypatch):
+    monkeypatch.setattr(normalize_data, "READ_CHUNK_CHARS", 64)
+    path = write(tmp_path / "data.json", '[{"a": 1}, {"b" 2}, ' + ", ".join(['{"c": 3}'] * 20_000) + "]")
+    read = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        file = real_open(*args, **kwargs)
+        real_read = file.read
+        file.read = lambda size=-1: read.append(size) or real_read(size)
+        return file
+
+    monkeypatch.setattr(normalize_data, "open", tracking_open, raising=False)
+    with pytest.raises(ValueError, match="character 16"):
+        list(iter_records(path))
+    assert len(read) <= 2
+
+
+def test_dry_run_then_cached_runs_skip_normalized_records(tmp_path, monkeypatch):
+    path = write(tmp_path / "data.json", json.dumps(RECORDS, indent=2, ensure_ascii=False))
+    original = path.read_bytes()
+
+    summary, examples = normalize_file(path, dry_run=True, workers=1)
+    assert summary["changed"] == 3
+    assert examples == ["Shango", "Mami Wata", "Sundiata"]
+    assert path.read_bytes() == original
+    assert not cache_path(path).exists()
+
+    assert normalize_file(path, dry_run=False, workers=1)[0]["changed"] == 3
+    normalized = json.loads(path.read_text(encoding="utf-8"))
+    assert [len(entity["rendering"]["prompt_variants"]) for entity in normalized] == [4, 4, 4]
+
+    calls = []
+    monkeypatch.setattr(normalize_data, "normalize_entity", lambda entity: calls.append(entity) or entity)
+    summary, _ = normalize_file(path, dry_run=False, workers=1)
+    assert summary["changed"] == 0
+    assert calls == []
+
+
+def test_a_cache_of_another_normalizer_version_is_ignored(tmp_path):
+    path = write(tmp_path / "data.json", json.dumps(RECORDS))
+    normalize_file(path, dry_run=False, workers=1)
+    hashes = cache_path(path).read_text(encoding="utf-8").splitlines()[1:]
+    assert normalize_data.load_cache(cache_path(path)) == set(hashes)
+
+    cache_path(path).write_text("\n".join(["1:0123456789abcdef"] + hashes) + "\n", encoding="utf-8")
+    assert normalize_data.load_cache(cache_path(path)) == set()
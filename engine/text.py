@@ -0,0 +1,8 @@
+import unicodedata
+
+
+def normalize_name(name: str) -> str:
+    """Folds case, compatibility forms and accents: 'Ọ̀ṣun' -> 'osun'."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return unicodedata.normalize("NFKC", stripped.casefold()).strip()
@@ -0,0 +1,237 @@
+"""Checks every entity of the dataset against MythologicalEntity and the CONTRACT_V2 rules.
+
+Issues are reported with their JSON path ($[index].field...), all of them rather than the first.
+Errors fail the run. Warnings, like an ethnicity the style matrix does not map (no regional style
+then), are only counted unless --warnings is given. Results are cached per entity content hash,
+so after an edit only the changed entities are checked again. Large datasets are checked in a
+process pool:
+
+    python -m engine.validate [--path FILE] [--warnings] [--workers N]
+"""
+import argparse
+import hashlib
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from engine.domain import MythologicalEntity
+from engine.loader import DATA_PATH
+from engine.prompt_builder import STYLE_MATRIX_PATH
+from engine.text import normalize_name
+
+ENTITY_TYPES = ("Divinity", "Hero", "Creature")
+STYLE_IDS = ("photoreal", "regional_or_ethnic", "manga", "comic_marvel", "modern_african_painting")
+# Below this many unchecked entities, a pool costs more than it saves.
+POOL_MIN_ENTITIES = 2_000
+BATCH_SIZE = 500
+# Bump when the rules change: cached results of older rules are then ignored.
+RULES_VERSION = 1
+
+
+def _is_text_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+# (check, description) of a field value
+_LIST = (_is_text_list, "a list of strings")
+_TEXT = (lambda value: isinstance(value, str), "a string")
+_HABITAT = (lambda value: isinstance(value, str) or _is_text_list(value), "a string or a list of strings")
+_THREAT_LEVEL = (lambda value: value in ("low", "medium", "high", "mythic"), "one of low, medium, high, mythic")
+_GENEALOGY = {"parents": _LIST, "consorts": _LIST, "descendants": _LIST, "lineage_notes": _TEXT}
+# Known fields of each type block and their shape; other fields are allowed (CONTRACT_V2 §4).
+TYPE_BLOCKS: Dict[str, Dict[str, Any]] = {
+    "divinity": {
+        "domains": _LIST, "symbols": _LIST, "power_objects": _LIST, "symbolic_animals": _LIST,
+        "cult": {"rituals": _LIST, "offerings": _LIST, "taboos": _LIST, "places": _LIST, "festivals": _LIST},
+        "genealogy": _GENEALOGY,
+    },
+    "hero": {
+        "titles": _LIST, "achievements": _LIST, "quests": _LIST, "allies": _LIST, "enemies": _LIST,
+        "weapons_or_artifacts": _LIST, "legacy": _TEXT, "historical_context": _TEXT, "genealogy": _GENEALOGY,
+    },
+    "creature": {
+        "habitat": _HABITAT, "powers": _LIST, "strengths": _LIST, "weaknesses": _LIST, "diet": _TEXT,
+        "size": _TEXT, "appearance_notes": _TEXT,
+        "encounter": {"omens": _LIST, "rules_to_survive": _LIST, "known_sightings": _LIST},
+        "threat_level": _THREAT_LEVEL,
+    },
+}
+
+Issue = Dict[str, str]  # {"level": "error" | "warning", "path": relative to the entity, "message"}
+
+
+def _path(loc) -> str:
+    return "".join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in loc)
+
+
+def _error(path: str, message: str, level: str = "error") -> Issue:
+    return {"level": level, "path": path, "message": message}
+
+
+def _check_shape(block: Any, shape: Dict[str, Any], path: str) -> List[Issue]:
+    if not isinstance(block, dict):
+        return [_error(path, "must be an object")]
+    issues = []
+    for field, value in block.items():
+        expected = shape.get(field)
+        if isinstance(expected, dict):
+            issues += _check_shape(value, expected, f"{path}.{field}")
+        elif expected is not None and not expected[0](value):
+            issues.append(_error(f"{path}.{field}", f"must be {expected[1]}"))
+    return issues
+
+
+def _check_rendering(rendering: Any) -> List[Issue]:
+    if not isinstance(rendering, dict):
+        return [_error(".rendering", "must be an object")]
+    issues = []
+    variants = rendering.get("prompt_variants", [])
+    if not isinstance(variants, list):
+        issues.append(_error(".rendering.prompt_variants", "must be a list"))
+        variants = []
+    seen = set()
+    for index, variant in enumerate(variants):
+        path = f".rendering.prompt_variants[{index}]"
+        if not isinstance(variant, dict):
+            issues.append(_error(path, "must be an object"))
+            continue
+        style_id = variant.get("style_id")
+        if style_id not in STYLE_IDS:
+            issues.append(_error(f"{path}.style_id", f"unknown style_id {style_id!r}"))
+        elif style_id in seen:
+            issues.append(_error(f"{path}.style_id", f"duplicate style_id {style_id!r}"))
+        seen.add(style_id)
+        if not isinstance(variant.get("prompt"), str):
+            issues.append(_error(f"{path}.prompt", "must be a string"))
+
+    images = rendering.get("images") or {}
+    if not isinstance(images, dict):
+        return issues + [_error(".rendering.images", "must be an object")]
+    for style_id, url in images.items():
+        if style_id not in STYLE_IDS:
+            issues.append(_error(f".rendering.images.{style_id}", f"unknown style_id {style_id!r}"))
+        elif not isinstance(url, str):
+            issues.append(_error(f".rendering.images.{style_id}", "must be a string"))
+    return issues
+
+
+def check_entity(item: Any, matrix_keys) -> List[Issue]:
+    """Every issue of one raw entity (parsed JSON), with paths relative to it."""
+    if not isinstance(item, dict):
+        return [_error("", "must be an object")]
+    try:
+        MythologicalEntity.model_validate(item)
+        issues = []
+    except ValidationError as e:
+        issues = [_error(_path(error["loc"]), error["msg"]) for error in e.errors()]
+
+    entity_type = item.get("entity_type")
+    if isinstance(entity_type, str) and entity_type not in ENTITY_TYPES:
+        issues.append(_error(".entity_type", f"must be one of {', '.join(ENTITY_TYPES)}"))
+
+    type_specific = item.get("type_specific")
+    if type_specific is not None:
+        if not isinstance(type_specific, dict):
+            issues.append(_error(".type_specific", "must be an object"))
+        else:
+            expected_key = entity_type.lower() if isinstance(entity_type, str) else None
+            for key, block in type_specific.items():
+                if key != expected_key:
+                    issues.append(_error(f".type_specific.{key}", f"key must match entity_type ('{expected_key}')"))
+                elif key in TYPE_BLOCKS:
+                    issues += _check_shape(block, TYPE_BLOCKS[key], f".type_specific.{key}")
+
+    rendering = item.get("rendering")
+    if rendering is not None:
+        issues += _check_rendering(rendering)
+    images = rendering.get("images") if isinstance(rendering, dict) else None
+
+    origin = item.get("origin")
+    ethnicity = origin.get("ethnicity") if isinstance(origin, dict) else None
+    if isinstance(ethnicity, str) and ethnicity.strip() and ethnicity.strip() not in matrix_keys:
+        # CONTRACT_V2 §3.3: no regional style for it, which is only wrong if an image was made anyway.
+        level = "error" if isinstance(images, dict) and images.get("regional_or_ethnic") else "warning"
+        issues.append(_error(".origin.ethnicity", f"'{ethnicity}' is not a key of styles_matrix.json", level))
+    return issues
+
+
+def check_batch(items: List[bytes], matrix_keys) -> List[List[Issue]]:
+    return [check_entity(orjson.loads(item), matrix_keys) for item in items]
+
+
+def cache_path(data_path: Path) -> Path:
+    return data_path.with_name(data_path.stem + ".validation.json")
+
+
+def validate_file(path: Path, workers: int) -> Tuple[List[Tuple[int, str, Issue]], int]:
+    """([(index, entity name, issue)], entities taken from the cache) for the dataset at `path`.
+
+    File-level problems (not JSON, not an array) come with index -1.
+    """
+    try:
+        items = orjson.loads(path.read_bytes())
+    except orjson.JSONDecodeError as e:
+        return [(-1, "", _error("", f"invalid JSON: {e}"))], 0
+    if not isinstance(items, list):
+        return [(-1, "", _error("", "the dataset must be a JSON array"))], 0
+
+    matrix_keys = set(orjson.loads(STYLE_MATRIX_PATH.read_bytes()))
+    # Results depend on the rules and on the matrix keys (ethnicity check).
+    version = f"{RULES_VERSION}:{hashlib.blake2b(orjson.dumps(sorted(matrix_keys)), digest_size=8).hexdigest()}"
+    try:
+        cache = orjson.loads(cache_path(path).read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        cache = {}
+    cached = cache.get("results", {}) if cache.get("version") == version else {}
+
+    raw = [orjson.dumps(item, option=orjson.OPT_SORT_KEYS) for item in items]
+    hashes = [hashlib.blake2b(item, digest_size=16).hexdigest() for item in raw]
+    todo = [index for index, digest in enumerate(hashes) if digest not in cached]
+    batches = [[raw[index] for index in todo[start:start + BATCH_SIZE]] for start in range(0, len(todo), BATCH_SIZE)]
+    if workers > 1 and len(todo) >= POOL_MIN_ENTITIES:
+        with ProcessPoolExecutor(workers) as pool:
+            checked = [issues for batch in pool.map(check_batch, batches, [matrix_keys] * len(batches)) for issues in batch]
+    else:
+        checked = [issues for batch in batches for issues in check_batch(batch, matrix_keys)]
+
+    results = {hashes[index]: issues for index, issues in zip(todo, checked)}
+    results.update((digest, cached[digest]) for digest in hashes if digest in cached)
+    cache_path(path).write_bytes(orjson.dumps({"version": version, "results": results}))
+
+    issues = []
+    names = Counter()
+    for index, (item, digest) in enumerate(zip(items, hashes)):
+        name = item.get("name", "?") if isinstance(item, dict) else "?"
+        issues += [(index, name, issue) for issue in results[digest]]
+        key = normalize_name(str(name))
+        names[key] += 1
+        if names[key] == 2:
+            issues.append((index, name, _error(".name", "duplicate name, lookups only find one of them")))
+    return issues, len(items) - len(todo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validates the dataset against Contract V2.")
+    parser.add_argument("--path", type=Path, default=DATA_PATH)
+    parser.add_argument("--warnings", action="store_true", help="list warnings too")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    issues, from_cache = validate_file(args.path, args.workers)
+    levels = Counter(issue["level"] for _, _, issue in issues)
+    for index, name, issue in issues:
+        if issue["level"] == "error" or args.warnings:
+            location = f"$[{index}]{issue['path']} ({name})" if index >= 0 else "$"
+            print(f"{issue['level']}: {location}: {issue['message']}")
+    print(f"{levels['error']} error(s), {levels['warning']} warning(s); {from_cache} entities unchanged since the last run.")
+    sys.exit(1 if levels["error"] else 0)
+
+
+if __name__ == "__main__":
+    main()
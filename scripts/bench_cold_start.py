@@ -0,0 +1,79 @@
+"""Cold-start benchmark: process spawn -> first 200 on /health (and on /ready) for engine.api.
+
+Exits with status 1 when the median time to /health exceeds the budget, so it can gate CI:
+
+    python scripts/bench_cold_start.py                       # 5 runs, 2.0 s budget
+    python scripts/bench_cold_start.py --runs 3 --max-health-seconds 2.5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_200(url: str, start: float, timeout: float) -> float:
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"No 200 from {url} within {timeout} s")
+
+
+def cold_start(timeout: float) -> tuple:
+    port = free_port()
+    env = {**os.environ, "IMAGE_BACKEND": os.environ.get("IMAGE_BACKEND", "local")}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "engine.api:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        health = wait_for_200(f"http://127.0.0.1:{port}/health", start, timeout)
+        ready = wait_for_200(f"http://127.0.0.1:{port}/ready", start, timeout)
+    finally:
+        server.terminate()
+        server.wait()
+    return health, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-health-seconds", type=float, default=float(os.environ.get("COLD_START_BUDGET", "2.0")))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    samples = [cold_start(args.timeout) for _ in range(args.runs)]
+    health = statistics.median(sample[0] for sample in samples)
+    ready = statistics.median(sample[1] for sample in samples)
+    print(f"spawn -> /health 200: {health:.2f} s (median of {args.runs})")
+    print(f"spawn -> /ready 200:  {ready:.2f} s (median of {args.runs})")
+
+    if health > args.max_health_seconds:
+        print(f"REGRESSION: over the {args.max_health_seconds:.2f} s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
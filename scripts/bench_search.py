@@ -0,0 +1,100 @@
+"""Search benchmark: builds a synthetic catalog and reports /search latency percentiles.
+
+Exits with status 1 when p99 exceeds the budget:
+
+    python scripts/bench_search.py                      # 100k entities, 5 ms budget
+    python scripts/bench_search.py --entities 10000 --max-p99-ms 2
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from engine.loader import load_mythology_data  # noqa: E402
+from engine.search import SearchIndex, tokenize  # noqa: E402
+
+SYLLABLES = [c + v for c in "bdgklmnrstwyz" for v in "aeiou"]
+
+
+class _Catalog:
+    """The bits of ImageOrchestrator SearchIndex uses."""
+
+    def __init__(self, data):
+        self.data = data
+        self.listeners = []
+
+    def ensure_indexed(self):
+        pass
+
+
+def pseudo_word(n: int) -> str:
+    word = ""
+    while True:
+        word += SYLLABLES[n % len(SYLLABLES)]
+        n //= len(SYLLABLES)
+        if not n:
+            return word
+
+
+def build_catalog(size: int):
+    base = load_mythology_data()
+    catalog = []
+    for i in range(size):
+        entity = base[i % len(base)].model_copy(deep=True)
+        entity.name = f"{entity.name} {pseudo_word(i)}"
+        entity.story.description += f" Known in {pseudo_word(i * 7 + 3)} as {pseudo_word(i * 13 + 5)}."
+        catalog.append(entity)
+    return base, catalog
+
+
+def make_queries(base, count: int, rng: random.Random):
+    words = sorted({word for entity in base for word in tokenize(f"{entity.name} {entity.category} {' '.join(entity.attributes.domains)}")})
+    queries = []
+    for _ in range(count):
+        word = rng.choice(words)
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(word)
+        elif kind < 0.6:
+            queries.append(f"{word} {rng.choice(words)}")
+        elif kind < 0.8:
+            queries.append(word[: max(2, len(word) // 2)])  # typing in progress
+        else:
+            position = rng.randrange(len(word))
+            queries.append(word[:position] + word[position + 1:] or word)  # typo
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--max-p99-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    base, catalog = build_catalog(args.entities)
+    index = SearchIndex(_Catalog(catalog))
+    start = time.perf_counter()
+    index.search("warmup")
+    print(f"index build: {time.perf_counter() - start:.2f} s for {args.entities} entities")
+
+    samples = []
+    for query in make_queries(base, args.queries, random.Random(0)):
+        start = time.perf_counter()
+        index.search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p50, p99 = statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+    print(f"p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {samples[-1]:.2f} ms over {len(samples)} queries")
+
+    if p99 > args.max_p99_ms:
+        print(f"REGRESSION: p99 over the {args.max_p99_ms:.1f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Startup benchmark: validation of the catalog file, per-dict model building vs. the raw-bytes path.
+
+"dicts" is the former json.load + MythologicalEntity(**item) loop; "raw bytes" is what
+engine.loader.load_mythology_data() does now (one validate_json pass with the cyclic GC paused).
+Only validation is timed, the file is read beforehand. Synthetic catalogs cycle the real entities
+under unique names:
+
+    python scripts/bench_startup.py                 # 1k / 10k / 100k entities
+    python scripts/bench_startup.py --sizes 1000 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from engine import loader  # noqa: E402
+from engine.domain import MythologicalEntity, validate_entities_json  # noqa: E402
+
+
+def build_catalog(size: int) -> bytes:
+    base = json.loads(loader.DATA_PATH.read_text(encoding="utf-8"))
+    catalog = []
+    for i in range(size):
+        item = dict(base[i % len(base)])
+        item["name"] = f"{item['name']} #{i}"
+        catalog.append(item)
+    return json.dumps(catalog, ensure_ascii=False).encode()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    def raw_bytes_path(raw: bytes):
+        with loader._gc_paused():
+            validate_entities_json(raw)
+
+    print(f"{'entities':>9} {'dicts (s)':>10} {'raw bytes (s)':>14} {'speedup':>8}")
+    for size in args.sizes:
+        raw = build_catalog(size)
+        dicts = timed(lambda: [MythologicalEntity(**item) for item in json.loads(raw)], args.repeat)
+        fast = timed(lambda: raw_bytes_path(raw), args.repeat)
+        print(f"{size:>9} {dicts:>10.3f} {fast:>14.3f} {dicts / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
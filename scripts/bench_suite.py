@@ -0,0 +1,309 @@
+"""Benchmark suite: prompt building, lookup, persistence and API routes on synthetic catalogs.
+
+Catalogs are synthetic Contract-V2 entities whose ethnicities point into chains of style-matrix
+entries, each inheriting the previous one (--chain-depth). Routes run in-process through
+TestClient with the local image backend, storage goes to a temporary directory.
+
+    python scripts/bench_suite.py generate --entities 1000000 --out /tmp/catalog.json
+    python scripts/bench_suite.py run --sizes 1000 10000 --output results.json
+    python scripts/bench_suite.py compare scripts/bench_baseline.json results.json --threshold 0.25
+
+`compare` exits with status 1 when a benchmark's median got slower than the baseline by more than
+the threshold, so it can gate CI. Results are medians of per-operation times in microseconds.
+
+Each benchmark also times a fixed pure-Python workload before each of its rounds (calibration_us).
+`compare` scales the baseline by the ratio of the two calibrations, so a baseline taken on another
+machine, or while the machine was busier, stays usable; --absolute compares raw times. Disk-bound
+benchmarks (load/save) vary more than the calibration tracks and get --io-threshold (75%) instead.
+Medians of fewer than MIN_RELIABLE_REPEAT rounds are noisy enough to trip a 25% threshold on their
+own. On shared machines (CI runners), gate on --repeat 10: at 5, one benchmark in twenty still
+crosses 25% now and then without any code change.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from engine import loader  # noqa: E402
+from engine.domain import validate_entities_json  # noqa: E402
+from engine.prompt_builder import StyleRegistry, compile_style_matrix, load_style_matrix, resolve_style_rules  # noqa: E402
+
+SYLLABLES = [c + v for c in "bdgklmnrstwyz" for v in "aeiou"]
+STYLE_IDS = ["regional_or_ethnic", "manga", "comic_marvel", "modern_african_painting"]
+MIN_RELIABLE_REPEAT = 3
+
+
+def pseudo_word(n: int) -> str:
+    word = ""
+    while True:
+        word += SYLLABLES[n % len(SYLLABLES)]
+        n //= len(SYLLABLES)
+        if not n:
+            return word.capitalize()
+
+
+# -----------------------------
+# Synthetic data
+# -----------------------------
+def synthetic_style_matrix(chains: int, depth: int) -> dict:
+    """The real DEFAULT entry, plus `chains` chains of `depth` entries each inheriting the previous one."""
+    matrix = {"DEFAULT": load_style_matrix()["DEFAULT"]}
+    for chain in range(chains):
+        parent = "DEFAULT"
+        for level in range(depth):
+            key = f"Chain{chain}-{level}"
+            matrix[key] = {
+                "inherits": parent,
+                "material_science": {"primary": [f"material {chain}.{level}"]},
+                "atmosphere": {"context": [f"context {chain}.{level}"]},
+                "constraints": {"forbidden": [f"forbidden {chain}.{level}"]},
+            }
+            parent = key
+    return matrix
+
+
+def synthetic_entity(i: int, ethnicities: list) -> dict:
+    name = f"{pseudo_word(i)} {i}"
+    country = pseudo_word(i % 53)
+    images = {style_id: f"/generated_images/{i}_{style_id}.png" for style_id in STYLE_IDS[: i % 3]}
+    return {
+        "entity_type": ("Divinity", "Creature", "Hero", "Spirit")[i % 4],
+        "name": name,
+        "category": f"Spirit of {pseudo_word(i * 7 + 1)}",
+        "origin": {
+            "country": country if i % 5 else f"{country} / {pseudo_word(i % 17)}",
+            "ethnicity": ethnicities[i % len(ethnicities)],
+            "pantheon": pseudo_word(i % 29),
+            "cultural_region": ("West Africa", "East Africa", "Central Africa", "Southern Africa")[i % 4],
+        },
+        "identity": {"gender": ("Female", "Male")[i % 2], "cultural_role": f"Keeper of {pseudo_word(i * 3)}", "alignment": "Neutral"},
+        "attributes": {
+            "domains": [pseudo_word(i % 97), pseudo_word(i % 89 + 100)],
+            "symbols": [f"{pseudo_word(i % 61)} staff", f"{pseudo_word(i % 67)} beads"],
+            "power_objects": [f"{pseudo_word(i % 71)} drum"],
+            "symbolic_animals": [pseudo_word(i % 41)],
+        },
+        "appearance": {
+            "physical_signs": [f"{pseudo_word(i % 43)} markings", "white chalk"],
+            "manifestations": f"Appears as {pseudo_word(i * 11)} at dusk.",
+            "image_generation_prompt": f"A painting of {name}, keeper of {pseudo_word(i * 3)}.",
+            "imageUrl": f"/generated_images/{i}.png" if i % 3 else "",
+        },
+        "story": {"description": f"{name} is remembered by the {pseudo_word(i % 31)} people.", "characteristics": ["Wise"]},
+        "relations": {
+            "parents": [f"{pseudo_word(i - 1)} {i - 1}"] if i else [],
+            "conjoint": [],
+            "descendants": [],
+        },
+        "type_specific": {"divinity": {"cult": {"offerings": [], "taboos": []}, "domains": []}},
+        "rendering": {
+            "prompt_canon": f"A painting of {name}.",
+            "prompt_variants": [
+                {"style_id": style_id, "label": style_id, "prompt": f"{name} in {style_id} style."}
+                for style_id in STYLE_IDS[1:]
+            ],
+            "images": images,
+        },
+    }
+
+
+def synthetic_catalog(size: int, matrix: dict) -> bytes:
+    """JSON array of `size` entities, as stored in mythology_data.json."""
+    ethnicities = [key for key in matrix if key != "DEFAULT"] or ["DEFAULT"]
+    chunks = [b"["]
+    for i in range(size):
+        if i:
+            chunks.append(b",")
+        chunks.append(json.dumps(synthetic_entity(i, ethnicities), ensure_ascii=False).encode())
+    chunks.append(b"]")
+    return b"".join(chunks)
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def measure(fn, ops: int, repeat: int, io: bool = False) -> dict:
+    """Calls fn(i) `ops` times per round; returns the median and best per-op time over the rounds.
+
+    Each round is preceded by a round of a fixed workload: its median (calibration_us) is the speed
+    of the machine while this benchmark ran, which `compare` uses to scale the baseline.
+    """
+    rounds, calibrations = [], []
+    for _ in range(repeat):
+        calibrations.append(_calibration_round())
+        start = time.perf_counter()
+        for i in range(ops):
+            fn(i)
+        rounds.append((time.perf_counter() - start) / ops * 1e6)
+    result = {
+        "ops": ops,
+        "median_us": round(statistics.median(rounds), 3),
+        "min_us": round(min(rounds), 3),
+        "calibration_us": round(statistics.median(calibrations), 3),
+    }
+    if io:
+        result["io"] = True
+    return result
+
+
+_CALIBRATION_PAYLOAD = synthetic_entity(1, ["DEFAULT"])
+
+
+def _calibration_round(ops: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(ops):
+        json.loads(json.dumps(_CALIBRATION_PAYLOAD))
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def bench_size(size: int, matrix: dict, repeat: int, workdir: Path) -> dict:
+    import engine.api as api
+    from engine.backends import LocalBackend
+    from fastapi.testclient import TestClient
+
+    raw = synthetic_catalog(size, matrix)
+    catalog = validate_entities_json(raw)
+    rng = random.Random(size)
+    names = [catalog[rng.randrange(size)].name for _ in range(1000)]
+    leaf = list(matrix)[-1]  # deepest entry of the last chain
+    registry = StyleRegistry(matrix)
+    results = {}
+
+    results["compile_style_matrix"] = measure(lambda i: compile_style_matrix(matrix), 20, repeat)
+    results["resolve_style_rules"] = measure(lambda i: resolve_style_rules(matrix, leaf), 20, repeat)
+    results["build_prompt"] = measure(lambda i: registry.build_prompt(catalog[i % size]), 2000, repeat)
+
+    data_path = workdir / f"catalog_{size}.json"
+    data_path.write_bytes(raw)
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(loader, "DATA_PATH", data_path))
+        stack.enter_context(patch.object(loader, "STORAGE_BACKEND", "json"))
+        stack.enter_context(patch.object(loader, "COMPACT_AFTER_BYTES", 1 << 40))
+        stack.enter_context(patch("engine.generation.GENERATED_DIR", workdir / "generated"))
+        stack.enter_context(patch("engine.generation.LEASE_DIR", workdir / "generation_leases"))
+        stack.enter_context(patch("engine.generation.get_backend", return_value=LocalBackend(size=(32, 32))))
+        stack.enter_context(patch("engine.generation.schedule_variants"))
+
+        io_repeat = max(1, min(repeat, 3))
+        results["load_mythology_data"] = measure(lambda i: loader.load_mythology_data(), 1, io_repeat, io=True)
+        results["save_mythology_data"] = measure(lambda i: loader.save_mythology_data(catalog), 1, io_repeat, io=True)
+        results["save_entity"] = measure(lambda i: loader.save_entity(catalog[i % size]), 50, repeat, io=True)
+
+        api.orchestrator.data = catalog
+        api.orchestrator.ensure_indexed()
+        api._dataset_loaded.set()
+        results["_find_entity"] = measure(lambda i: api._find_entity(names[i % len(names)].upper()), 5000, repeat)
+        results["get_missing_images"] = measure(lambda i: api.orchestrator.get_missing_images(), 5, repeat)
+
+        client = TestClient(api.app)
+        results["GET /health"] = measure(lambda i: client.get("/health"), 50, repeat)
+        results["GET /preview"] = measure(
+            lambda i: client.get(f"/preview/{names[i % len(names)]}", params={"style_id": "regional_or_ethnic"}), 200, repeat
+        )
+        results["POST /generate"] = measure(
+            lambda i: client.post("/generate", json={"entity_name": names[i % len(names)], "style_id": "manga"}), 50, repeat
+        )
+    return results
+
+
+# -----------------------------
+# Commands
+# -----------------------------
+def command_generate(args):
+    matrix = synthetic_style_matrix(args.chains, args.chain_depth)
+    Path(args.out).write_bytes(synthetic_catalog(args.entities, matrix))
+    matrix_path = Path(args.out).with_name(Path(args.out).stem + ".styles_matrix.json")
+    matrix_path.write_text(json.dumps(matrix, indent=2), encoding="utf-8")
+    print(f"{args.entities} entities -> {args.out}, style matrix -> {matrix_path}")
+
+
+def command_run(args):
+    matrix = synthetic_style_matrix(args.chains, args.chain_depth)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "chain_depth": args.chain_depth,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            for name, result in bench_size(size, matrix, args.repeat, Path(workdir)).items():
+                key = f"{name}@{size}"
+                report["results"][key] = result
+                print(f"{key:>32} {result['median_us']:>14.1f} us")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+
+def command_compare(args):
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    if current["meta"].get("repeat", MIN_RELIABLE_REPEAT) < MIN_RELIABLE_REPEAT:
+        print(f"Warning: {args.current} ran with --repeat {current['meta']['repeat']}, its medians are noisy")
+
+    baseline, current = baseline["results"], current["results"]
+    regressions = []
+    print(f"{'benchmark':>32} {'baseline us':>14} {'current us':>14} {'change':>8}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key]["median_us"], current[key]["median_us"]
+        calibrations = baseline[key].get("calibration_us"), current[key].get("calibration_us")
+        if not args.absolute and all(calibrations):
+            before *= calibrations[1] / calibrations[0]
+        change = after / before - 1 if before else 0.0
+        threshold = args.io_threshold if baseline[key].get("io") else args.threshold
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:>32} {before:>14.1f} {after:>14.1f} {change:>+7.0%}{flag}")
+    for key in sorted(baseline.keys() - current.keys()):
+        print(f"{key:>32} missing from {args.current}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than their threshold")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a synthetic catalog and its style matrix")
+    generate.add_argument("--entities", type=int, default=1_000)
+    generate.add_argument("--out", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--output", default="")
+
+    for command in (generate, run):
+        command.add_argument("--chains", type=int, default=4)
+        command.add_argument("--chain-depth", type=int, default=32)
+
+    compare = commands.add_parser("compare", help="flag regressions against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    compare.add_argument("--io-threshold", type=float, default=0.75, help="allowed slowdown of the disk-bound benchmarks")
+    compare.add_argument("--absolute", action="store_true", help="do not scale the baseline by the calibrations")
+
+    args = parser.parse_args()
+    {"generate": command_generate, "run": command_run, "compare": command_compare}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
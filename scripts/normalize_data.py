@@ -1,7 +1,30 @@
+"""Normalizes mythology_data.json to the Contract V2 shape (type_specific, rendering, 4 prompt variants).
+
+The file is read record by record and written to a temporary file as it goes, so memory stays
+bounded. Records whose content hash is in the cache of the previous run are known normalized and
+copied as they are. The others go through normalize_entity, in a process pool for large files. The
+dataset is replaced (atomically) only when a record actually changed:
+
+    python scripts/normalize_data.py               # normalize in place
+    python scripts/normalize_data.py --dry-run     # print what would change
+"""
+import argparse
+import hashlib
+import inspect
 import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator, List, Tuple
 
-DATA_PATH = Path("src/data/mythology_data.json")
+DATA_PATH = Path(__file__).resolve().parent.parent / "src" / "data" / "mythology_data.json"
+# Below this size the records are normalized in this process: starting a pool costs more.
+POOL_MIN_BYTES = 8_000_000
+BATCH_SIZE = 2_000
+READ_CHUNK_CHARS = 1 << 20
+# A record still undecodable past this size is malformed, not just long: fail instead of buffering on.
+MAX_RECORD_CHARS = 64 << 20
 
 STYLES = [
     {"style_id": "regional_or_ethnic", "label": "Regional/Ethnic Style"},
@@ -78,23 +101,201 @@ def normalize_entity(entity):
 
     return entity
 
+# Any edit of normalize_entity or STYLES changes it: the hashes cached by other versions prove nothing.
+NORMALIZER_VERSION = "2:" + hashlib.blake2b(
+    (inspect.getsource(normalize_entity) + json.dumps(STYLES)).encode(), digest_size=8
+).hexdigest()
+
+
+def cache_path(data_path: Path) -> Path:
+    return data_path.with_name(data_path.stem + ".normalized")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_cache(path: Path) -> set:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return set()
+    return set(lines[1:]) if lines and lines[0] == NORMALIZER_VERSION else set()
+
+
+def _truncated(error: json.JSONDecodeError, buffer: str) -> bool:
+    """Whether raw_decode failed only because `buffer` stops inside the record (a \\uXXXX escape at most)."""
+    return error.msg.startswith("Unterminated string") or error.pos >= len(buffer) - 6
+
+
+def iter_records(path: Path) -> Iterator[str]:
+    """Source text of each element of the top-level JSON array, without loading the whole file.
+
+    Raises ValueError, with the character offset, on anything but one value between separators.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as file:
+        buffer, position, consumed, eof = "", 0, 0, False
+
+        def fill():
+            nonlocal buffer, position, consumed, eof
+            chunk = file.read(READ_CHUNK_CHARS)
+            eof = not chunk
+            consumed += position
+            buffer, position = buffer[position:] + chunk, 0
+
+        def peek() -> str:
+            """The next non-whitespace character, "" at the end of the file."""
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if eof:
+                    return ""
+                fill()
+
+        def unexpected(expected: str) -> ValueError:
+            found = repr(buffer[position]) if position < len(buffer) else "the end of the file"
+            return ValueError(f"{path}: expected {expected} at character {consumed + position}, found {found}")
+
+        if peek() != "[":
+            raise ValueError(f"{path} does not hold a JSON array")
+        position += 1
+        if peek() != "]":
+            while True:
+                if not peek():
+                    raise unexpected("a record")
+                while True:
+                    try:
+                        _, end = decoder.raw_decode(buffer, position)
+                        break
+                    except json.JSONDecodeError as e:
+                        if eof or not _truncated(e, buffer):
+                            raise ValueError(f"{path}: invalid record at character {consumed + e.pos}: {e.msg}") from None
+                        if len(buffer) - position > MAX_RECORD_CHARS:
+                            raise ValueError(
+                                f"{path}: record at character {consumed + position} is over {MAX_RECORD_CHARS} characters"
+                            ) from None
+                        fill()  # the record continues in the next chunk
+                yield buffer[position:end]
+                position = end
+                separator = peek()
+                if separator == "]":
+                    break
+                if separator != ",":
+                    raise unexpected("',' or ']'")
+                position += 1
+        position += 1  # the closing ]
+        if peek():
+            raise unexpected("nothing after the closing ]")
+
+
+def normalize_batch(records: List[str]) -> List[Tuple[str, str, List[str]]]:
+    """(output text, entity name, changed top-level fields) of each record; the text is the input when unchanged."""
+    results = []
+    for text in records:
+        entity, before = json.loads(text), json.loads(text)
+        normalize_entity(entity)
+        changed = sorted(key for key in entity.keys() | before.keys() if entity.get(key) != before.get(key))
+        if changed:
+            text = json.dumps(entity, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+        results.append((text, entity.get("name", "?"), changed))
+    return results
+
+
+def normalize_file(path: Path, dry_run: bool, workers: int) -> Tuple[Counter, List[str]]:
+    """Normalizes `path` in place (unless dry_run). Returns the change counts and some changed names."""
+    cache = load_cache(cache_path(path))
+    summary, examples, hashes = Counter(), [], []
+    tmp_path = path.with_name(path.name + ".tmp")
+    output = None if dry_run else open(tmp_path, "w", encoding="utf-8")
+    pool = ProcessPoolExecutor(workers) if workers > 1 and path.stat().st_size >= POOL_MIN_BYTES else None
+    pending: deque = deque()  # (records, their hashes, normalized results or a future of them), in file order
+
+    def write(records, record_hashes, results):
+        results = iter(results if isinstance(results, list) else results.result())
+        for text, record_hash in zip(records, record_hashes):
+            if record_hash not in cache:
+                text, name, changed = next(results)
+                if changed:
+                    summary["changed"] += 1
+                    summary.update(f"field {key}" for key in changed)
+                    if len(examples) < 20:
+                        examples.append(name)
+                    record_hash = content_hash(text)
+            summary["records"] += 1
+            hashes.append(record_hash)
+            if output:
+                output.write(",\n  " if summary["records"] > 1 else "[\n  ")
+                output.write(text)
+
+    def submit(records: List[str]):
+        record_hashes = [content_hash(text) for text in records]
+        todo = [text for text, record_hash in zip(records, record_hashes) if record_hash not in cache]
+        if pool and todo:
+            pending.append((records, record_hashes, pool.submit(normalize_batch, todo)))
+        else:
+            pending.append((records, record_hashes, normalize_batch(todo)))
+        while len(pending) > workers * 2:
+            write(*pending.popleft())
+
+    try:
+        batch = []
+        for text in iter_records(path):
+            batch.append(text)
+            if len(batch) == BATCH_SIZE:
+                submit(batch)
+                batch = []
+        if batch:
+            submit(batch)
+        while pending:
+            write(*pending.popleft())
+        if output:
+            output.write("\n]" if summary["records"] else "[]")
+            output.flush()
+            os.fsync(output.fileno())
+    except BaseException:
+        if output:
+            output.close()
+            tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    if not dry_run:
+        output.close()
+        if summary["changed"]:
+            os.replace(tmp_path, path)
+        else:
+            tmp_path.unlink()
+        cache_path(path).write_text("\n".join([NORMALIZER_VERSION] + hashes) + "\n", encoding="utf-8")
+    return summary, examples
+
+
 def main():
-    if not DATA_PATH.exists():
-        print(f"Error: {DATA_PATH} not found.")
-        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", type=Path, default=DATA_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="print what would change, write nothing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
 
-    print("Loading data...")
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if not args.path.exists():
+        print(f"Error: {args.path} not found.")
+        return
 
-    print(f"Normalizing {len(data)} entities...")
-    normalized_data = [normalize_entity(item) for item in data]
+    summary, examples = normalize_file(args.path, args.dry_run, args.workers)
+    records, changed = summary.pop("records", 0), summary.pop("changed", 0)
+    print(f"{records} records, {changed} {'would change' if args.dry_run else 'changed'}.")
+    for field, count in sorted(summary.items()):
+        print(f"  {field}: {count}")
+    if examples:
+        print(f"  e.g. {', '.join(examples)}")
+    if not args.dry_run and not changed:
+        print(f"{args.path.name} left untouched.")
 
-    print("Saving normalized data...")
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(normalized_data, f, indent=2, ensure_ascii=False)
-    
-    print("Done.")
 
 if __name__ == "__main__":
     main()
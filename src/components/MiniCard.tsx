@@ -10,6 +10,14 @@ interface MiniCardProps {
 }
 
 const MiniCard: React.FC<MiniCardProps> = ({ entity, onClick }) => {
+  const [styleId, renderedUrl] = Object.entries(entity.rendering?.images || {})[0] || ['photoreal', ''];
+  // Resized WebP variants (engine/derivatives.py), so the grid does not download the full PNG
+  const variants = entity.rendering?.image_variants?.[styleId]?.webp || {};
+  const srcSet = Object.entries(variants)
+    .filter(([width]) => width !== 'full')
+    .map(([width, url]) => `${url} ${width}w`)
+    .join(', ');
+
   return (
     <div
       onClick={onClick}
@@ -20,7 +28,10 @@ const MiniCard: React.FC<MiniCardProps> = ({ entity, onClick }) => {
         {/* Priority: 1. Rendered Image (any value) 2. Legacy ImageUrl 3. Abstract Visual */}
         {(entity.rendering?.images && Object.values(entity.rendering.images).length > 0) || entity.appearance.imageUrl ? (
           <img
-            src={Object.values(entity.rendering?.images || {})[0] || entity.appearance.imageUrl}
+            src={renderedUrl || entity.appearance.imageUrl}
+            srcSet={renderedUrl && srcSet ? srcSet : undefined}
+            sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+            loading="lazy"
             alt={entity.name}
             className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110 opacity-90 group-hover:opacity-100"
           />
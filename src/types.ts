@@ -72,6 +72,7 @@ export interface RenderingSpecific {
     prompt: string;
   }>;
   images?: Record<string, string>;  // Map of style_id -> image URL
+  image_variants?: Record<string, Record<string, Record<string, string>>>;  // style_id -> format -> width|"full" -> URL
 }
 
 export interface MythologicalEntity {
@@ -0,0 +1,74 @@
+import zlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.api_core.exceptions import InternalServerError, ResourceExhausted
+
+from engine import backends
+from engine.backends import LocalBackend, NoImageGenerated, VertexBackend, get_backend
+
+
+def test_vertex_backend_creates_the_model_once(monkeypatch):
+    monkeypatch.delenv("GCP_SERVICE_ACCOUNT_JSON", raising=False)
+    with patch("vertexai.init") as init, patch("vertexai.preview.vision_models.ImageGenerationModel") as model_class:
+        model_class.from_pretrained.return_value.generate_images.return_value = MagicMock(images=[MagicMock()])
+        backend = VertexBackend()
+
+        backend.generate_images("A")
+        backend.generate_images("B")
+
+    init.assert_called_once()
+    model_class.from_pretrained.assert_called_once_with("imagen-3.0-generate-002")
+
+
+def test_vertex_backend_raises_when_no_image_is_returned():
+    with patch("vertexai.init"), patch("vertexai.preview.vision_models.ImageGenerationModel") as model_class:
+        model_class.from_pretrained.return_value.generate_images.return_value = MagicMock(images=[])
+
+        with pytest.raises(NoImageGenerated):
+            VertexBackend().generate_images("A")
+
+
+def test_local_backend_writes_deterministic_png(tmp_path):
+    backend = LocalBackend(size=(6, 8))
+
+    first, second = backend.generate_images("Shango")[0], backend.generate_images("Shango")[0]
+    first.save(location=str(tmp_path / "shango.png"))
+
+    data = (tmp_path / "shango.png").read_bytes()
+    assert data.startswith(b"\x89PNG\r\n\x1a\n")
+    assert data == second._image_bytes
+    assert data != backend.generate_images("Oya")[0]._image_bytes
+    idat = data[data.index(b"IDAT") + 4:data.index(b"IEND") - 8]
+    assert len(zlib.decompress(idat)) == 8 * (1 + 6 * 3)
+
+
+@pytest.mark.parametrize(
+    "kwargs, error",
+    [
+        ({"quota_rate": 1.0}, ResourceExhausted),
+        ({"error_rate": 1.0}, InternalServerError),
+        ({"safety_rate": 1.0}, NoImageGenerated),
+    ],
+)
+def test_local_backend_simulates_failures(kwargs, error):
+    with pytest.raises(error):
+        LocalBackend(**kwargs).generate_images("Shango")
+
+
+def test_get_backend_is_selected_by_env(monkeypatch):
+    monkeypatch.setenv("IMAGE_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_BACKEND_LATENCY", "0.25")
+    get_backend.cache_clear()
+    try:
+        backend = get_backend()
+        assert isinstance(backend, LocalBackend)
+        assert backend.latency == 0.25
+        assert get_backend() is backend
+
+        monkeypatch.setenv("IMAGE_BACKEND", "dall-e")
+        get_backend.cache_clear()
+        with pytest.raises(ValueError):
+            get_backend()
+    finally:
+        backends.get_backend.cache_clear()
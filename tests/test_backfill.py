@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock
+
+from google.api_core.exceptions import InternalServerError, ResourceExhausted
+
+from engine.backends import NoImageGenerated
+from engine.backfill import BackfillCheckpoint, RateController, run_backfill
+
+
+def make_orchestrator(*names):
+    entities = []
+    for name in names:
+        entity = MagicMock()
+        entity.name = name
+        entities.append(entity)
+    orchestrator = MagicMock()
+    orchestrator.get_missing_pairs.return_value = [(entity, "photoreal") for entity in entities]
+    orchestrator.resolve_prompt.return_value = "Prompt"
+    return orchestrator
+
+
+def fast_controller():
+    return RateController(rate=1000.0, min_rate=500.0, max_rate=2000.0)
+
+
+def test_rate_controller_is_additive_increase_multiplicative_decrease():
+    controller = RateController(rate=1.0, min_rate=0.1, max_rate=1.2, step=0.1)
+
+    controller.on_success()
+    controller.on_success()
+    controller.on_success()
+    assert controller.rate == 1.2
+
+    controller.on_quota_error()
+    assert controller.rate == 0.6
+
+
+def test_backfill_retries_quota_errors_and_checkpoints_results(tmp_path):
+    orchestrator = make_orchestrator("Shango", "Oya", "Ogun", "Eshu")
+    outcomes = {
+        "Shango": [ResourceExhausted("quota"), None],
+        "Oya": [InternalServerError("backend hiccup"), None],
+        "Ogun": [NoImageGenerated("blocked")],
+        "Eshu": [ValueError("unexpected")],
+    }
+
+    def generate(_, entity, style_id, prompt):
+        outcome = outcomes[entity.name].pop(0)
+        if outcome:
+            raise outcome
+
+    checkpoint = BackfillCheckpoint(tmp_path / "checkpoint.jsonl")
+    stats = run_backfill(orchestrator, concurrency=2, checkpoint=checkpoint, controller=fast_controller(), generate=generate)
+
+    assert stats == {"total": 4, "done": 2, "failed": 2, "skipped": 0, "retried": 2}
+    reloaded = BackfillCheckpoint(tmp_path / "checkpoint.jsonl")
+    assert reloaded.done == {"Shango::photoreal", "Oya::photoreal"}
+    assert reloaded.failed == {"Ogun::photoreal": "blocked"}
+
+
+def test_backfill_resumes_from_checkpoint(tmp_path):
+    checkpoint = BackfillCheckpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.mark("Shango::photoreal")
+    generate = MagicMock()
+
+    stats = run_backfill(
+        make_orchestrator("Shango", "Oya"),
+        checkpoint=BackfillCheckpoint(tmp_path / "checkpoint.jsonl"),
+        controller=fast_controller(),
+        generate=generate,
+    )
+
+    assert stats["skipped"] == 1
+    assert [call.args[1].name for call in generate.call_args_list] == ["Oya"]
+
+
+def test_backfill_gives_up_on_a_pair_that_keeps_failing(tmp_path):
+    generate = MagicMock(side_effect=InternalServerError("backend down"))
+
+    stats = run_backfill(
+        make_orchestrator("Shango"),
+        checkpoint=BackfillCheckpoint(tmp_path / "checkpoint.jsonl"),
+        controller=fast_controller(),
+        generate=generate,
+        max_attempts=3,
+    )
+
+    assert generate.call_count == 3
+    assert stats == {"total": 1, "done": 0, "failed": 1, "skipped": 0, "retried": 2}
+    # Transient: not checkpointed, so the next run tries again.
+    assert "Shango::photoreal" not in BackfillCheckpoint(tmp_path / "checkpoint.jsonl")
@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from engine import derivatives
+from engine.backends import render_png
+
+
+def write_png(path, width=700, height=900):
+    path.write_bytes(render_png("Shango", width, height))
+    return path
+
+
+def make_orchestrator(entity):
+    orchestrator = MagicMock()
+    orchestrator.find_entity.return_value = entity
+    orchestrator.data = [entity]
+    return orchestrator
+
+
+def make_entity(images):
+    entity = MagicMock()
+    entity.name = "Shango"
+    entity.rendering = {"images": images}
+    return entity
+
+
+def test_build_variants_writes_smaller_webp_files(tmp_path):
+    source = write_png(tmp_path / "shango.png")
+
+    variants = derivatives.build_variants(source)
+
+    assert variants == {"webp": {"320": "shango_320.webp", "640": "shango_640.webp", "full": "shango_full.webp"}}
+    with Image.open(tmp_path / "shango_320.webp") as image:
+        assert image.size == (320, 411)
+    assert (tmp_path / "shango_full.webp").stat().st_size < source.stat().st_size
+
+
+def test_record_variants_skips_an_image_replaced_meanwhile():
+    entity = make_entity({"manga": "/generated_images/shango_manga.png"})
+    variants = {"webp": {"320": "old_320.webp"}}
+
+    with patch("engine.derivatives.save_entity") as save:
+        derivatives.record_variants(make_orchestrator(entity), entity, "manga", "/generated_images/old.png", variants)
+        save.assert_not_called()
+
+        derivatives.record_variants(make_orchestrator(entity), entity, "manga", "/generated_images/shango_manga.png", variants)
+
+    save.assert_called_once_with(entity)
+    assert entity.rendering["image_variants"]["manga"] == {"webp": {"320": "/generated_images/old_320.webp"}}
+
+
+def test_backfill_builds_variants_for_existing_files_only(tmp_path):
+    write_png(tmp_path / "shango.png", 400, 500)
+    entity = make_entity({"photoreal": "/generated_images/shango.png", "manga": "/generated_images/missing.png"})
+
+    with patch("engine.generation.GENERATED_DIR", tmp_path), patch("engine.derivatives.save_entity"):
+        assert derivatives.backfill_variants(make_orchestrator(entity)) == 1
+
+    assert entity.rendering["image_variants"] == {
+        "photoreal": {"webp": {"320": "/generated_images/shango_320.webp", "full": "/generated_images/shango_full.webp"}}
+    }
+    assert (tmp_path / "shango_320.webp").exists()
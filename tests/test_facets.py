@@ -0,0 +1,56 @@
+from engine.facets import FacetIndex
+from engine.orchestrator import ImageOrchestrator
+
+
+def counts(index, field, **filters):
+    return {item["value"]: item["count"] for item in index.counts(filters)["facets"][field]}
+
+
+def test_counts_match_a_scan_of_the_catalog():
+    orchestrator = ImageOrchestrator()
+    index = FacetIndex(orchestrator)
+    yoruba = [entity for entity in orchestrator.data if entity.origin.ethnicity == "Yoruba"]
+
+    result = index.counts({"ethnicity": "yoruba"})
+
+    assert result["total"] == len(yoruba)
+    assert sum(item["count"] for item in result["facets"]["entity_type"]) == len(yoruba)
+    assert counts(index, "domains", ethnicity="Yoruba")["Thunder"] == sum("Thunder" in e.attributes.domains for e in yoruba)
+
+
+def test_multi_origin_countries_count_under_each_country():
+    orchestrator = ImageOrchestrator()
+    index = FacetIndex(orchestrator)
+    nigerian = [entity for entity in orchestrator.data if "Nigeria" in entity.origin.country.split(" / ")]
+
+    assert counts(index, "country")["Nigeria"] == len(nigerian)
+    assert "Nigeria / Benin" not in counts(index, "country")
+    assert index.matching({"country": "nigeria"}) == nigerian
+    assert any(entity.origin.country != "Nigeria" for entity in nigerian)
+
+
+def test_filters_intersect_in_catalog_order():
+    orchestrator = ImageOrchestrator()
+    index = FacetIndex(orchestrator)
+    expected = [
+        entity for entity in orchestrator.data
+        if entity.entity_type == "Divinity" and entity.origin.ethnicity == "Yoruba" and "Ram" in entity.attributes.symbolic_animals
+    ]
+
+    assert index.matching({"entity_type": "divinity", "ethnicity": "Yoruba", "symbolic_animals": "ram"}) == expected
+    assert index.matching({"pantheon": "nowhere"}) == []
+
+
+def test_saved_entities_update_the_index_incrementally():
+    orchestrator = ImageOrchestrator()
+    index = FacetIndex(orchestrator)
+    shango = orchestrator.find_entity("Shango")
+    before = counts(index, "domains").get("Weather", 0)
+    state = index._state
+
+    shango.attributes.domains = shango.attributes.domains + ["Weather"]
+    orchestrator.mark_changed(shango)
+
+    assert counts(index, "domains")["Weather"] == before + 1
+    assert shango in index.matching({"domains": "weather"})
+    assert index._state is state
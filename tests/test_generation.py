@@ -0,0 +1,127 @@
+import fcntl
+import threading
+from unittest.mock import MagicMock, patch
+
+import engine.generation as generation
+from engine.backends import LocalBackend
+
+
+class CountingBackend(LocalBackend):
+    def __init__(self):
+        super().__init__(latency=0.2, size=(16, 16))
+        self.calls = 0
+
+    def generate_images(self, prompt):
+        self.calls += 1
+        return super().generate_images(prompt)
+
+
+def make_entity(name):
+    entity = MagicMock()
+    entity.name = name
+    entity.rendering = {"images": {}}
+    return entity
+
+
+def patched(tmp_path, backend):
+    return [
+        patch.object(generation, "GENERATED_DIR", tmp_path / "generated"),
+        patch.object(generation, "LEASE_DIR", tmp_path / "leases"),
+        patch.object(generation, "get_backend", return_value=backend),
+        patch.object(generation, "save_entity"),
+        patch.object(generation, "schedule_variants"),
+    ]
+
+
+def run_in_threads(calls):
+    results = [None] * len(calls)
+
+    def run(index, call):
+        results[index] = call()
+
+    threads = [threading.Thread(target=run, args=(index, call)) for index, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_identical_generations_share_one_backend_call(tmp_path):
+    backend, orchestrator, entity = CountingBackend(), MagicMock(), make_entity("Shango")
+    patches = patched(tmp_path, backend)
+    for p in patches:
+        p.start()
+    try:
+        urls = run_in_threads([
+            lambda: generation.generate_entity_image(orchestrator, entity, "manga", "A prompt"),
+            lambda: generation.generate_entity_image(orchestrator, entity, "manga", "A prompt"),
+            lambda: generation.generate_entity_image(orchestrator, entity, "comic_marvel", "Another prompt"),
+        ])
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert backend.calls == 2
+    assert urls[0] == urls[1] == entity.rendering["images"]["manga"]
+    assert urls[2] == entity.rendering["images"]["comic_marvel"] != urls[0]
+    assert generation._in_flight == {}
+    assert list((tmp_path / "leases").iterdir()) == []
+
+
+def test_waiting_on_another_workers_lease_reuses_its_image(tmp_path):
+    backend, entity = CountingBackend(), make_entity("Shango")
+    orchestrator = MagicMock()
+    orchestrator.find_entity.return_value = entity
+    patches = patched(tmp_path, backend)
+    for p in patches:
+        p.start()
+    try:
+        # Another worker holds the lease: flock conflicts between open files, even in one process.
+        generation.LEASE_DIR.mkdir()
+        with open(generation._lease_path(("shango", "manga")), "a") as lease:
+            fcntl.flock(lease, fcntl.LOCK_EX)
+            urls = []
+            waiter = threading.Thread(
+                target=lambda: urls.append(generation.generate_entity_image(orchestrator, entity, "manga", "A prompt"))
+            )
+            waiter.start()
+            waiter.join(timeout=0.3)
+            entity.rendering["images"]["manga"] = "/generated_images/other_worker.png"
+            fcntl.flock(lease, fcntl.LOCK_UN)
+        waiter.join(timeout=10)
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert urls == ["/generated_images/other_worker.png"]
+    assert backend.calls == 0
+    orchestrator.sync.assert_called_once()
+    assert list((tmp_path / "leases").iterdir()) == []
+
+
+def test_lease_released_by_removal_is_not_shared_with_the_next_holder(tmp_path):
+    with patch.object(generation, "LEASE_DIR", tmp_path):
+        path = generation._lease_path(("shango", "manga"))
+        with open(path, "a") as first:
+            fcntl.flock(first, fcntl.LOCK_EX)
+            acquired = threading.Event()
+
+            def wait_for_lease():
+                with generation._lease(("shango", "manga")):
+                    acquired.set()
+
+            waiter = threading.Thread(target=wait_for_lease)
+            waiter.start()
+            # The first holder releases as _lease does, and a new holder takes the new file meanwhile.
+            path.unlink()
+            with open(path, "a") as second:
+                fcntl.flock(second, fcntl.LOCK_EX)
+                fcntl.flock(first, fcntl.LOCK_UN)
+                assert not acquired.wait(0.3)
+                path.unlink()
+                fcntl.flock(second, fcntl.LOCK_UN)
+        waiter.join(timeout=10)
+
+    assert acquired.is_set()
+    assert list(tmp_path.iterdir()) == []
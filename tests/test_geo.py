@@ -0,0 +1,46 @@
+import orjson
+
+from engine.geo import GeoIndex
+from engine.orchestrator import ImageOrchestrator
+
+
+def summary_of(index):
+    body, _ = index.summary()
+    return {row["country"]: row for row in orjson.loads(body)["countries"]}
+
+
+def test_multi_origin_countries_count_under_each_part():
+    orchestrator = ImageOrchestrator()
+    index = GeoIndex(orchestrator)
+    countries = summary_of(index)
+
+    nigeria = index.country("nigeria")
+    assert "Yemaya" in [entity["name"] for entity in nigeria["entities"]]
+    assert "Abiku" in [entity["name"] for entity in index.country("Benin")["entities"]]
+    assert countries["Nigeria"]["count"] == nigeria["count"]
+    assert "Nigeria / Diaspora" not in countries
+    assert index.country("Atlantis") is None
+
+
+def test_coverage_counts_rendered_styles_and_the_legacy_image():
+    index = GeoIndex(ImageOrchestrator())
+
+    coverage = index.country("Nigeria")["coverage"]
+
+    assert coverage["photoreal"] >= 3
+    assert coverage["regional_or_ethnic"] >= 1
+
+
+def test_saves_move_entities_between_countries_and_change_the_etag():
+    orchestrator = ImageOrchestrator()
+    index = GeoIndex(orchestrator)
+    _, etag = index.summary()
+    before = summary_of(index)["Ghana"]["count"]
+
+    oba = orchestrator.find_entity("Oba")
+    oba.origin.country = "Ghana"
+    orchestrator.mark_changed(oba)
+
+    assert summary_of(index)["Ghana"]["count"] == before + 1
+    assert "Oba" not in [entity["name"] for entity in index.country("Nigeria")["entities"]]
+    assert index.summary()[1] != etag
@@ -0,0 +1,52 @@
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from engine.backends import LocalImage
+from engine.image_store import collect_garbage, store_image
+from engine.loader import load_mythology_data
+
+
+def test_identical_images_are_stored_once(tmp_path):
+    first = store_image(LocalImage(b"same bytes"), tmp_path)
+    second = store_image(LocalImage(b"same bytes"), tmp_path)
+    other = store_image(LocalImage(b"other bytes"), tmp_path)
+
+    assert first == second != other
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([first, other])
+
+
+def test_gc_removes_only_old_unreferenced_content_files(tmp_path):
+    shango = next(entity for entity in load_mythology_data() if entity.name == "Shango")
+    kept = store_image(LocalImage(b"current"), tmp_path)
+    superseded = store_image(LocalImage(b"superseded"), tmp_path)
+    recent = store_image(LocalImage(b"not recorded yet"), tmp_path)
+    legacy = tmp_path / "shango.png"
+    legacy.write_bytes(b"legacy")
+    shango.rendering = {"images": {"manga": f"/generated_images/{kept}"}}
+    an_hour_ago = time.time() - 3700
+    for name in (kept, superseded, legacy.name):
+        os.utime(tmp_path / name, (an_hour_ago, an_hour_ago))
+
+    removed = collect_garbage(tmp_path, [shango])
+
+    assert [path.name for path in removed] == [superseded]
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([kept, recent, legacy.name])
+
+
+def test_content_addressed_files_are_immutable_with_strong_etag(tmp_path):
+    from engine.api import GeneratedImageFiles
+
+    name = store_image(LocalImage(b"\x89PNG fake"), tmp_path)
+    (tmp_path / "shango.png").write_bytes(b"legacy")
+    app = FastAPI()
+    app.mount("/generated_images", GeneratedImageFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+
+    response = client.get(f"/generated_images/{name}")
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["etag"] == f'"{name[:-4]}"'
+    assert client.get(f"/generated_images/{name}", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert "immutable" not in client.get("/generated_images/shango.png").headers.get("cache-control", "")
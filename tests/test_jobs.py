@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock, patch
+
+from google.api_core.exceptions import ResourceExhausted
+
+from engine.jobs import JobQueue, process_next_job
+
+
+def test_job_queue_claims_oldest_pending_job_once(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    first = queue.submit("Shango", "photoreal", "Prompt A")
+    queue.submit("Oya", "manga", "Prompt B")
+
+    claimed = queue.claim()
+
+    assert claimed.id == first.id
+    assert claimed.status == "generating"
+    assert queue.claim().entity_name == "Oya"
+    assert queue.claim() is None
+
+
+def test_job_queue_survives_restart_and_requeues_in_flight_jobs(tmp_path):
+    db_path = tmp_path / "jobs.sqlite3"
+    job = JobQueue(db_path).submit("Shango", "photoreal", "Prompt")
+    JobQueue(db_path).claim()
+
+    restarted = JobQueue(db_path)
+    assert restarted.get(job.id).status == "generating"
+    assert restarted.requeue_in_flight() == 1
+    assert restarted.claim().id == job.id
+
+
+def test_process_next_job_records_success_and_errors(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    done = queue.submit("Shango", "photoreal", "Prompt")
+    quota = queue.submit("Shango", "manga", "Prompt")
+    missing = queue.submit("Nobody", "photoreal", "Prompt")
+    orchestrator = MagicMock()
+    orchestrator.find_entity.side_effect = lambda name: None if name == "Nobody" else MagicMock()
+
+    with patch("engine.jobs.generate_entity_image", side_effect=["/generated_images/shango.png", ResourceExhausted("quota")]):
+        while process_next_job(queue, orchestrator):
+            pass
+
+    assert queue.get(done.id).status == "done"
+    assert queue.get(done.id).image_url == "/generated_images/shango.png"
+    assert queue.get(quota.id).error == "quota_exceeded"
+    assert queue.get(missing.id).status == "error"
+    assert queue.get(missing.id).error == "Entity not found"
@@ -0,0 +1,105 @@
+import pytest
+
+from engine.lineage import LineageIndex
+from engine.orchestrator import ImageOrchestrator
+
+
+def names(result):
+    return [node["name"] for node in result["nodes"]]
+
+
+def test_edges_are_resolved_and_inferred_both_ways():
+    index = LineageIndex(ImageOrchestrator())
+
+    # Shango lists Oranmiyan as parent; Yemaya lists Shango as descendant.
+    assert names(index.lineage("SHANGO")) == ["Oranmiyan", "Yemaya"]
+    assert "Shango" in names(index.lineage("yemaya", "descendants"))
+    assert "Ibeji" in names(index.lineage("Oshun", "descendants"))
+    assert names(index.lineage("Oba", "spouses")) == ["Shango"]
+
+
+def test_depth_bounds_the_transitive_closure():
+    index = LineageIndex(ImageOrchestrator())
+
+    ancestors = index.lineage("Ibeji", "ancestors", depth=3)
+
+    assert {node["name"]: node["distance"] for node in ancestors["nodes"]}["Oduduwa"] == 3
+    assert "Oduduwa" not in names(index.lineage("Ibeji", "ancestors", depth=2))
+    assert ["Oranmiyan", "Oduduwa"] in ancestors["edges"]
+
+
+def test_unresolved_references_and_cycles_are_reported():
+    orchestrator = ImageOrchestrator()
+    index = LineageIndex(orchestrator)
+    assert index.lineage("Mami Wata")["unresolved"] == ["Olokun"]
+    assert index.problems()["cycles"] == []
+
+    oduduwa = orchestrator.find_entity("Oduduwa")
+    oduduwa.relations.parents = ["Shango"]
+    orchestrator.mark_changed(oduduwa)
+
+    cycle = index.lineage("Shango")["cycles"][0]
+    assert {"Shango", "Oranmiyan", "Oduduwa"} <= set(cycle)
+
+
+def test_memoized_closures_follow_relation_changes():
+    orchestrator = ImageOrchestrator()
+    index = LineageIndex(orchestrator)
+    assert names(index.lineage("Anansi", "descendants")) == []
+
+    anansi = orchestrator.find_entity("Anansi")
+    anansi.relations.descendants = ["Eshu"]
+    orchestrator.mark_changed(anansi)
+
+    assert names(index.lineage("Anansi", "descendants")) == ["Eshu"]
+    assert names(index.lineage("Eshu")) == ["Anansi"]
+
+
+def test_saves_relink_only_the_entities_they_concern():
+    orchestrator = ImageOrchestrator()
+    index = LineageIndex(orchestrator)
+    assert index.lineage("Mami Wata")["unresolved"] == ["Olokun"]
+    graph = index._current()
+    linked = []
+    link = graph._link
+    graph._link = lambda doc: linked.append(graph.entities[doc].name) or link(doc)
+
+    oba = orchestrator.find_entity("Oba")
+    oba.relations.parents = ["Yemaya"]
+    orchestrator.mark_changed(oba)
+    assert linked == ["Oba"]
+    assert "Oba" in names(index.lineage("Yemaya", "descendants"))
+
+    # Renaming to a name others refer to relinks them: Mami Wata's reference now resolves.
+    referring = {
+        entity.name for entity in orchestrator.data
+        if "Olokun" in entity.relations.parents + entity.relations.conjoint + entity.relations.descendants
+    }
+    linked.clear()
+    anansi = orchestrator.find_entity("Anansi")
+    anansi.name = "Olokun"
+    orchestrator.mark_changed(anansi)
+    assert sorted(linked) == sorted(referring | {"Olokun"})
+    assert index.lineage("Mami Wata")["unresolved"] == []
+    assert names(index.lineage("Mami Wata")) == ["Olokun"]
+    with pytest.raises(KeyError):
+        index.lineage("Anansi")
+
+
+def test_an_edge_declared_by_both_sides_outlives_one_declaration():
+    orchestrator = ImageOrchestrator()
+    index = LineageIndex(orchestrator)
+    oba = orchestrator.find_entity("Oba")
+    shango = orchestrator.find_entity("Shango")
+    assert "Oba" in shango.relations.conjoint or "Shango" in oba.relations.conjoint
+
+    oba.relations.conjoint, shango_spouses = ["Shango"], list(shango.relations.conjoint)
+    orchestrator.mark_changed(oba)
+    shango.relations.conjoint = [name for name in shango_spouses if name != "Oba"]
+    orchestrator.mark_changed(shango)
+    assert "Oba" in names(index.lineage("Shango", "spouses"))
+
+    oba.relations.conjoint = []
+    orchestrator.mark_changed(oba)
+    assert "Oba" not in names(index.lineage("Shango", "spouses"))
+
@@ -0,0 +1,40 @@
+from engine.orchestrator import ImageOrchestrator, normalize_name
+
+
+def test_normalize_name_folds_case_and_accents():
+    assert normalize_name("Ọ̀ṣun") == "osun"
+    assert normalize_name("  MAMI Wata ") == "mami wata"
+    assert normalize_name("Straße") == "strasse"
+
+
+def test_find_entity_is_case_and_accent_insensitive():
+    orchestrator = ImageOrchestrator()
+
+    assert orchestrator.find_entity("shango").name == "Shango"
+    assert orchestrator.find_entity("ÈSHU").name == "Eshu"
+    assert orchestrator.find_entity("Unknown") is None
+
+
+def test_find_entity_resolves_aliases():
+    orchestrator = ImageOrchestrator()
+    orchestrator.add_alias("Ọ̀ṣun", "Oshun")
+    legba = orchestrator.data[0].model_copy(update={"name": "Legba", "aliases": ["Atibon Legba"]})
+    orchestrator.data = orchestrator.data + [legba]
+
+    assert orchestrator.find_entity("osun").name == "Oshun"
+    assert orchestrator.find_entity("atibon legba").name == "Legba"
+
+
+def test_index_follows_replaced_data_and_renames():
+    orchestrator = ImageOrchestrator()
+    entity = orchestrator.data[0].model_copy(update={"name": "Solo"})
+    orchestrator.data = [entity]
+
+    assert orchestrator.find_entity("Shango") is None
+    assert orchestrator.find_entity("solo") is entity
+
+    entity.name = "Renamed"
+    orchestrator.update_entity(entity, previous_name="Solo")
+
+    assert orchestrator.find_entity("Solo") is None
+    assert orchestrator.find_entity("renamed") is entity
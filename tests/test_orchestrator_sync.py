@@ -0,0 +1,46 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from engine import loader
+from engine.orchestrator import ImageOrchestrator
+
+DATA_PATH = Path(__file__).parent.parent / "src" / "data" / "mythology_data.json"
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    path = tmp_path / "mythology_data.json"
+    shutil.copy(DATA_PATH, path)
+    monkeypatch.setattr(loader, "DATA_PATH", path)
+    return path
+
+
+def test_sync_applies_only_entities_saved_by_another_process(data_path):
+    reader, writer = ImageOrchestrator(), ImageOrchestrator()
+    untouched = reader.find_entity("Oya")
+    shango = writer.find_entity("Shango")
+    shango.rendering["images"]["manga"] = "/generated_images/shango_manga.png"
+
+    loader.save_entity(shango)
+
+    assert reader.sync() == 1
+    assert reader.find_entity("Shango").rendering["images"]["manga"] == "/generated_images/shango_manga.png"
+    assert reader.find_entity("Oya") is untouched
+    assert reader.sync() == 0
+
+
+def test_sync_appends_new_entities_and_reloads_after_compaction(data_path):
+    reader = ImageOrchestrator()
+    newcomer = reader.find_entity("Shango").model_copy(update={"name": "Newcomer"})
+
+    loader.save_entity(newcomer)
+    assert reader.sync() == 1
+    assert reader.find_entity("newcomer").name == "Newcomer"
+    assert len(reader.data) == 45
+
+    loader.compact_mythology_data()
+    assert reader.sync() == 45
+    assert len(json.loads(data_path.read_text(encoding="utf-8"))) == 45
@@ -9,7 +9,9 @@ from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'engine'))
 
 from domain import MythologicalEntity
-from loader import load_mythology_data, save_mythology_data
+from loader import (
+    changelog_path, compact_mythology_data, load_mythology_data, save_entity, save_mythology_data
+)
 
 # Mock data path to avoid overwriting real data
 TEST_DATA_PATH = Path("tests/fixtures/test_mythology_data.json")
@@ -115,6 +117,65 @@ def test_round_trip_preserves_extras(mock_loader_data_path):
     assert "sources" in saved_entity, "sources (future field) was dropped!"
     assert saved_entity["sources"][0]["label"] == "Future Field"
 
+def test_save_entity_appends_to_change_log_without_rewriting_json(mock_loader_data_path):
+    original_json = mock_loader_data_path.read_bytes()
+    entity = load_mythology_data()[0]
+    entity.rendering["images"] = {"manga": "/generated_images/testentityv2_manga.png"}
+
+    save_entity(entity)
+
+    assert mock_loader_data_path.read_bytes() == original_json
+    assert len(changelog_path().read_text().splitlines()) == 1
+    reloaded = load_mythology_data()
+    assert len(reloaded) == 1
+    assert reloaded[0].rendering["images"]["manga"] == "/generated_images/testentityv2_manga.png"
+
+
+def test_compaction_folds_change_log_into_json(mock_loader_data_path):
+    entity = load_mythology_data()[0]
+    entity.appearance.imageUrl = "/generated_images/testentityv2.png"
+    save_entity(entity)
+
+    compact_mythology_data()
+
+    assert not changelog_path().exists()
+    with open(mock_loader_data_path, 'r') as f:
+        saved_entity = json.load(f)[0]
+    assert saved_entity["appearance"]["imageUrl"] == "/generated_images/testentityv2.png"
+    assert saved_entity["sources"][0]["label"] == "Future Field"
+
+
+def test_change_log_compacts_automatically_past_threshold(mock_loader_data_path, monkeypatch):
+    monkeypatch.setattr("loader.COMPACT_AFTER_BYTES", 1)
+    entity = load_mythology_data()[0]
+    entity.category = "Compacted God"
+
+    save_entity(entity)
+
+    assert not changelog_path().exists()
+    assert json.loads(mock_loader_data_path.read_text())[0]["category"] == "Compacted God"
+
+
+def test_torn_change_log_line_is_ignored(mock_loader_data_path):
+    entity = load_mythology_data()[0]
+    entity.category = "Logged God"
+    save_entity(entity)
+    with open(changelog_path(), "a", encoding="utf-8") as log:
+        log.write('{"name": "TestEntityV2", "entity": {"trunc')
+
+    assert load_mythology_data()[0].category == "Logged God"
+
+
+def test_load_validates_raw_bytes_like_the_model(mock_loader_data_path):
+    items = json.loads(mock_loader_data_path.read_text())
+    loaded = [entity.model_dump() for entity in load_mythology_data()]
+    assert loaded == [MythologicalEntity(**item).model_dump() for item in items]
+
+    del items[0]["origin"]
+    mock_loader_data_path.write_text(json.dumps(items))
+    with pytest.raises(ValueError, match="origin"):
+        load_mythology_data()
+
 if __name__ == "__main__":
     # Allow running directly without pytest for quick check if needed
     pass
@@ -1,8 +1,18 @@
 import json
 from pathlib import Path
 
+import pytest
+
 from engine.domain import Appearance, Attributes, Identity, MythologicalEntity, Origin, Relations, Story
-from engine.prompt_builder import build_prompt, build_subject_description, load_style_matrix, resolve_style_rules
+from engine import prompt_builder
+from engine.prompt_builder import (
+    build_prompt,
+    build_subject_description,
+    compile_style_matrix,
+    get_style_registry,
+    load_style_matrix,
+    resolve_style_rules,
+)
 
 
 DATA_PATH = Path(__file__).parent.parent / "src" / "data" / "mythology_data.json"
@@ -181,3 +191,54 @@ def test_load_style_matrix_returns_expected_entries():
     assert "Yoruba" in matrix
     assert "Akan" in matrix
     assert "Kongo" in matrix
+
+
+def test_compile_style_matrix_rejects_cycles_and_unknown_parents():
+    with pytest.raises(ValueError, match="cycle"):
+        compile_style_matrix({"A": {"inherits": "B"}, "B": {"inherits": "A"}})
+
+    with pytest.raises(ValueError, match="unknown"):
+        compile_style_matrix({"A": {"inherits": "Missing"}})
+
+
+def test_a_broken_matrix_entry_only_disables_its_own_chain():
+    matrix = load_style_matrix()
+    matrix["Broken"] = {"inherits": "Missing"}
+    matrix["BrokenChild"] = {"inherits": "Broken"}
+    matrix["Loop"] = {"inherits": "Loop"}
+    matrix["Incomplete"] = {"visual_signature": "No other fields"}
+    registry = prompt_builder.StyleRegistry(matrix)
+
+    assert set(registry.errors) == {"Broken", "BrokenChild", "Loop", "Incomplete"}
+    assert registry.build_prompt(make_entity(ethnicity="BrokenChild")) is None
+    assert "Classical Yoruba sacred sculpture" in registry.build_prompt(make_entity(ethnicity="Yoruba"))
+    assert resolve_style_rules(matrix, "Yoruba")["visual_signature"] == registry.rules["Yoruba"]["visual_signature"]
+
+
+def test_merge_keeps_order_and_dedupes_unhashable_list_items():
+    matrix = {
+        "Base": {"palette": [["red", "white"], "ochre"]},
+        "Child": {"inherits": "Base", "palette": ["ochre", ["red", "white"], ["indigo"]]},
+    }
+
+    assert resolve_style_rules(matrix, "Child")["palette"] == [["red", "white"], "ochre", ["indigo"]]
+
+
+def test_style_registry_is_reused_until_matrix_file_changes(tmp_path, monkeypatch):
+    matrix = load_style_matrix()
+    matrix_path = tmp_path / "styles_matrix.json"
+    matrix_path.write_text(json.dumps(matrix), encoding="utf-8")
+    monkeypatch.setattr(prompt_builder, "STYLE_MATRIX_PATH", matrix_path)
+    entity = make_entity(ethnicity="Yoruba", symbols=["Double-headed axe"])
+
+    registry = get_style_registry()
+    assert get_style_registry() is registry
+    assert "Classical Yoruba sacred sculpture" in build_prompt(entity)
+
+    matrix["Yoruba"]["visual_signature"] = "Reloaded signature."
+    matrix_path.write_text(json.dumps(matrix), encoding="utf-8")
+
+    reloaded = get_style_registry()
+    assert reloaded is not registry
+    assert reloaded.version != registry.version
+    assert build_prompt(entity).startswith("Reloaded signature.")
@@ -0,0 +1,30 @@
+from engine.orchestrator import ImageOrchestrator
+from engine.prompt_cache import PromptCache
+
+
+def test_prompt_cache_counts_hits_misses_and_evictions():
+    cache = PromptCache(maxsize=2)
+
+    assert cache.get_or_build(("a", "photoreal", ""), lambda: "A") == "A"
+    assert cache.get_or_build(("a", "photoreal", ""), lambda: "stale") == "A"
+    cache.get_or_build(("b", "photoreal", ""), lambda: "B")
+    cache.get_or_build(("c", "photoreal", ""), lambda: "C")
+
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 3, "evictions": 1}
+    assert cache.get_or_build(("a", "photoreal", ""), lambda: "rebuilt") == "rebuilt"
+
+
+def test_resolve_prompt_is_cached_until_entity_changes():
+    orchestrator = ImageOrchestrator()
+    shango = orchestrator.find_entity("Shango")
+
+    first = orchestrator.resolve_prompt(shango, "regional_or_ethnic")
+    assert orchestrator.resolve_prompt(shango, "regional_or_ethnic") == first
+    assert orchestrator.prompt_cache.hits == 1
+
+    shango.attributes.symbols = ["Thunderstone"]
+    orchestrator.mark_changed(shango)
+
+    updated = orchestrator.resolve_prompt(shango, "regional_or_ethnic")
+    assert "Thunderstone" in updated
+    assert orchestrator.prompt_cache.stats()["size"] == 1
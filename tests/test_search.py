@@ -0,0 +1,58 @@
+from engine.orchestrator import ImageOrchestrator
+from engine.search import SearchIndex
+
+
+def names(results):
+    return [entity.name for entity, _ in results]
+
+
+def test_name_matches_rank_first_and_accents_are_folded():
+    index = SearchIndex(ImageOrchestrator())
+
+    assert names(index.search("Shango"))[0] == "Shango"
+    assert names(index.search("Ọ̀ṣun"))[0] == "Oshun"
+    assert names(index.search("ÈṢÙ"))[0] == "Eshu"
+
+
+def test_last_word_matches_as_prefix_and_typos_are_tolerated():
+    index = SearchIndex(ImageOrchestrator())
+
+    assert "Unkulunkulu" in names(index.search("unkulu"))
+    assert names(index.search("Anansy"))[0] == "Anansi"
+    assert names(index.search("Osun"))[0] == "Oshun"
+
+
+def test_ranks_across_fields():
+    index = SearchIndex(ImageOrchestrator())
+
+    results = index.search("thunder")
+    assert "Shango" in names(results)
+    assert all(score > 0 for _, score in results)
+    assert index.search("zzzz qqqq") == []
+
+
+def test_index_follows_entity_changes_incrementally():
+    orchestrator = ImageOrchestrator()
+    index = SearchIndex(orchestrator)
+    index.search("warmup")
+    state = index._state
+    anansi = orchestrator.find_entity("Anansi")
+
+    anansi.story.description += " Keeper of the quasar."
+    orchestrator.mark_changed(anansi)
+
+    assert names(index.search("quasar")) == ["Anansi"]
+    assert index._state is state
+
+
+def test_reload_is_rebuilt_off_the_query_path():
+    orchestrator = ImageOrchestrator()
+    index = SearchIndex(orchestrator)
+    before = index.search("Shango")
+
+    with index._build_lock:  # holds back the rebuild the reload starts
+        orchestrator.reload()
+        assert index.search("Shango") == before
+    index.refresh()
+
+    assert index.search("Shango")[0][0] is orchestrator.find_entity("Shango")
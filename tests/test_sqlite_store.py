@@ -0,0 +1,138 @@
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
+from engine import loader
+from engine.backfill import STYLE_IDS
+from engine.facets import FacetIndex
+from engine.orchestrator import ImageOrchestrator
+from engine.sqlite_store import SQLiteStore, get_store
+
+DATA_PATH = Path(__file__).parent.parent / "src" / "data" / "mythology_data.json"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(tmp_path / "catalog.sqlite3")
+    store.import_json(DATA_PATH)
+    return store
+
+
+def test_import_export_round_trip(store, tmp_path):
+    exported = tmp_path / "export.json"
+
+    assert store.export_json(exported) == 44
+    assert json.loads(exported.read_text(encoding="utf-8")) == json.loads(DATA_PATH.read_text(encoding="utf-8"))
+
+
+def test_get_uses_normalized_name(store):
+    assert store.get("SHANGO").name == "Shango"
+    assert store.get("Èshu").name == "Eshu"
+    assert store.get("Nobody") is None
+
+
+def test_find_filters_on_indexed_facet_values(store):
+    yoruba_divinities = store.find(ethnicity="yoruba", entity_type="Divinity")
+
+    assert "Shango" in [entity.name for entity in yoruba_divinities]
+    assert all(entity.origin.ethnicity == "Yoruba" for entity in yoruba_divinities)
+    assert all("Nigeria" in entity.origin.country.split(" / ") for entity in store.find(country="Nigeria"))
+    with pytest.raises(ValueError):
+        store.find(name="Shango")
+
+
+def test_upsert_updates_document_and_image_coverage(store):
+    shango = store.get("Shango")
+    assert "Shango" in store.missing_images("manga")
+
+    shango.rendering["images"]["manga"] = "/generated_images/shango_manga.png"
+    store.upsert(shango)
+
+    assert store.count() == 44
+    assert "Shango" not in store.missing_images("manga")
+    assert store.get("Shango").rendering["images"]["manga"] == "/generated_images/shango_manga.png"
+
+
+def test_facets_and_missing_pairs_read_the_store_indexes(store, monkeypatch):
+    filters = [{}, {"ethnicity": "yoruba"}, {"country": "nigeria", "entity_type": "Divinity"}, {"domains": "Thunder"}]
+    in_memory = ImageOrchestrator()
+    expected_counts = [FacetIndex(in_memory).counts(f) for f in filters]
+    expected_pairs = {(entity.name, style_id) for entity, style_id in in_memory.get_missing_pairs(STYLE_IDS)}
+
+    monkeypatch.setattr(loader, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(loader, "SQLITE_PATH", store.path)
+    orchestrator = ImageOrchestrator()
+    index = FacetIndex(orchestrator)
+    monkeypatch.setattr(index, "_build", None)  # counting must not build the in-memory bitsets
+
+    assert [index.counts(f) for f in filters] == expected_counts
+    assert {(entity.name, style_id) for entity, style_id in orchestrator.get_missing_pairs(STYLE_IDS)} == expected_pairs
+
+
+def test_an_older_database_gets_its_lookup_tables_filled(store):
+    missing, counts = store.missing_images("photoreal"), store.facet_counts({})
+    with closing(sqlite3.connect(store.path)) as conn, conn:
+        conn.execute("DELETE FROM entity_images")
+        conn.execute("DELETE FROM entity_facets")
+        conn.execute("PRAGMA user_version = 0")
+
+    reopened = SQLiteStore(store.path)
+
+    assert reopened.missing_images("photoreal") == missing
+    assert reopened.facet_counts({}) == counts
+
+
+def test_loader_uses_sqlite_backend(store, monkeypatch):
+    monkeypatch.setattr(loader, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(loader, "SQLITE_PATH", store.path)
+
+    entities = loader.load_mythology_data()
+    entities[0].category = "Updated Category"
+    loader.save_entity(entities[0])
+
+    assert len(entities) == 44
+    assert store.get(entities[0].name).category == "Updated Category"
+
+
+def test_changes_since_returns_upserted_entities_and_detects_replace(store):
+    cursor = store.cursor()
+    shango = store.get("Shango")
+    shango.category = "Changed"
+    store.upsert(shango)
+
+    changes, cursor = store.changes_since(cursor)
+    assert [entity.category for entity in changes] == ["Changed"]
+    assert store.changes_since(cursor) == ([], cursor)
+
+    store.import_json(DATA_PATH)
+    assert store.changes_since(cursor)[0] is None
+
+
+def test_change_log_keeps_one_row_per_entity(store):
+    cursor = store.cursor()
+    shango = store.get("Shango")
+    for category in ("First", "Second", "Third"):
+        shango.category = category
+        store.upsert(shango)
+
+    changes, _ = store.changes_since(cursor)
+    assert [entity.category for entity in changes] == ["Third"]
+    with closing(sqlite3.connect(store.path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM changes WHERE name_key = 'shango'").fetchone()[0] == 1
+
+
+def test_readers_do_not_wait_for_a_writer(store, monkeypatch):
+    monkeypatch.setattr(loader, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(loader, "SQLITE_PATH", store.path)
+    cursor = loader.dataset_cursor()
+
+    with closing(sqlite3.connect(store.path, timeout=0, isolation_level=None)) as writer:
+        writer.execute("BEGIN IMMEDIATE")
+        assert loader.dataset_cursor() == cursor
+        assert loader.load_changes_since(cursor) == ([], cursor)
+        writer.execute("ROLLBACK")
+
+    assert get_store(store.path) is get_store(store.path)
@@ -0,0 +1,49 @@
+import gzip
+
+import pytest
+
+from engine.static_files import StaticBundle
+
+brotli = pytest.importorskip("brotli")
+
+
+def make_bundle(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<html>" + "x" * 2000 + "</html>")
+    (tmp_path / "assets" / "index-3f2a.js").write_text("console.log('hi');" * 200)
+    (tmp_path / "assets" / "logo-9c1e.png").write_bytes(b"\x89PNG" + bytes(100))
+    return StaticBundle(tmp_path)
+
+
+def test_negotiates_brotli_then_gzip_then_identity(tmp_path):
+    bundle = make_bundle(tmp_path)
+    source = (tmp_path / "assets" / "index-3f2a.js").read_bytes()
+
+    br = bundle.response("assets/index-3f2a.js", "gzip, deflate, br")
+    assert br.headers["content-encoding"] == "br"
+    assert brotli.decompress(br.body) == source
+    gz = bundle.response("assets/index-3f2a.js", "gzip, br;q=0")
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(gz.body) == source
+    plain = bundle.response("assets/index-3f2a.js")
+    assert "content-encoding" not in plain.headers
+    assert plain.body == source
+    assert len({br.headers["etag"], gz.headers["etag"], plain.headers["etag"]}) == 3
+    assert br.headers["vary"] == "Accept-Encoding"
+
+
+def test_hashed_assets_are_immutable_and_index_is_revalidated(tmp_path):
+    bundle = make_bundle(tmp_path)
+
+    assert bundle.response("assets/logo-9c1e.png").headers["cache-control"] == "public, max-age=31536000, immutable"
+    index = bundle.response("", "gzip")
+    assert index.headers["cache-control"] == "no-cache"
+    assert bundle.response("", "gzip", if_none_match=index.headers["etag"]).status_code == 304
+
+
+def test_spa_routes_fall_back_to_index_but_missing_assets_are_404(tmp_path):
+    bundle = make_bundle(tmp_path)
+
+    assert bundle.response("entities/shango").body.startswith(b"<html>")
+    assert bundle.response("assets/missing.js").status_code == 404
+    assert bundle.response("../secrets.txt").body.startswith(b"<html>")
@@ -0,0 +1,58 @@
+import json
+
+from engine import validate
+from engine.validate import check_entity, validate_file
+
+MATRIX_KEYS = {"DEFAULT", "Yoruba"}
+
+
+def shango():
+    with open(validate.DATA_PATH, encoding="utf-8") as file:
+        return json.load(file)[0]
+
+
+def test_reports_every_issue_with_its_json_path():
+    entity = shango()
+    del entity["origin"]["country"]
+    entity["attributes"]["domains"] = "Thunder"
+    entity["type_specific"] = {"hero": {"titles": []}, "divinity": {"cult": {"taboos": "none"}}}
+    entity["rendering"]["prompt_variants"].append({"style_id": "manga", "prompt": ""})
+    entity["rendering"]["images"]["watercolor"] = "/generated_images/x.png"
+
+    paths = {issue["path"] for issue in check_entity(entity, MATRIX_KEYS)}
+
+    assert paths == {
+        ".origin.country",
+        ".attributes.domains",
+        ".type_specific.hero",
+        ".type_specific.divinity.cult.taboos",
+        ".rendering.prompt_variants[4].style_id",
+        ".rendering.images.watercolor",
+    }
+
+
+def test_unmapped_ethnicity_is_an_error_only_with_a_regional_image():
+    entity = shango()
+    entity["origin"]["ethnicity"] = "Zulu"
+    assert [issue["level"] for issue in check_entity(entity, MATRIX_KEYS)] == ["error"]
+
+    del entity["rendering"]["images"]["regional_or_ethnic"]
+    assert [issue["level"] for issue in check_entity(entity, MATRIX_KEYS)] == ["warning"]
+
+
+def test_only_changed_entities_are_checked_again(tmp_path, monkeypatch):
+    entities = [shango(), dict(shango(), name="Shango II")]
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(entities), encoding="utf-8")
+    assert validate_file(path, workers=1) == ([], 0)
+
+    checked = []
+    monkeypatch.setattr(validate, "check_entity", lambda item, keys: checked.append(item["name"]) or [])
+    entities[1]["category"] = "Edited"
+    entities.append(shango())  # same content as the first one: cached, but a duplicate name
+    path.write_text(json.dumps(entities), encoding="utf-8")
+
+    issues, from_cache = validate_file(path, workers=1)
+
+    assert checked == ["Shango II"] and from_cache == 2
+    assert [(index, issue["path"]) for index, _, issue in issues] == [(2, ".name")]
@@ -12,6 +12,12 @@ export default defineConfig(({ mode }) => {
         '/generate': 'http://127.0.0.1:8000',
         '/health': 'http://127.0.0.1:8000',
         '/preview': 'http://127.0.0.1:8000',
+        '/entities': 'http://127.0.0.1:8000',
+        '/lineage': 'http://127.0.0.1:8000',
+        '/geo': 'http://127.0.0.1:8000',
+        '/search': 'http://127.0.0.1:8000',
+        '/facets': 'http://127.0.0.1:8000',
+        '/jobs': 'http://127.0.0.1:8000',
       }
     },
     plugins: [react()],